@@ -1,32 +1,12 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from flask_wtf.csrf import CSRFProtect
 from .config import Config
-import locale
-from babel.dates import format_date
-from datetime import datetime
-from zoneinfo import ZoneInfo
 
 db = SQLAlchemy()
 migrate = Migrate()
-
-def date_fr_court(value):
-    if not value:
-        return ''
-    return format_date(value, format="d MMM yyyy", locale='fr_FR')
-
-def jour_fr(value):
-    if not value:
-        return ''
-    return format_date(value, format="EEEE", locale='fr_FR').capitalize()
-
-def datetime_local(value):
-    if not value:
-        return ''
-    # Convertit le temps UTC en fuseau horaire local (ex: Canada/Eastern)
-    local_tz = ZoneInfo("America/Montreal") # ou "America/Montreal" si plus précis
-    local_dt = value.replace(tzinfo=ZoneInfo("UTC")).astimezone(local_tz)
-    return local_dt.strftime('%d/%m/%Y %H:%M:%S')
+csrf = CSRFProtect()
 
 def create_app(config_class=Config):
     app = Flask(__name__)
@@ -34,24 +14,42 @@ def create_app(config_class=Config):
     
     db.init_app(app)
     migrate.init_app(app, db)
+    csrf.init_app(app)
+
+    from app.utils.audit import audit_writer
+    audit_writer.init_app(app)
+
+    from app.utils.sql_metrics import sql_metrics
+    sql_metrics.init_app(app)
+
+    from app.utils.fragment_cache import fragment_cache
+    fragment_cache.init_app(app)
+
+    from app.utils.assets import assets
+    assets.init_app(app)
     
     from app.routes.auth import auth_bp
     from app.routes.employee import employee_bp
     from app.routes.manager import manager_bp
     from app.routes.admin import admin_bp  # Nouvelle ligne
+    from app.routes.api import api_bp
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(employee_bp)
     app.register_blueprint(manager_bp)
     app.register_blueprint(admin_bp)  # Nouvelle ligne
+    app.register_blueprint(api_bp)
+
+    from app.cli import register_commands
+    register_commands(app)
 
-    # 🔥 ENREGISTREMENT DU FILTRE ICI
-    app.jinja_env.filters['date_fr_court'] = date_fr_court
-    app.jinja_env.filters['jour_fr'] = jour_fr
-    app.jinja_env.filters['datetime_local'] = datetime_local
+    # 🔥 ENREGISTREMENT DES FILTRES ICI (voir app/utils/formatting.py)
+    from app.utils.formatting import register_filters
+    register_filters(app)
     
     return app
 
 from app.models.user import User
 from app.models.timesheet import Timesheet
-from app.models.audit_log import AuditLog
\ No newline at end of file
+from app.models.audit_log import AuditLog
+from app.models.rollup import HoursDailyRollup, HoursMonthlyRollup
\ No newline at end of file
@@ -0,0 +1,173 @@
+import time
+import click
+from flask.cli import AppGroup
+
+rollups_cli = AppGroup('rollups', help='Maintenance des tables de cumuls d\'heures.')
+
+
+@rollups_cli.command('rebuild')
+def rollups_rebuild():
+    """Recalcule entièrement les cumuls à partir des feuilles de temps."""
+    from app.services.rollups import rebuild_rollups
+
+    daily_count, monthly_count = rebuild_rollups()
+    click.echo(f"Cumuls reconstruits : {daily_count} lignes journalières, {monthly_count} lignes mensuelles.")
+
+
+@rollups_cli.command('verify')
+@click.option('--limit', default=20, show_default=True, help='Nombre maximal d\'écarts affichés.')
+def rollups_verify(limit):
+    """Compare les cumuls stockés avec un recalcul complet et signale les écarts."""
+    from app.services.rollups import verify_rollups
+
+    drift = verify_rollups()
+    if not drift:
+        click.echo("Aucun écart : les cumuls sont à jour.")
+        return
+
+    for entry in drift[:limit]:
+        click.echo(f"[{entry['table']}] {entry['key']} : attendu={entry['expected']} stocké={entry['stored']}")
+    if len(drift) > limit:
+        click.echo(f"... {len(drift) - limit} écarts supplémentaires")
+    raise click.ClickException(f"{len(drift)} écart(s) détecté(s). Lancez 'flask rollups rebuild' pour corriger.")
+
+
+audit_cli = AppGroup('audit', help='Maintenance du journal d\'audit.')
+
+
+@audit_cli.command('rebuild-facets')
+def audit_rebuild_facets():
+    """Recalcule les compteurs de filtres (actions, utilisateurs) du journal d'audit."""
+    from app.services.audit_facets import rebuild_audit_facets
+
+    rebuild_audit_facets()
+    click.echo("Compteurs de facettes du journal d'audit reconstruits.")
+
+
+@audit_cli.command('rebuild-search')
+def audit_rebuild_search():
+    """Crée si besoin et reconstruit l'index de recherche du journal d'audit."""
+    from app.services.audit_search import audit_search, rebuild_search_index
+
+    rebuild_search_index()
+    click.echo(f"Index de recherche du journal d'audit reconstruit ({type(audit_search()).__name__}).")
+
+
+@audit_cli.command('archive')
+@click.option('--days', type=int, default=None,
+              help='Âge minimal des entrées archivées, en jours (par défaut AUDIT_RETENTION_DAYS).')
+def audit_archive(days):
+    """Déplace les entrées anciennes du journal d'audit dans des segments mensuels compressés."""
+    from datetime import datetime, timedelta
+    from flask import current_app
+    from app.services.audit_archive import archive_audit_logs, archive_dir
+
+    if days is None:
+        days = current_app.config['AUDIT_RETENTION_DAYS']
+    # Limite arrondie à minuit (UTC, comme les horodatages du journal)
+    before = (datetime.utcnow() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    result = archive_audit_logs(before, batch_size=current_app.config['AUDIT_ARCHIVE_BATCH_SIZE'])
+    for month_key in result['segments']:
+        click.echo(f"Segment {month_key} écrit")
+    click.echo(f"{result['deleted']} entrée(s) antérieure(s) au {before:%Y-%m-%d} archivée(s) dans {archive_dir()}.")
+
+
+assets_cli = AppGroup('assets', help='Fichiers statiques : bibliothèques tierces et empreintes.')
+
+
+@assets_cli.command('vendor')
+@click.option('--source', type=click.Path(exists=True, file_okay=False),
+              help='Dossier contenant déjà les fichiers (poste sans accès au CDN).')
+def assets_vendor(source):
+    """Copie Bootstrap dans app/static/vendor après vérification de son empreinte."""
+    from flask import current_app
+    from app.services.assets import vendor_assets
+
+    try:
+        written = vendor_assets(current_app.static_folder, source_dir=source)
+    except (OSError, ValueError) as exc:
+        raise click.ClickException(str(exc))
+    for logical in written:
+        click.echo(f"{logical} copié")
+    click.echo("Lancez 'flask assets build' pour produire les fichiers empreintés.")
+
+
+@assets_cli.command('build')
+@click.option('--clean', is_flag=True, help='Supprime les fichiers empreintés des constructions précédentes.')
+def assets_build(clean):
+    """Produit les fichiers empreintés et précompressés de app/static/dist."""
+    from flask import current_app
+    from app.services.assets import build_assets
+
+    manifest = build_assets(current_app.static_folder, clean=clean)
+    for logical, fingerprinted in sorted(manifest.items()):
+        click.echo(f"{logical} -> {fingerprinted}")
+    click.echo(f"{len(manifest)} fichier(s) dans le manifeste.")
+
+
+@click.command('seed')
+@click.option('--accounts/--no-accounts', default=True, show_default=True,
+              help='Crée les comptes de démonstration (employe, gestionnaire, admin, samuel).')
+@click.option('--users', default=0, show_default=True,
+              help='Utilisateurs synthétiques à générer (≈0,5 % admins, 5 % managers, le reste employés).')
+@click.option('--days', default=90, show_default=True, help='Jours couverts par les feuilles de temps.')
+@click.option('--end-date', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Dernier jour couvert (AAAA-MM-JJ, aujourd\'hui par défaut).')
+@click.option('--audit-per-user', default=20, show_default=True, help='Entrées d\'audit par utilisateur.')
+@click.option('--seed', 'random_seed', default=42, show_default=True, help='Graine du générateur.')
+@click.option('--password', default='password', show_default=True, help='Mot de passe des comptes générés.')
+@click.option('--prefix', default='', help='Préfixe des noms d\'utilisateur générés.')
+@click.option('--chunk-size', default=10000, show_default=True, help='Lignes par INSERT groupé.')
+@click.option('--processes', default=1, show_default=True,
+              help='Processus pour hacher les mots de passe des comptes de démonstration.')
+@click.option('--rebuild/--no-rebuild', default=True, show_default=True,
+              help='Reconstruit les cumuls d\'heures et les facettes d\'audit après la génération.')
+def seed_command(accounts, users, days, end_date, audit_per_user, random_seed, password, prefix,
+                 chunk_size, processes, rebuild):
+    """Peuple la base : comptes de démonstration et données synthétiques en masse."""
+    from app import db
+
+    start = time.perf_counter()
+    if accounts:
+        from app.services.accounts import DEFAULT_ACCOUNTS, create_accounts
+
+        created, skipped = create_accounts(DEFAULT_ACCOUNTS, processes=processes)
+        db.session.commit()
+        for username in skipped:
+            click.echo(f"L'utilisateur '{username}' existe déjà, on passe.")
+        click.echo(f"{len(created)} compte(s) de démonstration créé(s).")
+
+    if users:
+        from app.services.synthetic import generate_dataset
+
+        try:
+            counts = generate_dataset(users=users, days=days, audit_per_user=audit_per_user,
+                                      seed=random_seed, password=password, prefix=prefix,
+                                      end_date=end_date.date() if end_date else None,
+                                      chunk_size=chunk_size,
+                                      progress=lambda message: click.echo(
+                                          f"[{time.perf_counter() - start:7.1f} s] {message}"))
+        except ValueError as exc:
+            db.session.rollback()
+            raise click.ClickException(str(exc))
+        click.echo(f"{sum(counts.values())} lignes générées.")
+
+        if rebuild:
+            # Les insertions groupées contournent la maintenance incrémentale
+            from app.services.rollups import rebuild_rollups
+            from app.services.audit_facets import rebuild_audit_facets
+
+            daily_count, monthly_count = rebuild_rollups()
+            rebuild_audit_facets()
+            click.echo(f"[{time.perf_counter() - start:7.1f} s] Cumuls reconstruits : "
+                       f"{daily_count} journaliers, {monthly_count} mensuels ; facettes d'audit à jour.")
+
+    click.echo(f"Seed terminé en {time.perf_counter() - start:.1f} s.")
+
+
+def register_commands(app):
+    """Enregistre les commandes CLI de l'application."""
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(audit_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(seed_command)
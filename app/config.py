@@ -26,4 +26,57 @@ class Config:
     # Secure : False si vous n’êtes pas encore en HTTPS en prod
     SESSION_COOKIE_SECURE = False
     # SameSite : 'Lax' ou 'Strict' selon vos besoins
-    SESSION_COOKIE_SAMESITE = 'Lax'
\ No newline at end of file
+    SESSION_COOKIE_SAMESITE = 'Lax'
+    # Instantané signé des champs d'affichage (prénom, rôle…) dans la session :
+    # les pages qui n'affichent que la navbar ne chargent pas l'utilisateur
+    USER_SESSION_SNAPSHOT = True
+
+    # ---- Protection CSRF (Flask-WTF) ----
+    # Les FlaskForm valident leur propre jeton ; les formulaires HTML simples
+    # envoient {{ csrf_token() }} et leur vue porte @csrf_required (app/util.py)
+    WTF_CSRF_CHECK_DEFAULT = False
+
+    # ---- Hachage des mots de passe ----
+    # Format Werkzeug : 'scrypt:N:r:p' ou 'pbkdf2:sha256:itérations'.
+    # Les hash d'une autre politique sont remplacés à la connexion suivante.
+    # Voir scripts/bench_password_hashing.py pour choisir le coût.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+
+    # ---- Journal d'audit ----
+    # 'async' : écriture groupée par un thread d'arrière-plan
+    # 'sync'  : insertion immédiate (tests, scripts)
+    AUDIT_LOG_MODE = os.getenv('AUDIT_LOG_MODE', 'async')
+    # Taille maximale d'un lot et délai maximal (secondes) avant écriture
+    AUDIT_LOG_BATCH_SIZE = 200
+    AUDIT_LOG_FLUSH_INTERVAL = 2.0
+    # Capacité de la file ; au-delà, l'événement est écrit de façon synchrone
+    AUDIT_LOG_QUEUE_SIZE = 10000
+    # Tentatives d'écriture d'un lot (délai doublé à chaque échec) avant
+    # abandon ; les entrées abandonnées sont comptées sur la page Système
+    AUDIT_LOG_MAX_ATTEMPTS = 5
+    AUDIT_LOG_RETRY_DELAY = 0.1
+    # Archivage (`flask audit archive`) : entrées plus anciennes que
+    # AUDIT_RETENTION_DAYS jours déplacées dans des segments mensuels
+    # compressés (par défaut instance/audit_archive)
+    AUDIT_RETENTION_DAYS = int(os.getenv('AUDIT_RETENTION_DAYS', 365))
+    AUDIT_ARCHIVE_DIR = os.getenv('AUDIT_ARCHIVE_DIR')
+    AUDIT_ARCHIVE_BATCH_SIZE = 5000
+
+    # ---- Instrumentation SQL ----
+    # Nombre de requêtes et temps en base par requête HTTP, cumulés par
+    # endpoint (page Système) et exposés dans l'en-tête Server-Timing
+    SQL_METRICS_ENABLED = True
+    SQL_METRICS_SERVER_TIMING = True
+    # Pied de page de débogage sur chaque page (toujours affiché en mode debug)
+    SQL_METRICS_DEBUG_FOOTER = os.getenv('SQL_METRICS_DEBUG_FOOTER', '0') == '1'
+
+    # ---- Cache de fragments HTML ({% cache %} dans les gabarits) ----
+    # Navbar et grands tableaux de rapport ; cache propre à chaque processus
+    FRAGMENT_CACHE_ENABLED = os.getenv('FRAGMENT_CACHE_ENABLED', '1') == '1'
+    FRAGMENT_CACHE_SIZE = 512
+    FRAGMENT_CACHE_TTL = 300
+
+    # ---- Fichiers statiques ----
+    # Noms empreintés (`flask assets build`) servis avec un cache d'un an
+    ASSETS_FINGERPRINT = os.getenv('ASSETS_FINGERPRINT', '1') == '1'
+    ASSETS_MAX_AGE = 365 * 24 * 3600
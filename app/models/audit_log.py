@@ -1,7 +1,16 @@
 from datetime import datetime
+from sqlalchemy import event
 from app import db
 
 class AuditLog(db.Model):
+    # Index composites pour la pagination par clé (timestamp, id), avec ou sans
+    # filtre d'action, et pour l'historique d'un utilisateur
+    __table_args__ = (
+        db.Index('ix_audit_log_timestamp_id', 'timestamp', 'id'),
+        db.Index('ix_audit_log_action_timestamp_id', 'action', 'timestamp', 'id'),
+        db.Index('ix_audit_log_username_timestamp', 'username', 'timestamp'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
@@ -14,4 +23,33 @@ class AuditLog(db.Model):
     details = db.Column(db.Text, nullable=True)  # Détails supplémentaires en JSON ou texte
     
     def __repr__(self):
-        return f'<AuditLog {self.timestamp} {self.action} by {self.username or "Anonymous"}>'
\ No newline at end of file
+        return f'<AuditLog {self.timestamp} {self.action} by {self.username or "Anonymous"}>'
+
+
+# Index de recherche propre au moteur (voir app/services/audit_search.py),
+# créé et supprimé avec la table par create_all() / drop_all()
+@event.listens_for(AuditLog.__table__, 'after_create')
+def _create_search_index(target, connection, **kw):
+    from app.services.audit_search import audit_search
+    audit_search(connection.dialect.name).install(connection)
+
+
+@event.listens_for(AuditLog.__table__, 'before_drop')
+def _drop_search_index(target, connection, **kw):
+    from app.services.audit_search import audit_search
+    audit_search(connection.dialect.name).uninstall(connection)
+
+class AuditLogFacet(db.Model):
+    """
+    Compteurs par valeur d'action et par nom d'utilisateur du journal d'audit.
+
+    Maintenue à chaque écriture d'audit : les listes de filtres de la page des
+    journaux se lisent ici au lieu d'un DISTINCT / GROUP BY sur tout AuditLog.
+    """
+    __tablename__ = 'audit_log_facet'
+    facet = db.Column(db.String(16), primary_key=True)   # 'action' ou 'username'
+    value = db.Column(db.String(128), primary_key=True)
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<AuditLogFacet {self.facet}={self.value} ({self.entry_count})>'
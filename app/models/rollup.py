@@ -0,0 +1,25 @@
+from app import db
+
+class HoursDailyRollup(db.Model):
+    """Cumul des heures par utilisateur, jour et statut (maintenu à l'écriture)."""
+    __tablename__ = 'hours_daily_rollup'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    net_minutes = db.Column(db.Integer, nullable=False, default=0)
+    sheet_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<HoursDailyRollup {self.user_id} {self.day} {self.status}>'
+
+class HoursMonthlyRollup(db.Model):
+    """Cumul des heures par utilisateur, mois (premier jour du mois) et statut."""
+    __tablename__ = 'hours_monthly_rollup'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    net_minutes = db.Column(db.Integer, nullable=False, default=0)
+    sheet_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<HoursMonthlyRollup {self.user_id} {self.month} {self.status}>'
@@ -1,7 +1,25 @@
 from datetime import datetime
+from sqlalchemy import case, event, func, or_, select, update
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Session, attributes
+from sqlalchemy.ext.hybrid import hybrid_property
 from app import db
+from app.utils.sql import time_seconds
+
+def _seconds(value):
+    """Secondes entières depuis minuit (fraction ignorée, comme time_seconds en SQL)."""
+    return value.hour * 3600 + value.minute * 60 + value.second
+
 
 class Timesheet(db.Model):
+    # Une seule feuille par employé et par jour (cible des upserts de la grille,
+    # et chemin d'accès « employé + période ») ; (status, date) sert la file
+    # d'approbation et les rapports par statut sur une période
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'date', name='uq_timesheet_user_date'),
+        db.Index('ix_timesheet_status_date', 'status', 'date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     date = db.Column(db.Date, index=True)
@@ -10,13 +28,19 @@ class Timesheet(db.Model):
     break_duration = db.Column(db.Integer, default=0)  # Durée de pause en minutes
     description = db.Column(db.String(200))
     status = db.Column(db.String(20), default='submitted')  # 'submitted', 'approved', 'rejected'
+    # Minutes travaillées nettes, calculées à l'écriture (pause et modificateurs déduits)
+    net_minutes = db.Column(db.Integer, nullable=True)
+    # Dernière écriture (ORM, upsert ou UPDATE groupé) : sert de version aux
+    # ETag de l'API ; microsecondes sous MySQL pour distinguer deux écritures proches
+    updated_at = db.Column(db.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql'),
+                           default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
 
     # Nouveau : code de la journée (ex: Présence, Vacances, etc.)
     code_id = db.Column(db.Integer, db.ForeignKey('code.id'), nullable=True)
     code = db.relationship('Code', backref='timesheets')
 
     # Validateur (manager qui a approuvé/rejeté la feuille de temps)
-    validator_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    validator_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)
 
     # Relation vers les modificateurs associés à ce timesheet
     modificateurs = db.relationship('TimesheetModifier', back_populates='timesheet', cascade="all, delete-orphan")
@@ -24,31 +48,89 @@ class Timesheet(db.Model):
     def __repr__(self):
         return f'<Timesheet {self.id} - {self.date}>'
 
-    def total_hours(self):
-        """Calcule le nombre d'heures travaillées (en tenant compte des pauses)"""
+    def compute_net_minutes(self, ignored=()):
+        """
+        Recalcule les minutes travaillées nettes (pause et modificateurs déduits).
+
+        Args:
+            ignored: Liens TimesheetModifier à exclure (en cours de suppression)
+        """
         if not self.start_time or not self.end_time:
             return 0
 
-        start_datetime = datetime.combine(self.date, self.start_time)
-        end_datetime = datetime.combine(self.date, self.end_time)
-        total_seconds = (end_datetime - start_datetime).total_seconds()
+        # Secondes entières, minutes tronquées : même règle que computed_net_minutes()
+        total_seconds = _seconds(self.end_time) - _seconds(self.start_time)
 
         # Soustraction de la durée de pause (en secondes)
-        total_seconds -= self.break_duration * 60
+        total_seconds -= (self.break_duration or 0) * 60
 
-        # Application des modificateurs (exemple : soustraction pour “repas”)
+        # Application des modificateurs (exemple : soustraction pour “repas”)
         for mod_assoc in self.modificateurs:
+            if mod_assoc in ignored:
+                continue
             mod = mod_assoc.modifier
             if mod and mod.valeur_minutes:
                 total_seconds += mod.valeur_minutes * 60  # Peut être négatif
 
-        # Conversion en heures
-        return max(0, total_seconds / 3600)
+        return max(0, total_seconds // 60)
+
+    def total_hours(self):
+        """Calcule le nombre d'heures travaillées (en tenant compte des pauses)"""
+        # Chemin rapide : valeur enregistrée à l'écriture (voir _sync_net_minutes)
+        if self.net_minutes is not None:
+            return self.net_minutes / 60
+        return self.compute_net_minutes() / 60
+
+    @classmethod
+    def computed_net_minutes(cls):
+        """
+        Expression SQL équivalente à compute_net_minutes(), pour les mises à
+        jour groupées : secondes entières, puis division entière par 60.
+        """
+        from app.models.code import Modifier
+
+        modifier_minutes = (
+            select(func.coalesce(func.sum(Modifier.valeur_minutes), 0))
+            .select_from(TimesheetModifier)
+            .join(Modifier, Modifier.id == TimesheetModifier.modifier_id)
+            .where(TimesheetModifier.timesheet_id == cls.id)
+            .correlate_except(TimesheetModifier, Modifier)
+            .scalar_subquery()
+        )
+        net_seconds = (
+            time_seconds(cls.end_time) - time_seconds(cls.start_time)
+            - func.coalesce(cls.break_duration, 0) * 60
+            + modifier_minutes * 60
+        )
+        return case(
+            (cls.start_time.is_(None) | cls.end_time.is_(None), 0),
+            (net_seconds > 0, net_seconds // 60),
+            else_=0
+        )
+
+    @classmethod
+    def refresh_net_minutes(cls, *criteria):
+        """Requête UPDATE recalculant net_minutes dans la base pour les lignes visées."""
+        return update(cls.__table__).where(*criteria).values(net_minutes=cls.computed_net_minutes())
+
+    @hybrid_property
+    def hours(self):
+        """Heures travaillées ; utilisable en SQL (SUM, GROUP BY) côté classe."""
+        return self.total_hours()
+
+    @hours.expression
+    def hours(cls):
+        # Lit la colonne enregistrée ; le calcul complet ne sert qu'aux lignes
+        # qui n'ont pas encore été remplies.
+        return case(
+            (cls.net_minutes.isnot(None), cls.net_minutes / 60.0),
+            else_=cls.computed_net_minutes() / 60.0
+        )
 
 class TimesheetModifier(db.Model):
     __tablename__ = 'timesheet_modifier'
     id = db.Column(db.Integer, primary_key=True)
-    timesheet_id = db.Column(db.Integer, db.ForeignKey('timesheet.id'))
+    timesheet_id = db.Column(db.Integer, db.ForeignKey('timesheet.id'), index=True)
     modifier_id = db.Column(db.Integer, db.ForeignKey('modifier.id'))
 
     # Relations pour accès facile
@@ -57,3 +139,52 @@ class TimesheetModifier(db.Model):
 
     def __repr__(self):
         return f'<TimesheetModifier {self.timesheet_id} - {self.modifier_id}>'
+
+
+# Champs dont dépend net_minutes
+_NET_MINUTES_FIELDS = ('date', 'start_time', 'end_time', 'break_duration', 'modificateurs')
+
+
+@event.listens_for(Session, 'before_flush')
+def _sync_net_minutes(session, flush_context, instances):
+    """Tient Timesheet.net_minutes à jour pour les écritures passant par l'ORM."""
+    from app.models.code import Modifier
+
+    touched = set()
+    removed_links = {obj for obj in session.deleted if isinstance(obj, TimesheetModifier)}
+    pending_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(removed_links):
+        if isinstance(obj, Timesheet):
+            state = attributes.instance_state(obj)
+            if state.key is None or any(state.attrs[name].history.has_changes() for name in _NET_MINUTES_FIELDS):
+                touched.add(obj)
+        elif isinstance(obj, TimesheetModifier):
+            if obj.timesheet is not None:
+                touched.add(obj.timesheet)
+            elif obj.timesheet_id is not None:
+                pending_ids.add(obj.timesheet_id)
+
+    for timesheet in touched:
+        if timesheet not in session.deleted:
+            timesheet.net_minutes = timesheet.compute_net_minutes(ignored=removed_links)
+
+    # Liens créés par identifiant seul, ou valeur d'un modificateur modifiée :
+    # recalcul en SQL une fois les changements écrits
+    changed_modifiers = [obj.id for obj in session.dirty
+                         if isinstance(obj, Modifier) and obj.id is not None
+                         and attributes.instance_state(obj).attrs.valeur_minutes.history.has_changes()]
+    if pending_ids or changed_modifiers:
+        session.info.setdefault('_net_minutes_refresh', []).append((pending_ids, changed_modifiers))
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_net_minutes(session, flush_context):
+    for timesheet_ids, modifier_ids in session.info.pop('_net_minutes_refresh', []):
+        criteria = []
+        if timesheet_ids:
+            criteria.append(Timesheet.id.in_(timesheet_ids))
+        if modifier_ids:
+            criteria.append(Timesheet.id.in_(
+                select(TimesheetModifier.timesheet_id).where(TimesheetModifier.modifier_id.in_(modifier_ids))
+            ))
+        session.connection().execute(Timesheet.refresh_net_minutes(or_(*criteria)))
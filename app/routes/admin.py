@@ -1,14 +1,29 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session, send_file, Response
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, send_file, Response, stream_with_context
 from app import db
 from app.models.user import User
 from app.models.timesheet import Timesheet
 from app.models.audit_log import AuditLog
-from app.util import login_required, role_required
+from app.util import login_required, role_required, csrf_required, get_current_user, user_snapshot
 from datetime import datetime, timedelta
 from sqlalchemy import func
 import io
 import csv
-from app.utils.audit import log_audit
+from itertools import chain
+from app.utils.audit import log_audit, audit_writer
+from app.utils.cache import TTLCache, invalidate_all_caches
+from app.utils.fragment_cache import fragment_cache
+from app.utils.sql_metrics import sql_metrics
+from app.utils.pagination import keyset_paginate
+from app.services.reporting import user_period_stats, global_stats, invalidate_global_stats, data_version
+from app.services.rollups import delete_user_rollups
+from app.models.rollup import HoursDailyRollup
+from app.services.audit_facets import audit_facets
+from app.services.audit_archive import archive_boundary, archived_page, count_archived, iter_archived
+from app.services.audit_search import search_criterion
+from app.services.exports import (
+    stream_csv, stream_json_array, stream_ndjson,
+    user_rows, user_record, timesheet_rows, timesheet_record, audit_log_rows
+)
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -16,23 +31,21 @@ admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 @role_required('admin')
 def dashboard():
     """Tableau de bord administrateur avec statistiques globales."""
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
-    # Statistiques utilisateurs
-    employee_count = User.query.filter_by(role='employee').count()
-    manager_count = User.query.filter_by(role='manager').count()
-    admin_count = User.query.filter_by(role='admin').count()
+    # Statistiques utilisateurs, feuilles de temps et heures du mois
+    # (requêtes groupées, mises en cache quelques secondes)
+    stats = global_stats()
+    employee_count = stats['users']['employee']
+    manager_count = stats['users']['manager']
+    admin_count = stats['users']['admin']
     
-    # Statistiques feuilles de temps
-    total_timesheets = Timesheet.query.count()
-    pending_timesheets = Timesheet.query.filter_by(status='submitted').count()
-    approved_timesheets = Timesheet.query.filter_by(status='approved').count()
-    rejected_timesheets = Timesheet.query.filter_by(status='rejected').count()
+    total_timesheets = stats['timesheets']['total']
+    pending_timesheets = stats['timesheets']['submitted']
+    approved_timesheets = stats['timesheets']['approved']
+    rejected_timesheets = stats['timesheets']['rejected']
     
-    # Statistiques heures totales (tous utilisateurs confondus)
-    first_day = datetime.today().replace(day=1)
-    monthly_timesheets = Timesheet.query.filter(Timesheet.date >= first_day).all()
-    total_hours = sum(timesheet.total_hours() for timesheet in monthly_timesheets)
+    total_hours = stats['month_hours']
     
     return render_template('admin/dashboard.html', 
                           title='Tableau de bord Admin',
@@ -50,7 +63,7 @@ def dashboard():
 @role_required('admin')
 def user_list():
     """Liste de tous les utilisateurs avec options de gestion."""
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     users = User.query.all()
     
     return render_template('admin/user_list.html',
@@ -91,7 +104,7 @@ def create_user():
             if user:
                 raise ValidationError('Cet email est déjà utilisé.')
     
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     form = UserForm()
     
     if form.validate_on_submit():
@@ -106,6 +119,7 @@ def create_user():
         
         db.session.add(new_user)
         db.session.commit()
+        invalidate_global_stats()
         
         log_audit(
             action='create',
@@ -168,7 +182,7 @@ def edit_user(id):
                 if user:
                     raise ValidationError('Cet email est déjà utilisé.')
     
-    current_user = User.query.get(session['user_id'])
+    current_user = get_current_user()
     user_to_edit = User.query.get_or_404(id)
     
     # Ne pas permettre de modifier le compte admin principal
@@ -217,6 +231,10 @@ def edit_user(id):
             "password_changed": bool(form.new_password.data)
         }
 
+        # Garder l'instantané de session à jour si l'admin modifie son propre compte
+        if user_to_edit.id == current_user.id:
+            session['user_snapshot'] = user_snapshot(user_to_edit)
+
         log_audit(
             action='update',
             resource='user',
@@ -228,6 +246,7 @@ def edit_user(id):
         )
 
         db.session.commit()
+        invalidate_global_stats()
         flash(f'Utilisateur {user_to_edit.username} mis à jour avec succès!', 'success')
         return redirect(url_for('admin.user_list'))
         
@@ -242,7 +261,7 @@ def edit_user(id):
 @role_required('admin')
 def delete_user(id):
     """Suppression d'un utilisateur."""
-    current_user = User.query.get(session['user_id'])
+    current_user = get_current_user()
     user_to_delete = User.query.get_or_404(id)
     
     # Empêcher la suppression de son propre compte
@@ -267,10 +286,12 @@ def delete_user(id):
         # Supprimer les feuilles de temps associées
         Timesheet.query.filter_by(user_id=user_to_delete.id).delete()
         Timesheet.query.filter_by(validator_id=user_to_delete.id).update({Timesheet.validator_id: None})
+        delete_user_rollups(user_to_delete.id)
         
         username = user_to_delete.username
         db.session.delete(user_to_delete)
         db.session.commit()
+        invalidate_global_stats()
         
         log_audit(
             action='delete',
@@ -290,7 +311,7 @@ def delete_user(id):
 @role_required('admin')
 def reports():
     """Page principale des rapports administratifs."""
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     return render_template('admin/reports.html',
                           title='Rapports administratifs',
@@ -304,7 +325,7 @@ def system():
     import os
     from sqlalchemy import inspect
     
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     # Informations système
     system_info = {
@@ -321,54 +342,68 @@ def system():
     # Variables d'environnement (filtrer les sensibles)
     env_vars = {k: '***' if k in ('SECRET_KEY', 'DATABASE_URI') else v 
                for k, v in os.environ.items()}
+    
+    # Routes les plus coûteuses en SQL depuis le démarrage du processus
+    endpoints_by_queries = sql_metrics.top_endpoints(order_by='queries')
+    endpoints_by_db_time = sql_metrics.top_endpoints(order_by='db_ms')
+    
+    # Fragments HTML en cache : succès, échecs et temps de rendu
+    fragment_stats = fragment_cache.stats()
+    
+    # Écritures du journal d'audit : file, nouvelles tentatives, entrées perdues
+    audit_writer_stats = audit_writer.stats()
                
     return render_template('admin/system.html',
                           title='Informations système',
                           current_user=user,
                           system_info=system_info,
                           tables=tables,
-                          env_vars=env_vars)
+                          env_vars=env_vars,
+                          endpoints_by_queries=endpoints_by_queries,
+                          endpoints_by_db_time=endpoints_by_db_time,
+                          fragment_stats=fragment_stats,
+                          audit_writer_stats=audit_writer_stats,
+                          fragment_cache_size=fragment_cache.size)
+
+@admin_bp.route('/system/sql-metrics/reset', methods=['POST'])
+@role_required('admin')
+@csrf_required
+def reset_sql_metrics():
+    """Remet à zéro les cumuls SQL par route."""
+    sql_metrics.reset()
+    flash('Statistiques SQL remises à zéro')
+    return redirect(url_for('admin.system'))
+
+@admin_bp.route('/system/cache/clear', methods=['POST'])
+@role_required('admin')
+@csrf_required
+def clear_caches():
+    """Vide les caches du processus (statistiques, fragments HTML, facettes)."""
+    invalidate_all_caches()
+    fragment_cache.reset_stats()
+    log_audit(action='cache_cleared', resource='system')
+    flash('Caches vidés')
+    return redirect(url_for('admin.system'))
 
 @admin_bp.route('/reports/activity')
 @role_required('admin')
 def user_activity_report():
     """Génère un rapport d'activité des utilisateurs."""
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     # Calcul de la période (par défaut, les 30 derniers jours)
     end_date = datetime.now()
     start_date = end_date - timedelta(days=30)
     
-    # Récupérer les données
-    user_data = []
-    all_users = User.query.all()
-    
-    for u in all_users:
-        # Feuilles de temps soumises dans la période
-        submitted_count = Timesheet.query.filter(
-            Timesheet.user_id == u.id,
-            Timesheet.date >= start_date,
-            Timesheet.date <= end_date
-        ).count()
-        
-        # Heures totales dans la période
-        timesheets = Timesheet.query.filter(
-            Timesheet.user_id == u.id,
-            Timesheet.date >= start_date,
-            Timesheet.date <= end_date,
-            Timesheet.status == 'approved'
-        ).all()
-        
-        total_hours = sum(ts.total_hours() for ts in timesheets)
-        
-        user_data.append({
-            'id': u.id,
-            'username': u.username,
-            'full_name': f"{u.first_name} {u.last_name}",
-            'role': u.role,
-            'submitted_count': submitted_count,
-            'total_hours': total_hours
-        })
+    # Récupérer les données (une seule requête groupée)
+    user_data = [{
+        'id': stat['user'].id,
+        'username': stat['user'].username,
+        'full_name': f"{stat['user'].first_name} {stat['user'].last_name}",
+        'role': stat['user'].role,
+        'submitted_count': stat['timesheet_count'],
+        'total_hours': stat['total_hours']
+    } for stat in user_period_stats(start_date, end_date)]
     
     return render_template('admin/report_activity.html',
                           title='Rapport d\'activité',
@@ -381,45 +416,37 @@ def user_activity_report():
 @role_required('admin')
 def global_hours_report():
     """Génère un rapport des heures globales."""
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     # Par défaut, rapport pour le mois en cours
     today = datetime.today()
     first_day = today.replace(day=1)
     last_day = today
     
-    # Statistiques par jour
-    days = {}
-    
-    # Récupérer toutes les feuilles approuvées du mois
-    timesheets = Timesheet.query.filter(
-        Timesheet.date >= first_day,
-        Timesheet.date <= last_day,
-        Timesheet.status == 'approved'
-    ).all()
-    
-    # Calculer les heures par jour
-    for ts in timesheets:
-        day_str = ts.date.strftime('%Y-%m-%d')
-        if day_str not in days:
-            days[day_str] = 0
-        
-        days[day_str] += ts.total_hours()
+    approved_in_month = (
+        HoursDailyRollup.day >= first_day.date(),
+        HoursDailyRollup.day <= last_day.date(),
+        HoursDailyRollup.status == 'approved'
+    )
     
-    # Trier par date
-    sorted_days = sorted(days.items())
+    # Heures par jour, lues dans les cumuls journaliers (triées par date)
+    daily_rows = db.session.query(HoursDailyRollup.day, func.sum(HoursDailyRollup.net_minutes)) \
+                           .filter(*approved_in_month) \
+                           .group_by(HoursDailyRollup.day) \
+                           .order_by(HoursDailyRollup.day) \
+                           .all()
+    sorted_days = [(day.strftime('%Y-%m-%d'), (minutes or 0) / 60) for day, minutes in daily_rows]
     
     # Calculer le total général
-    total_hours = sum(days.values())
+    total_hours = sum(hours for _, hours in sorted_days)
     
     # Grouper par rôle
-    role_hours = {}
-    for ts in timesheets:
-        user_role = User.query.get(ts.user_id).role
-        if user_role not in role_hours:
-            role_hours[user_role] = 0
-        
-        role_hours[user_role] += ts.total_hours()
+    role_rows = db.session.query(User.role, func.sum(HoursDailyRollup.net_minutes)) \
+                          .join(User, User.id == HoursDailyRollup.user_id) \
+                          .filter(*approved_in_month) \
+                          .group_by(User.role) \
+                          .all()
+    role_hours = {role: (minutes or 0) / 60 for role, minutes in role_rows}
     
     return render_template('admin/report_hours.html',
                           title='Rapport des heures',
@@ -428,33 +455,34 @@ def global_hours_report():
                           total_hours=total_hours,
                           role_hours=role_hours,
                           first_day=first_day,
-                          last_day=last_day)
+                          last_day=last_day,
+                          report_version=data_version())
 
 @admin_bp.route('/reports/system_audit')
 @role_required('admin')
 def system_audit_report():
     """Génère un rapport d'audit système."""
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
-    # Ici, vous pourriez implémenter un vrai système d'audit
-    # Pour l'instant, on génère juste des statistiques de base
+    # Statistiques partagées avec le tableau de bord (voir global_stats)
+    stats = global_stats()
     
     # Statistiques utilisateurs
     user_stats = {
-        'total': User.query.count(),
+        'total': stats['users']['total'],
         'by_role': {
-            'admin': User.query.filter_by(role='admin').count(),
-            'manager': User.query.filter_by(role='manager').count(),
-            'employee': User.query.filter_by(role='employee').count()
+            'admin': stats['users']['admin'],
+            'manager': stats['users']['manager'],
+            'employee': stats['users']['employee']
         }
     }
     
     # Statistiques des feuilles de temps
     timesheet_stats = {
-        'total': Timesheet.query.count(),
-        'approved': Timesheet.query.filter_by(status='approved').count(),
-        'rejected': Timesheet.query.filter_by(status='rejected').count(),
-        'pending': Timesheet.query.filter_by(status='submitted').count()
+        'total': stats['timesheets']['total'],
+        'approved': stats['timesheets']['approved'],
+        'rejected': stats['timesheets']['rejected'],
+        'pending': stats['timesheets']['submitted']
     }
     
     return render_template('admin/report_audit.html',
@@ -521,62 +549,52 @@ def export_users(format):
 @admin_bp.route('/export/timesheets/<format>')
 @role_required('admin')
 def export_timesheets(format):
-    """Exporte la liste des feuilles de temps au format spécifié."""
-    timesheets = Timesheet.query.all()
-    
+    """Exporte la liste des feuilles de temps au format spécifié (en flux)."""
     if format == 'csv':
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # En-tête
-        writer.writerow(['ID', 'Utilisateur', 'Date', 'Début', 'Fin', 'Pause', 'Heures', 'Statut'])
-        
-        # Données
-        for ts in timesheets:
-            user = User.query.get(ts.user_id)
-            
-            writer.writerow([
-                ts.id,
-                f"{user.first_name} {user.last_name}",
-                ts.date.strftime('%Y-%m-%d'),
-                ts.start_time.strftime('%H:%M'),
-                ts.end_time.strftime('%H:%M'),
-                ts.break_duration,
-                f"{ts.total_hours():.2f}",
-                ts.status
-            ])
-        
-        output.seek(0)
+        records = ([
+            r['id'],
+            r['user_name'],
+            r['date'],
+            r['start_time'],
+            r['end_time'],
+            r['break_duration'],
+            r['total_hours'],
+            r['status']
+        ] for r in map(timesheet_record, timesheet_rows()))
         
         return Response(
-            output,
+            stream_with_context(stream_csv(
+                ['ID', 'Utilisateur', 'Date', 'Début', 'Fin', 'Pause', 'Heures', 'Statut'],
+                records
+            )),
             mimetype="text/csv",
             headers={"Content-Disposition": "attachment;filename=timesheets_export.csv"}
         )
     
-    elif format == 'json':
-        import json
-        
-        ts_data = []
-        for ts in timesheets:
-            user = User.query.get(ts.user_id)
-            
-            ts_data.append({
-                'id': ts.id,
-                'user': {
-                    'id': user.id,
-                    'name': f"{user.first_name} {user.last_name}"
-                },
-                'date': ts.date.strftime('%Y-%m-%d'),
-                'start_time': ts.start_time.strftime('%H:%M'),
-                'end_time': ts.end_time.strftime('%H:%M'),
-                'break_duration': ts.break_duration,
-                'total_hours': f"{ts.total_hours():.2f}",
-                'status': ts.status
-            })
+    elif format in ('json', 'ndjson'):
+        records = ({
+            'id': r['id'],
+            'user': {
+                'id': r['user_id'],
+                'name': r['user_name']
+            },
+            'date': r['date'],
+            'start_time': r['start_time'],
+            'end_time': r['end_time'],
+            'break_duration': r['break_duration'],
+            'total_hours': r['total_hours'],
+            'status': r['status']
+        } for r in map(timesheet_record, timesheet_rows()))
+        
+        if format == 'ndjson':
+            return Response(
+                stream_with_context(stream_ndjson(records)),
+                mimetype="application/x-ndjson",
+                headers={"Content-Disposition": "attachment;filename=timesheets_export.ndjson"}
+            )
         
         return Response(
-            json.dumps(ts_data, indent=4),
+            stream_with_context(stream_json_array(records)),
             mimetype="application/json",
             headers={"Content-Disposition": "attachment;filename=timesheets_export.json"}
         )
@@ -588,54 +606,43 @@ def export_timesheets(format):
 @admin_bp.route('/export/complete/<format>')
 @role_required('admin')
 def export_complete(format):
-    """Exporte toutes les données de l'application au format spécifié."""
-    users = User.query.all()
-    timesheets = Timesheet.query.all()
-    
+    """Exporte toutes les données de l'application au format spécifié (en flux)."""
     if format == 'csv':
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # PARTIE 1: Utilisateurs
-        writer.writerow(['--- UTILISATEURS ---'])
-        writer.writerow(['ID', 'Nom d\'utilisateur', 'Email', 'Prénom', 'Nom', 'Rôle'])
-        
-        for user in users:
-            writer.writerow([
-                user.id,
-                user.username,
-                user.email,
-                user.first_name,
-                user.last_name,
-                user.role
-            ])
-        
-        # Ligne vide de séparation
-        writer.writerow([])
-        
-        # PARTIE 2: Feuilles de temps
-        writer.writerow(['--- FEUILLES DE TEMPS ---'])
-        writer.writerow(['ID', 'Utilisateur ID', 'Nom utilisateur', 'Date', 'Début', 'Fin', 'Pause', 'Heures', 'Statut'])
-        
-        for ts in timesheets:
-            user = User.query.get(ts.user_id)
+        def generate():
+            # PARTIE 1: Utilisateurs
+            yield from stream_csv(
+                ['--- UTILISATEURS ---'],
+                [['ID', 'Nom d\'utilisateur', 'Email', 'Prénom', 'Nom', 'Rôle']]
+            )
+            yield from stream_csv(None, ([
+                row.id,
+                row.username,
+                row.email,
+                row.first_name,
+                row.last_name,
+                row.role
+            ] for row in user_rows()))
             
-            writer.writerow([
-                ts.id,
-                ts.user_id,
-                f"{user.first_name} {user.last_name}",
-                ts.date.strftime('%Y-%m-%d'),
-                ts.start_time.strftime('%H:%M'),
-                ts.end_time.strftime('%H:%M'),
-                ts.break_duration,
-                f"{ts.total_hours():.2f}",
-                ts.status
+            # Ligne vide de séparation, puis PARTIE 2: Feuilles de temps
+            yield from stream_csv(None, [
+                [],
+                ['--- FEUILLES DE TEMPS ---'],
+                ['ID', 'Utilisateur ID', 'Nom utilisateur', 'Date', 'Début', 'Fin', 'Pause', 'Heures', 'Statut']
             ])
-        
-        output.seek(0)
+            yield from stream_csv(None, ([
+                r['id'],
+                r['user_id'],
+                r['user_name'],
+                r['date'],
+                r['start_time'],
+                r['end_time'],
+                r['break_duration'],
+                r['total_hours'],
+                r['status']
+            ] for r in map(timesheet_record, timesheet_rows())))
         
         return Response(
-            output,
+            stream_with_context(generate()),
             mimetype="text/csv",
             headers={"Content-Disposition": "attachment;filename=timeportal_export_complete.csv"}
         )
@@ -643,111 +650,156 @@ def export_complete(format):
     elif format == 'json':
         import json
         
-        # Structure complète des données
-        data = {
-            'exportDate': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'users': [{
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'role': user.role
-            } for user in users],
-            'timesheets': []
-        }
-        
-        # Ajouter les données des feuilles de temps
-        for ts in timesheets:
-            user = User.query.get(ts.user_id)
-            
-            data['timesheets'].append({
-                'id': ts.id,
-                'user_id': ts.user_id,
-                'user_name': f"{user.first_name} {user.last_name}",
-                'date': ts.date.strftime('%Y-%m-%d'),
-                'start_time': ts.start_time.strftime('%H:%M'),
-                'end_time': ts.end_time.strftime('%H:%M'),
-                'break_duration': ts.break_duration,
-                'total_hours': f"{ts.total_hours():.2f}",
-                'status': ts.status,
-                'validator_id': ts.validator_id
-            })
+        def generate():
+            # Même structure que l'export historique, écrite au fil de l'eau
+            export_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            yield '{"exportDate": %s,\n"users": ' % json.dumps(export_date)
+            yield from stream_json_array(map(user_record, user_rows()))
+            yield ',\n"timesheets": '
+            yield from stream_json_array(map(timesheet_record, timesheet_rows()))
+            yield '}\n'
         
         return Response(
-            json.dumps(data, indent=4),
+            stream_with_context(generate()),
             mimetype="application/json",
             headers={"Content-Disposition": "attachment;filename=timeportal_export_complete.json"}
         )
     
+    elif format == 'ndjson':
+        def generate():
+            # Une ligne par enregistrement, typée par le champ "type"
+            yield from stream_ndjson(dict(type='user', **user_record(row)) for row in user_rows())
+            yield from stream_ndjson(dict(type='timesheet', **r) for r in map(timesheet_record, timesheet_rows()))
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype="application/x-ndjson",
+            headers={"Content-Disposition": "attachment;filename=timeportal_export_complete.ndjson"}
+        )
+    
     else:
         flash(f"Format d'export '{format}' non supporté", "danger")
         return redirect(url_for('admin.reports'))
     
-@admin_bp.route('/security/audit-logs')
-@role_required('admin')
-def audit_logs():
-    user = User.query.get(session['user_id'])
-    """Affiche les journaux d'audit de sécurité."""
-    # Paramètres de filtrage
-    page = request.args.get('page', 1, type=int)
-    action = request.args.get('action', '')
-    username = request.args.get('username', '')
-    from_date = request.args.get('from_date', '')
-    to_date = request.args.get('to_date', '')
-    
-    # Construire la requête de base
-    query = AuditLog.query
-    
-    # Appliquer les filtres
-    if action:
-        query = query.filter(AuditLog.action == action)
-    
-    if username:
-        query = query.filter(AuditLog.username.ilike(f'%{username}%'))
+# Nombre total d'entrées par combinaison de filtres, recalculé au plus une
+# fois par minute : le COUNT(*) complet ne s'exécute plus à chaque page.
+_audit_count_cache = TTLCache(ttl=60, maxsize=128)
+
+def _audit_log_filters(action, username, search, from_date, to_date, report_errors=False):
+    """Lit les filtres communs à la page et à l'export des journaux (dates invalides ignorées)."""
+    filters = {'action': action or None, 'username': username or None, 'search': search.strip() or None,
+               'start': None, 'end': None}
     
     if from_date:
         try:
-            from_date_obj = datetime.strptime(from_date, '%Y-%m-%d')
-            query = query.filter(AuditLog.timestamp >= from_date_obj)
+            filters['start'] = datetime.strptime(from_date, '%Y-%m-%d')
         except ValueError:
-            flash('Format de date invalide pour la date de début', 'danger')
+            if report_errors:
+                flash('Format de date invalide pour la date de début', 'danger')
     
     if to_date:
         try:
-            to_date_obj = datetime.strptime(to_date + ' 23:59:59', '%Y-%m-%d %H:%M:%S')
-            query = query.filter(AuditLog.timestamp <= to_date_obj)
+            filters['end'] = datetime.strptime(to_date + ' 23:59:59', '%Y-%m-%d %H:%M:%S')
         except ValueError:
-            flash('Format de date invalide pour la date de fin', 'danger')
+            if report_errors:
+                flash('Format de date invalide pour la date de fin', 'danger')
     
-    # Trier par date (plus récent en premier)
-    query = query.order_by(AuditLog.timestamp.desc())
+    return filters
+
+def _audit_log_criteria(filters):
+    """Construit les filtres SQL correspondant à _audit_log_filters()."""
+    criteria = []
     
-    # Pagination
-    per_page = 50  # Nombre d'entrées par page
-    logs = query.paginate(page=page, per_page=per_page, error_out=False)
+    if filters['action']:
+        criteria.append(AuditLog.action == filters['action'])
+    
+    # Sous-chaînes cherchées dans l'index de recherche du moteur (FTS5, pg_trgm)
+    if filters['username']:
+        criteria.append(search_criterion(filters['username'], 'username'))
+    
+    if filters['search']:
+        criteria.append(search_criterion(filters['search']))
     
-    # Actions distinctes pour le filtre
-    distinct_actions = db.session.query(AuditLog.action).distinct().all()
-    actions = [action[0] for action in distinct_actions]
+    if filters['start']:
+        criteria.append(AuditLog.timestamp >= filters['start'])
     
-    # Utilisateurs distincts pour le filtre (limité aux 100 plus actifs)
-    distinct_usernames = db.session.query(AuditLog.username, db.func.count(AuditLog.id).label('count')) \
-                                .group_by(AuditLog.username) \
-                                .order_by(db.text('count DESC')) \
-                                .limit(100) \
-                                .all()
-    usernames = [u[0] for u in distinct_usernames if u[0]]
+    if filters['end']:
+        criteria.append(AuditLog.timestamp <= filters['end'])
+    
+    return criteria
+
+def _archive_read_through(filters):
+    """
+    Limite des archives si l'intervalle de dates filtré commence avant elle
+    (date de début antérieure, ou absente avec une date de fin), sinon None.
+
+    Les entrées antérieures sont alors lues dans les segments archivés
+    (voir app/services/audit_archive.py) et la table ne fournit que les
+    entrées postérieures : aucune entrée n'est comptée deux fois. La date
+    de fin ne fait que limiter les segments lus.
+    """
+    if not filters['start'] and not filters['end']:
+        return None
+    boundary = archive_boundary()
+    if boundary is None:
+        return None
+    if filters['start'] is None or filters['start'] < boundary:
+        return boundary
+    return None
+
+@admin_bp.route('/security/audit-logs')
+@role_required('admin')
+def audit_logs():
+    """Affiche les journaux d'audit de sécurité."""
+    user = get_current_user()
+    # Paramètres de filtrage
+    action = request.args.get('action', '')
+    username = request.args.get('username', '')
+    search = request.args.get('q', '')
+    from_date = request.args.get('from_date', '')
+    to_date = request.args.get('to_date', '')
+    
+    filters = _audit_log_filters(action, username, search, from_date, to_date, report_errors=True)
+    criteria = _audit_log_criteria(filters)
+    # Dates antérieures à la limite de rétention : lecture des archives en plus de la table
+    boundary = _archive_read_through(filters)
+    if boundary:
+        criteria.append(AuditLog.timestamp >= boundary)
+    query = AuditLog.query.filter(*criteria)
+    
+    # Pagination par clé (timestamp, id) : plus récent en premier, navigation
+    # « plus anciens / plus récents » à coût constant quelle que soit la page
+    per_page = 50  # Nombre d'entrées par page
+    logs = keyset_paginate(
+        query, AuditLog.timestamp, AuditLog.id, per_page,
+        older_than=request.args.get('older_than'),
+        newer_than=request.args.get('newer_than'),
+        extra=(lambda *key_range: archived_page(*key_range, **filters)) if boundary else None
+    )
+    
+    # Total approximatif (mis en cache quelques instants)
+    total_count = _audit_count_cache.get_or_set(
+        (action, username, search, from_date, to_date, boundary),
+        lambda: query.order_by(None).count() + (count_archived(**filters) if boundary else 0)
+    )
+    
+    # Listes des filtres (actions, 100 utilisateurs les plus actifs), lues
+    # dans les compteurs de facettes plutôt que sur tout le journal
+    actions, usernames = audit_facets()
     
     return render_template('admin/audit_logs.html',
                           title='Journaux de sécurité',
                           logs=logs,
+                          total_count=total_count,
                           actions=actions,
                           usernames=usernames,
                           current_user=user,
+                          archive_boundary=archive_boundary(),
+                          archives_included=boundary is not None,
                           current_filters={
                               'action': action,
                               'username': username,
+                              'q': search,
                               'from_date': from_date,
                               'to_date': to_date
                           })
@@ -759,63 +811,39 @@ def export_audit_logs():
     # Paramètres de filtrage (similaires à la route audit_logs)
     action = request.args.get('action', '')
     username = request.args.get('username', '')
+    search = request.args.get('q', '')
     from_date = request.args.get('from_date', '')
     to_date = request.args.get('to_date', '')
     
-    # Construire la requête avec les mêmes filtres
-    query = AuditLog.query
-    
-    if action:
-        query = query.filter(AuditLog.action == action)
-    
-    if username:
-        query = query.filter(AuditLog.username.ilike(f'%{username}%'))
-    
-    if from_date:
-        try:
-            from_date_obj = datetime.strptime(from_date, '%Y-%m-%d')
-            query = query.filter(AuditLog.timestamp >= from_date_obj)
-        except ValueError:
-            pass
-    
-    if to_date:
-        try:
-            to_date_obj = datetime.strptime(to_date + ' 23:59:59', '%Y-%m-%d %H:%M:%S')
-            query = query.filter(AuditLog.timestamp <= to_date_obj)
-        except ValueError:
-            pass
-    
-    # Trier par date (plus ancien en premier pour l'export)
-    query = query.order_by(AuditLog.timestamp)
-    
-    # Récupérer tous les logs correspondants
-    logs = query.all()
-    
-    # Préparer le CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # En-tête
-    writer.writerow(['ID', 'Date/Heure', 'Utilisateur', 'Action', 'Ressource', 'ID Ressource', 'Adresse IP', 'Agent utilisateur', 'Détails'])
-    
-    # Données
-    for log in logs:
-        writer.writerow([
-            log.id,
-            log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            log.username or 'Anonymous',
-            log.action,
-            log.resource,
-            log.resource_id or '',
-            log.ip_address or '',
-            log.user_agent or '',
-            log.details or ''
-        ])
-    
-    output.seek(0)
+    # Construire les filtres (mêmes règles que la page des journaux)
+    filters = _audit_log_filters(action, username, search, from_date, to_date)
+    criteria = _audit_log_criteria(filters)
+    boundary = _archive_read_through(filters)
+    if boundary:
+        # Entrées archivées d'abord (toutes antérieures à la limite), puis la table
+        criteria.append(AuditLog.timestamp >= boundary)
+        rows = chain(iter_archived(**filters), audit_log_rows(*criteria))
+    else:
+        rows = audit_log_rows(*criteria)
+    
+    # Logs triés du plus ancien au plus récent, lus par lots et écrits en flux
+    records = ([
+        log.id,
+        log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+        log.username or 'Anonymous',
+        log.action,
+        log.resource,
+        log.resource_id or '',
+        log.ip_address or '',
+        log.user_agent or '',
+        log.details or ''
+    ] for log in rows)
     
     return Response(
-        output,
+        stream_with_context(stream_csv(
+            ['ID', 'Date/Heure', 'Utilisateur', 'Action', 'Ressource', 'ID Ressource', 'Adresse IP', 'Agent utilisateur', 'Détails'],
+            records
+        )),
         mimetype="text/csv",
         headers={"Content-Disposition": f"attachment;filename=audit_logs_{datetime.now().strftime('%Y%m%d')}.csv"}
     )
\ No newline at end of file
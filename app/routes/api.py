@@ -0,0 +1,136 @@
+from functools import wraps
+from flask import Blueprint, request, jsonify, make_response, session
+from app import db
+from app.models.user import User
+from app.util import get_current_user
+from app.services.periods import PERIODS_PER_YEAR, period_bounds
+from app.services.timesheets import PERIOD_COLUMNS, period_versions, period_rows
+
+api_bp = Blueprint('api', __name__, url_prefix='/api')
+
+# Rôles autorisés à lire les feuilles des autres utilisateurs
+READER_ROLES = ('manager', 'admin')
+# Utilisateurs au plus par appel du point d'accès groupé
+BATCH_MAX_USERS = 200
+
+
+def _error(message, status):
+    return jsonify({'error': message}), status
+
+
+def api_login_required(roles=None):
+    """Comme role_required, mais répond 401/403 en JSON au lieu de rediriger."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if 'user_id' not in session:
+                return _error('Authentification requise', 401)
+            if roles and getattr(get_current_user(), 'role', None) not in roles:
+                return _error('Accès non autorisé', 403)
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+def _period(year, period):
+    if not 1 <= period <= PERIODS_PER_YEAR:
+        return None
+    return period_bounds(period, year)
+
+
+def _revalidate(response):
+    # Données personnelles : cache du navigateur seulement, revalidé à chaque fois
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+@api_bp.route('/timesheets/<int:year>/<int:period>')
+@api_login_required()
+def period_timesheets(year, period):
+    """
+    Feuilles d'une période de paie en lignes compactes, avec ETag.
+
+    ?user_id= lit la période d'un autre utilisateur (managers et admins).
+    Si If-None-Match contient la version courante, répond 304 sans charger
+    les lignes : seule la requête de version (agrégat sur l'index
+    (user_id, date)) est exécutée.
+    """
+    bounds = _period(year, period)
+    if bounds is None:
+        return _error('Période inconnue', 404)
+    start_date, end_date = bounds
+
+    user = get_current_user()
+    user_id = request.args.get('user_id', user.id, type=int)
+    if user_id != user.id:
+        if user.role not in READER_ROLES:
+            return _error('Accès non autorisé', 403)
+        if db.session.get(User, user_id) is None:
+            return _error('Utilisateur inconnu', 404)
+
+    version = period_versions([user_id], start_date, end_date)[user_id]
+    if request.if_none_match.contains(version):
+        response = make_response('', 304)
+    else:
+        response = jsonify({
+            'user_id': user_id,
+            'year': year,
+            'period': period,
+            'start': start_date.isoformat(),
+            'end': end_date.isoformat(),
+            'columns': PERIOD_COLUMNS,
+            'rows': period_rows([user_id], start_date, end_date)[user_id]
+        })
+    response.set_etag(version)
+    return _revalidate(response)
+
+
+@api_bp.route('/timesheets/batch', methods=['POST'])
+@api_login_required(READER_ROLES)
+def batch_timesheets():
+    """
+    Périodes de plusieurs employés en un appel (tableaux de bord des managers).
+
+    Corps JSON : year, period, user_ids et versions ({user_id: version déjà
+    connue}). Les versions sont calculées en une requête groupée ; seules
+    les périodes modifiées sont rechargées, en une seule requête. Chaque
+    utilisateur reçoit {'version', 'not_modified': true} ou {'version', 'rows'}.
+    """
+    payload = request.get_json(silent=True) or {}
+    try:
+        year = int(payload['year'])
+        period = int(payload['period'])
+        known = {int(user_id): version for user_id, version in (payload.get('versions') or {}).items()}
+        user_ids = list(dict.fromkeys(int(user_id) for user_id in payload.get('user_ids') or known))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return _error('Corps invalide : year, period et user_ids (ou versions) sont attendus', 400)
+    if not user_ids:
+        return _error('Aucun utilisateur demandé', 400)
+    if len(user_ids) > BATCH_MAX_USERS:
+        return _error(f'Au plus {BATCH_MAX_USERS} utilisateurs par appel', 400)
+
+    bounds = _period(year, period)
+    if bounds is None:
+        return _error('Période inconnue', 404)
+    start_date, end_date = bounds
+
+    versions = period_versions(user_ids, start_date, end_date)
+    changed = [user_id for user_id in user_ids if known.get(user_id) != versions[user_id]]
+    rows = period_rows(changed, start_date, end_date) if changed else {}
+
+    users = {}
+    for user_id in user_ids:
+        if user_id in rows:
+            users[str(user_id)] = {'version': versions[user_id], 'rows': rows[user_id]}
+        else:
+            users[str(user_id)] = {'version': versions[user_id], 'not_modified': True}
+
+    return _revalidate(jsonify({
+        'year': year,
+        'period': period,
+        'start': start_date.isoformat(),
+        'end': end_date.isoformat(),
+        'columns': PERIOD_COLUMNS,
+        'users': users
+    }))
@@ -5,6 +5,8 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, BooleanField, SubmitField
 from wtforms.validators import DataRequired, Email, EqualTo, ValidationError
 from app.utils.audit import log_audit
+from app.util import get_current_user, user_snapshot
+from app.utils.passwords import verify_and_upgrade
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -28,7 +30,8 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(username=form.username.data).first()
-        if user is None or not user.check_password(form.password.data):
+        valid, rehashed = verify_and_upgrade(user, form.password.data) if user else (False, False)
+        if not valid:
             log_audit(
                 action='login_failed',
                 resource='auth',
@@ -38,6 +41,10 @@ def login():
             flash('Nom d\'utilisateur ou mot de passe invalide')
             return redirect(url_for('auth.login'))
         
+        # Hash produit avec une ancienne politique : remplacé à la connexion
+        if rehashed:
+            db.session.commit()
+
         log_audit(
             action='login_success',
             resource='auth',
@@ -47,6 +54,8 @@ def login():
         session['user_id'] = user.id
         session['role'] = user.role
         session['username'] = user.username
+        # Champs d'affichage (navbar) servis sans requête sur les pages suivantes
+        session['user_snapshot'] = user_snapshot(user)
         
         next_page = request.args.get('next')
         if not next_page or next_page.startswith('http'):
@@ -95,9 +104,7 @@ def logout():
 
     return resp
 
-@auth_bp.context_processor
+@auth_bp.app_context_processor
 def inject_user():
-    if 'user_id' in session:
-        user = User.query.get(session['user_id'])
-        return {'current_user': user}
-    return {'current_user': None}
\ No newline at end of file
+    # Utilisateur résolu une seule fois par requête (voir get_current_user)
+    return {'current_user': get_current_user()}
\ No newline at end of file
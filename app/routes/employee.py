@@ -1,27 +1,19 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session
+from flask import Blueprint, render_template, redirect, url_for, flash, request
 from app import db
 from app.models.timesheet import Timesheet
-from app.models.user import User
-from app.util import login_required, role_required
+from app.util import login_required, role_required, get_current_user
 from flask_wtf import FlaskForm
 from wtforms import DateField, TimeField, IntegerField, StringField, SubmitField
 from wtforms.validators import DataRequired, Optional, NumberRange, Length
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, time
 from app.utils.audit import log_audit
 from app.models.code import Code, Modifier
+from app.services.timesheets import load_period, save_period
+from app.services.reporting import invalidate_global_stats
+from app.services.periods import get_period_dates, current_period
 
 employee_bp = Blueprint('employee', __name__, url_prefix='/employee')
 
-def get_period_dates(period_num, year):
-    # Tu dois adapter le calcul du début de la première période selon ton année fiscale !
-    # Ici, on considère que la première période commence le lundi de la 1re semaine de l'année.
-    start_of_year = date(year, 1, 1)
-    while start_of_year.weekday() != 0:  # 0 = lundi
-        start_of_year += timedelta(days=1)
-    start = start_of_year + timedelta(weeks=(period_num - 1) * 2)
-    days = [start + timedelta(days=i) for i in range(14)]
-    return days
-
 class TimesheetForm(FlaskForm):
     date = DateField('Date', validators=[DataRequired()], default=date.today)
     start_time = TimeField('Heure de début', validators=[DataRequired()])
@@ -33,7 +25,7 @@ class TimesheetForm(FlaskForm):
 @employee_bp.route('/dashboard')
 @role_required('employee')
 def dashboard():
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     # Récupérer les feuilles de temps récentes de l'employé
     recent_timesheets = Timesheet.query.filter_by(user_id=user.id).order_by(Timesheet.date.desc()).limit(5).all()
     
@@ -47,20 +39,13 @@ def dashboard():
 @employee_bp.route('/timesheet', methods=['GET', 'POST'])
 @role_required('employee')
 def timesheet():
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     year = date.today().year
 
     # Période courante par défaut
     period = request.args.get('period', type=int)
     if not period:
-        today = date.today()
-        start_of_year = date(year, 1, 1)
-        while start_of_year.weekday() != 0:
-            start_of_year += timedelta(days=1)
-        weeks_since = (today - start_of_year).days // 7
-        period = (weeks_since // 2) + 1
-        period = min(max(1, period), 26)
-        return redirect(url_for('employee.timesheet', period=period))
+        return redirect(url_for('employee.timesheet', period=current_period()))
 
     days = get_period_dates(period, year)
     weeks = [days[:7], days[7:]]
@@ -74,8 +59,12 @@ def timesheet():
     periode_fin = days[-1]
     readonly = periode_fin < today
 
+    # Toute la période en une seule requête (clé : date)
+    timesheet_data = load_period(user.id, days)
+
     # 1️⃣ SAUVEGARDE DES DONNÉES
     if request.method == 'POST' and not readonly:
+        entries = {}
         for day in days:
             start = request.form.get(f"start_{day}")
             end = request.form.get(f"end_{day}")
@@ -84,24 +73,19 @@ def timesheet():
             if not (start and end and code_id):
                 continue
 
-            ts = Timesheet.query.filter_by(user_id=user.id, date=day).first()
-            if not ts:
-                ts = Timesheet(user_id=user.id, date=day)
-                db.session.add(ts)
-            ts.start_time = start
-            ts.end_time = end
-            ts.code_id = code_id
-            ts.status = 'submitted'
+            try:
+                entries[day] = (time.fromisoformat(start), time.fromisoformat(end), int(code_id))
+            except ValueError:
+                flash(f"Saisie invalide pour le {day.strftime('%d/%m/%Y')}, journée ignorée.", "danger")
 
-        db.session.commit()
+        # Un seul upsert pour les journées modifiées ; cumuls dans la même transaction
+        if save_period(user.id, entries, timesheet_data):
+            db.session.commit()
+            invalidate_global_stats()
         flash("Feuille de temps sauvegardée.", "success")
         return redirect(url_for('employee.timesheet', period=period))
 
-    # 2️⃣ PRÉPARATION DES DONNÉES POUR AFFICHAGE
-    timesheet_data = {}
-    for day in days:
-        ts = Timesheet.query.filter_by(user_id=user.id, date=day).first()
-        timesheet_data[day] = ts
+    # 2️⃣ PRÉPARATION DES DONNÉES POUR AFFICHAGE (déjà chargées ci-dessus)
 
     prev_period = period - 1 if period > 1 else 26
     next_period = period + 1 if period < 26 else 1
@@ -1,36 +1,40 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, jsonify
 from app import db
 from app.models.timesheet import Timesheet
 from app.models.user import User
-from app.util import login_required, role_required
+from app.models.code import Code
+from app.util import login_required, role_required, csrf_required, get_current_user
+from app.utils.pagination import keyset_paginate
 from sqlalchemy import func
-from datetime import datetime, timedelta
-from app.utils.audit import log_audit
-from werkzeug.security import generate_password_hash
+from datetime import date, datetime, timedelta
+from app.utils.audit import log_audit_batch
+from app.services.reporting import user_period_stats, global_stats, invalidate_global_stats, data_version
+from app.services.timesheets import (
+    review_timesheets, pending_criteria, pending_queue, pending_by_employee, pending_by_period,
+    employee_history
+)
+from app.services.periods import period_bounds
+from app.models.rollup import HoursMonthlyRollup
 
 manager_bp = Blueprint('manager', __name__, url_prefix='/manager')
 
 @manager_bp.route('/dashboard')
 @role_required('manager')
 def dashboard():
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
-    # Nombre total d'employés
-    employee_count = User.query.filter_by(role='employee').count()
+    # Nombre d'employés, feuilles en attente et heures approuvées du mois
+    stats = global_stats()
+    employee_count = stats['users']['employee']
+    pending_count = stats['timesheets']['submitted']
     
-    # Nombre de feuilles de temps en attente d'approbation
-    pending_count = Timesheet.query.filter_by(status='submitted').count()
-    
-    # Heures totales pour le mois en cours - Calculé manuellement
+    # Heures totales approuvées pour le mois en cours (tables de cumuls)
     first_day = datetime.today().replace(day=1)
-    approved_timesheets = Timesheet.query.filter(
-        Timesheet.date >= first_day,
-        Timesheet.status == 'approved'
-    ).all()
-    
-    total_hours = 0
-    for timesheet in approved_timesheets:
-        total_hours += timesheet.total_hours()
+    total_minutes = db.session.query(func.sum(HoursMonthlyRollup.net_minutes)).filter(
+        HoursMonthlyRollup.month >= first_day.date(),
+        HoursMonthlyRollup.status == 'approved'
+    ).scalar() or 0
+    total_hours = total_minutes / 60
     
     return render_template('manager/dashboard.html', 
                           title='Tableau de bord manager', 
@@ -40,96 +44,183 @@ def dashboard():
                           total_hours=total_hours,
                           now=datetime.now())
 
+def _parse_date(value):
+    return date.fromisoformat(value) if value else None
+
+
+# Feuilles par page dans la file d'approbation
+PENDING_PER_PAGE = 50
+
+
+def _pending_filters():
+    """Filtres de la file d'approbation lus dans la requête (valeurs invalides ignorées)."""
+    filters = {
+        'employee_id': request.args.get('employee_id', type=int),
+        'code_id': request.args.get('code_id', type=int),
+        'start': None,
+        'end': None
+    }
+    for name in ('start', 'end'):
+        try:
+            filters[name] = _parse_date(request.args.get(name))
+        except ValueError:
+            flash('Date de filtre invalide, ignorée', 'warning')
+    return filters
+
+
 @manager_bp.route('/timesheets/pending')
 @role_required('manager')
 def pending_timesheets():
-    user = User.query.get(session['user_id'])
-    # Récupérer toutes les feuilles de temps en attente
-    timesheets = Timesheet.query.filter_by(status='submitted').order_by(Timesheet.date.desc()).all()
-    
+    """
+    File d'approbation : liste paginée par clé (date, id), filtrable par
+    employé, période et code, ou résumé groupé par employé / par période.
+    """
+    user = get_current_user()
+    view = request.args.get('view', 'list')
+    filters = _pending_filters()
+    criteria = pending_criteria(filters['employee_id'], filters['start'], filters['end'], filters['code_id'])
+
+    page = groups = None
+    if view == 'employee':
+        groups = pending_by_employee(criteria)
+    elif view == 'period':
+        groups = pending_by_period(criteria)
+    else:
+        view = 'list'
+        page = keyset_paginate(
+            pending_queue(criteria), Timesheet.date, Timesheet.id, PENDING_PER_PAGE,
+            older_than=request.args.get('older_than'),
+            newer_than=request.args.get('newer_than')
+        )
+
+    # Sans filtre, le compteur global (en cache) suffit
+    if any(value is not None for value in filters.values()):
+        pending_count = db.session.query(func.count(Timesheet.id)).filter(*criteria).scalar()
+    else:
+        pending_count = global_stats()['timesheets']['submitted']
+
+    employee = db.session.get(User, filters['employee_id']) if filters['employee_id'] else None
+    # Paramètres d'URL des filtres actifs (liens d'onglets et de pagination)
+    filter_args = {name: value for name, value in filters.items() if value is not None}
+
     return render_template('manager/pending_timesheets.html', 
                           title='Feuilles de temps en attente',
                           current_user=user, 
-                          timesheets=timesheets)
+                          view=view,
+                          page=page,
+                          groups=groups,
+                          pending_count=pending_count,
+                          filters=filters,
+                          filter_args=filter_args,
+                          employee=employee,
+                          codes=Code.query.order_by(Code.nom).all())
+
+def _review_summary(summary):
+    """Résumé d'une décision groupée, prêt pour flash() ou une réponse JSON."""
+    verb = 'approuvée(s)' if summary['status'] == 'approved' else 'rejetée(s)'
+    return f"{summary['count']} feuille(s) {verb} pour {summary['employees']} employé(s), " \
+           f"{summary['hours']:.2f} h au total"
+
+
+def _apply_review(action, **selection):
+    """Décision, cumuls et audit groupé : un seul commit pour toute la sélection."""
+    summary = review_timesheets(action, session['user_id'], **selection)
+    if summary['count']:
+        db.session.commit()
+        invalidate_global_stats()
+        log_audit_batch(action, 'timesheet', [
+            (row['id'], {
+                "user_id": row['user_id'],
+                "date": row['date'].strftime('%Y-%m-%d'),
+                "hours": "%.2f" % row['hours']
+            }) for row in summary['rows']
+        ])
+    return summary
+
+
+@manager_bp.route('/timesheets/review', methods=['POST'])
+@role_required('manager')
+@csrf_required
+def review_timesheets_bulk():
+    """
+    Approuve ou rejette plusieurs feuilles en une transaction.
+
+    Formulaire : action ('approve' ou 'reject') et soit ids (cases cochées),
+    soit employee_id avec start/end (AAAA-MM-JJ) ou period/year, et
+    éventuellement code_id, plus le jeton csrf_token (ou l'en-tête X-CSRFToken).
+    Répond en JSON si le client le demande, sinon redirige vers la file.
+    """
+    action = request.form.get('action')
+    employee_id = request.form.get('employee_id', type=int)
+    try:
+        if employee_id:
+            period = request.form.get('period', type=int)
+            if period:
+                start_date, end_date = period_bounds(period, request.form.get('year', date.today().year, type=int))
+            else:
+                start_date = _parse_date(request.form.get('start'))
+                end_date = _parse_date(request.form.get('end'))
+            summary = _apply_review(action, user_id=employee_id, start_date=start_date, end_date=end_date,
+                                    code_id=request.form.get('code_id', type=int))
+        else:
+            ids = [int(value) for value in request.form.getlist('ids') if value.isdigit()]
+            summary = _apply_review(action, ids=ids)
+    except ValueError as exc:
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({'error': str(exc)}), 400
+        flash(str(exc), 'danger')
+        return redirect(request.referrer or url_for('manager.pending_timesheets'))
+
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            'status': summary['status'],
+            'count': summary['count'],
+            'employees': summary['employees'],
+            'hours': round(summary['hours'], 2),
+            'ids': [row['id'] for row in summary['rows']]
+        })
+    flash(_review_summary(summary))
+    return redirect(request.referrer or url_for('manager.pending_timesheets'))
+
 
 @manager_bp.route('/timesheet/<int:id>/approve')
 @role_required('manager')
 def approve_timesheet(id):
-    timesheet = Timesheet.query.get_or_404(id)
-    timesheet.status = 'approved'
-    timesheet.validator_id = session['user_id']
-    db.session.commit()
-
-    log_audit(
-        action='approve',
-        resource='timesheet',
-        resource_id=timesheet.id,
-        details={
-            "user_id": timesheet.user_id,
-            "date": timesheet.date.strftime('%Y-%m-%d'),
-            "hours": "%.2f" % timesheet.total_hours()
-        }
-    )
-    
-    flash('Feuille de temps approuvée')
-    return redirect(url_for('manager.pending_timesheets'))
+    Timesheet.query.get_or_404(id)
+    if _apply_review('approve', ids=[id])['count']:
+        flash('Feuille de temps approuvée')
+    else:
+        flash('Cette feuille de temps a déjà été traitée')
+    # Retour à la même page de la file (filtres et curseur conservés)
+    return redirect(request.referrer or url_for('manager.pending_timesheets'))
 
 @manager_bp.route('/timesheet/<int:id>/reject')
 @role_required('manager')
 def reject_timesheet(id):
-    timesheet = Timesheet.query.get_or_404(id)
-    timesheet.status = 'rejected'
-    timesheet.validator_id = session['user_id']
-    db.session.commit()
-
-    log_audit(
-        action='reject',
-        resource='timesheet',
-        resource_id=timesheet.id,
-        details={
-            "user_id": timesheet.user_id,
-            "date": timesheet.date.strftime('%Y-%m-%d'),
-            "hours": "%.2f" % timesheet.total_hours()
-        }
-    )
-    
-    flash('Feuille de temps rejetée')
-    return redirect(url_for('manager.pending_timesheets'))
+    Timesheet.query.get_or_404(id)
+    if _apply_review('reject', ids=[id])['count']:
+        flash('Feuille de temps rejetée')
+    else:
+        flash('Cette feuille de temps a déjà été traitée')
+    # Retour à la même page de la file (filtres et curseur conservés)
+    return redirect(request.referrer or url_for('manager.pending_timesheets'))
 
 from app.models.timesheet import Timesheet  # Assure-toi que ce import est présent
 
 @manager_bp.route('/employees')
 @role_required('manager')
 def employee_list():
-    user = User.query.get(session['user_id'])
-    employees = User.query.filter_by(role='employee').all()
+    user = get_current_user()
     
     # Pour les statistiques du mois en cours
     first_day_of_month = datetime.today().replace(day=1)
     
-    # Pré-calculer les statistiques pour chaque employé
-    employee_stats = []
-    for employee in employees:
-        # Nombre de feuilles ce mois
-        timesheet_count = Timesheet.query.filter(
-            Timesheet.user_id == employee.id,
-            Timesheet.date >= first_day_of_month
-        ).count()
-        
-        # Heures approuvées ce mois
-        approved_timesheets = Timesheet.query.filter(
-            Timesheet.user_id == employee.id,
-            Timesheet.date >= first_day_of_month,
-            Timesheet.status == 'approved'
-        ).all()
-        
-        total_hours = sum(ts.total_hours() for ts in approved_timesheets)
-        
-        employee_stats.append({
-            'employee': employee,
-            'timesheet_count': timesheet_count,
-            'total_hours': total_hours
-        })
+    # Nombre de feuilles et heures approuvées de chaque employé (une seule requête)
+    employee_stats = [{
+        'employee': stat['user'],
+        'timesheet_count': stat['timesheet_count'],
+        'total_hours': stat['total_hours']
+    } for stat in user_period_stats(first_day_of_month, role='employee')]
     
     return render_template('manager/employee_list.html', 
                           title='Liste des employés', 
@@ -140,50 +231,33 @@ def employee_list():
 @manager_bp.route('/reports/hours')
 @role_required('manager')
 def hours_report():
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     # Rapport des heures par employé pour le mois en cours
     first_day = datetime.today().replace(day=1)
     
-    # Récupérer tous les employés
-    employees = User.query.filter_by(role='employee').all()
-    
-    # Préparer les données pour le template
-    employee_hours = []
-    total_all_hours = 0
-    
-    for employee in employees:
-        # Récupérer toutes les feuilles de temps approuvées pour cet employé ce mois-ci
-        timesheets = Timesheet.query.filter(
-            Timesheet.user_id == employee.id,
-            Timesheet.date >= first_day,
-            Timesheet.status == 'approved'
-        ).all()
-        
-        # Calculer le total des heures
-        hours_sum = sum(timesheet.total_hours() for timesheet in timesheets)
-        total_all_hours += hours_sum
-        
-        # Ajouter aux résultats
-        employee_hours.append({
-            'id': employee.id,
-            'first_name': employee.first_name,
-            'last_name': employee.last_name,
-            'total_hours': hours_sum
-        })
+    # Heures approuvées de chaque employé (une seule requête)
+    employee_hours = [{
+        'id': stat['user'].id,
+        'first_name': stat['user'].first_name,
+        'last_name': stat['user'].last_name,
+        'total_hours': stat['total_hours']
+    } for stat in user_period_stats(first_day, role='employee')]
+    total_all_hours = sum(e['total_hours'] for e in employee_hours)
     
     return render_template('manager/hours_report.html', 
                           title='Rapport des heures', 
                           current_user=user,
                           employee_hours=employee_hours,
                           total_all_hours=total_all_hours,
-                          month=first_day.strftime('%B %Y'))
+                          month=first_day.strftime('%B %Y'),
+                          report_version=data_version())
 
 
 @manager_bp.route('/employee/<int:id>/timesheets')
 @role_required('manager')
 def view_employee_timesheets(id):
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     employee = User.query.get_or_404(id)
     
     # Vérifier que c'est bien un employé
@@ -191,19 +265,24 @@ def view_employee_timesheets(id):
         flash('Cet utilisateur n\'est pas un employé', 'danger')
         return redirect(url_for('manager.employee_list'))
     
-    # Récupérer les feuilles de temps de l'employé
-    timesheets = Timesheet.query.filter_by(user_id=employee.id).order_by(Timesheet.date.desc()).all()
+    # Fenêtre de périodes de paie (courante et précédente par défaut) ;
+    # ?until=AAAA-MM-JJ affiche la fenêtre qui se termine avec la période de cette date
+    try:
+        anchor = _parse_date(request.args.get('until'))
+    except ValueError:
+        anchor = None
+    history = employee_history(employee.id, anchor)
     
     return render_template('manager/employee_timesheets.html', 
                           title=f'Feuilles de temps - {employee.first_name} {employee.last_name}', 
                           current_user=user,
                           employee=employee,
-                          timesheets=timesheets)
+                          history=history)
 
 @manager_bp.route('/employee/add', methods=['GET', 'POST'])
 @role_required('manager')
 def add_employee():
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     if request.method == 'POST':
         username = request.form.get('username')
         email = request.form.get('email')
@@ -234,9 +313,10 @@ def add_employee():
             last_name=last_name,
             role='employee'
         )
-        new_user.password_hash = generate_password_hash(password)
+        new_user.set_password(password)
         db.session.add(new_user)
         db.session.commit()
+        invalidate_global_stats()
 
         flash('Employé ajouté avec succès!', 'success')
         return redirect(url_for('manager.employee_list'))
@@ -0,0 +1,42 @@
+from app import db
+from app.models.user import User
+from app.utils.passwords import hash_passwords
+
+# Comptes de démonstration créés par `flask seed` et les scripts d'initialisation
+DEFAULT_ACCOUNTS = [
+    {'username': 'employe', 'email': 'employe@example.com', 'password': 'password', 'role': 'employee', 'first_name': 'Test', 'last_name': 'Employee'},
+    {'username': 'gestionnaire', 'email': 'gestionnaire@example.com', 'password': 'password', 'role': 'manager', 'first_name': 'Admin', 'last_name': 'Manager'},
+    {'username': 'admin', 'email': 'admin@example.com', 'password': 'password', 'role': 'admin', 'first_name': 'Super', 'last_name': 'Admin'},
+    {'username': 'samuel', 'email': 'samuel@example.com', 'password': 'password', 'role': 'admin', 'first_name': 'Samuel', 'last_name': 'Fréchette'},
+]
+
+# Comptes des scripts d'initialisation (init_db.py, init_db_app.py) : sans les
+# administrateurs, pour ne jamais ajouter d'admin au mot de passe connu à la
+# base visée par le .env ; `flask seed --accounts` crée les quatre
+INIT_ACCOUNTS = [account for account in DEFAULT_ACCOUNTS if account['role'] != 'admin']
+
+
+def create_accounts(accounts, processes=1):
+    """
+    Crée les comptes absents, en une requête de vérification. Chaque compte
+    est haché séparément (sel propre), même si des mots de passe se répètent.
+    L'appelant reste responsable du commit.
+
+    Args:
+        accounts (list[dict]): Champs de User, plus 'password'
+        processes (int): Processus utilisés pour hacher les mots de passe
+
+    Returns:
+        tuple: (noms créés, noms déjà existants)
+    """
+    usernames = [account['username'] for account in accounts]
+    existing = {username for (username,) in
+                db.session.query(User.username).filter(User.username.in_(usernames))}
+    to_create = [account for account in accounts if account['username'] not in existing]
+
+    hashes = hash_passwords([account['password'] for account in to_create], processes=processes)
+    for account, password_hash in zip(to_create, hashes):
+        fields = {key: value for key, value in account.items() if key != 'password'}
+        db.session.add(User(password_hash=password_hash, **fields))
+
+    return [account['username'] for account in to_create], [u for u in usernames if u in existing]
@@ -0,0 +1,154 @@
+import base64
+import gzip
+import hashlib
+import json
+import posixpath
+import re
+import urllib.request
+from pathlib import Path
+from app.utils.assets import DIST_DIR, MANIFEST_NAME, VENDOR_ASSETS
+
+# Dossiers de static/ traités par build_assets()
+ASSET_DIRS = ('css', 'js', 'vendor')
+# Longueur de l'empreinte (hexadécimal) insérée dans les noms de fichiers
+HASH_LENGTH = 10
+# Types précompressés en .gz (les images et polices le sont déjà)
+COMPRESSIBLE_SUFFIXES = {'.css', '.js', '.svg', '.json', '.txt'}
+
+# Références d'une feuille de style : url(...) et @import "..."
+_CSS_REFERENCE = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)|@import\s+(['"])([^'"]+)\3''')
+# Commentaire de carte de sources : les fichiers .map ne sont pas copiés
+_SOURCE_MAP = re.compile(rb'/[*/]# sourceMappingURL=[^\n*]*(\*/)?')
+
+
+def _fingerprinted_name(logical, content):
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    stem, dot, suffix = logical.rpartition('.')
+    return f'{stem}.{digest}.{suffix}' if dot else f'{logical}.{digest}'
+
+
+def _rewrite_css(logical, content, resolve):
+    """
+    Remplace les références relatives d'une feuille de style par les noms
+    empreintés : style.css importe alors palette.<empreinte>.css, et une
+    modification de palette.css change aussi l'empreinte de style.css.
+    """
+    base = posixpath.dirname(logical)
+
+    def replace(match):
+        is_url = match.group(2) is not None
+        quote, target = match.group(1, 2) if is_url else match.group(3, 4)
+        path, suffix = re.match(r'([^?#]*)(.*)', target).groups()
+        if not path or re.match(r'^([a-z][a-z0-9+.-]*:|/)', path, re.IGNORECASE):
+            return match.group(0)
+        referenced = resolve(posixpath.normpath(posixpath.join(base, path)))
+        if referenced is None:
+            return match.group(0)
+        # dist/ reproduit l'arborescence de static/ : même dossier de départ
+        new_target = posixpath.relpath(referenced, base or '.') + suffix
+        return f'url({quote}{new_target}{quote})' if is_url else f'@import {quote}{new_target}{quote}'
+
+    return _CSS_REFERENCE.sub(replace, content.decode('utf-8')).encode('utf-8')
+
+
+def build_assets(static_folder, clean=False):
+    """
+    Produit les fichiers empreintés, leurs versions .gz et le manifeste.
+
+    Args:
+        static_folder (str | Path): Dossier static/ de l'application
+        clean (bool): Supprime de dist/ les fichiers absents du nouveau
+            manifeste (à éviter si d'anciennes pages peuvent encore les demander)
+
+    Returns:
+        dict: Manifeste écrit (chemin logique -> chemin empreinté dans dist/)
+    """
+    static = Path(static_folder)
+    dist = static / DIST_DIR
+    sources = {
+        path.relative_to(static).as_posix(): path
+        for directory in ASSET_DIRS if (static / directory).is_dir()
+        for path in sorted((static / directory).rglob('*'))
+        if path.is_file() and not path.name.endswith(('.gz', '.map'))
+    }
+    manifest = {}
+    in_progress = set()
+
+    def build(logical):
+        if logical in manifest:
+            return manifest[logical]
+        if logical not in sources or logical in in_progress:
+            return None
+        in_progress.add(logical)
+        content = _SOURCE_MAP.sub(b'', sources[logical].read_bytes())
+        if logical.endswith('.css'):
+            content = _rewrite_css(logical, content, build)
+        in_progress.discard(logical)
+
+        fingerprinted = _fingerprinted_name(logical, content)
+        target = dist / fingerprinted
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        if target.suffix in COMPRESSIBLE_SUFFIXES:
+            # mtime=0 : même contenu, même fichier .gz d'une construction à l'autre
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+            if len(compressed) < len(content):
+                Path(f'{target}.gz').write_bytes(compressed)
+        manifest[logical] = fingerprinted
+        return fingerprinted
+
+    for logical in sources:
+        build(logical)
+
+    dist.mkdir(parents=True, exist_ok=True)
+    (dist / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+
+    if clean:
+        keep = {dist / MANIFEST_NAME}
+        for fingerprinted in manifest.values():
+            keep.update({dist / fingerprinted, dist / f'{fingerprinted}.gz'})
+        for path in sorted(dist.rglob('*'), reverse=True):
+            if path.is_file() and path not in keep:
+                path.unlink()
+            elif path.is_dir() and not any(path.iterdir()):
+                path.rmdir()
+    return manifest
+
+
+def _integrity(content):
+    return 'sha384-' + base64.b64encode(hashlib.sha384(content).digest()).decode('ascii')
+
+
+def vendor_assets(static_folder, source_dir=None, timeout=30):
+    """
+    Copie les bibliothèques tierces (VENDOR_ASSETS) dans static/vendor.
+
+    Chaque fichier est vérifié avec son empreinte SRI avant d'être écrit.
+
+    Args:
+        static_folder (str | Path): Dossier static/ de l'application
+        source_dir (str | Path, optional): Dossier contenant déjà les fichiers
+            (même nom que dans VENDOR_ASSETS), pour un poste sans accès au CDN
+        timeout (int): Délai de téléchargement, en secondes
+
+    Returns:
+        list[str]: Chemins logiques écrits
+
+    Raises:
+        ValueError: Empreinte différente de celle attendue
+    """
+    static = Path(static_folder)
+    written = []
+    for logical, (url, integrity) in VENDOR_ASSETS.items():
+        if source_dir is not None:
+            content = (Path(source_dir) / posixpath.basename(logical)).read_bytes()
+        else:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                content = response.read()
+        if _integrity(content) != integrity:
+            raise ValueError(f"Empreinte inattendue pour {logical} : {_integrity(content)} (attendue : {integrity})")
+        target = static / logical
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        written.append(logical)
+    return written
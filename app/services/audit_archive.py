@@ -0,0 +1,339 @@
+import gzip
+import heapq
+import json
+import os
+from collections import deque, namedtuple
+from datetime import datetime, timedelta
+from pathlib import Path
+from flask import current_app
+from sqlalchemy import delete, func, select
+from app import db
+from app.models.audit_log import AuditLog
+from app.services.audit_search import SEARCH_COLUMNS
+from app.services.exports import iter_keyset
+
+# Champs conservés dans les segments (une ligne JSON par entrée)
+ARCHIVE_FIELDS = ('id', 'timestamp', 'user_id', 'username', 'action', 'resource',
+                  'resource_id', 'ip_address', 'user_agent', 'details')
+MANIFEST_NAME = 'manifest.json'
+
+
+def archive_dir():
+    """Dossier des segments : AUDIT_ARCHIVE_DIR, sinon instance/audit_archive."""
+    return Path(current_app.config.get('AUDIT_ARCHIVE_DIR')
+                or os.path.join(current_app.instance_path, 'audit_archive'))
+
+
+def _segment_name(month_key):
+    return f'audit_log-{month_key}.ndjson.gz'
+
+
+def load_manifest(directory=None):
+    """
+    Manifeste des archives : 'archived_until' (toutes les entrées plus
+    anciennes sont dans les segments) et 'segments', par mois AAAA-MM :
+    fichier, intervalle de temps, nombre de lignes, plus petit et plus grand id.
+    """
+    path = Path(directory or archive_dir()) / MANIFEST_NAME
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return {'archived_until': None, 'segments': {}}
+
+
+def archive_boundary(directory=None):
+    """Limite de rétention déjà archivée (datetime), ou None s'il n'y a pas d'archive."""
+    until = load_manifest(directory)['archived_until']
+    return datetime.fromisoformat(until) if until else None
+
+
+def _write_atomic(path, write):
+    # Fichier temporaire puis renommage : un lecteur ne voit jamais de fichier partiel
+    tmp = path.with_name(path.name + '.tmp')
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _read_segment(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as segment:
+        for line in segment:
+            record = json.loads(line)
+            record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+            yield record
+
+
+def _write_segment(path, records):
+    """Écrit un segment trié ; les doublons (même id) ne sont écrits qu'une fois."""
+    stats = {'file': path.name, 'start': None, 'end': None, 'row_count': 0, 'min_id': None, 'max_id': None}
+
+    def write(tmp):
+        last_id = None
+        with gzip.open(tmp, 'wt', encoding='utf-8') as segment:
+            for record in records:
+                if record['id'] == last_id:
+                    continue
+                last_id = record['id']
+                line = dict(record, timestamp=record['timestamp'].isoformat())
+                segment.write(json.dumps(line, ensure_ascii=False, separators=(',', ':')) + '\n')
+                stats['start'] = stats['start'] or line['timestamp']
+                stats['end'] = line['timestamp']
+                stats['row_count'] += 1
+                stats['min_id'] = min(stats['min_id'] or record['id'], record['id'])
+                stats['max_id'] = max(stats['max_id'] or record['id'], record['id'])
+
+    _write_atomic(path, write)
+    return stats
+
+
+def archive_audit_logs(before, directory=None, batch_size=5000):
+    """
+    Déplace les entrées antérieures à `before` dans des segments mensuels.
+
+    Chaque mois est un fichier NDJSON compressé (gzip) trié par (timestamp,
+    id) ; un segment existant est relu et fusionné, ce qui permet de
+    relancer la tâche sans doublon après une interruption. Les segments
+    puis le manifeste sont écrits avant toute suppression ; les entrées
+    archivées sont ensuite supprimées de la table par lots (un commit par lot).
+
+    Les compteurs de facettes ne sont pas modifiés : les listes de filtres
+    continuent de proposer les valeurs présentes dans les archives.
+
+    Args:
+        before (datetime): Limite de rétention (UTC, exclue)
+        directory (str | Path, optional): Dossier des segments (voir archive_dir)
+        batch_size (int): Lignes lues et supprimées par requête
+
+    Returns:
+        dict: 'archived' (lignes écrites dans les segments, anciennes comprises),
+            'deleted' (lignes supprimées de la table) et 'segments' (mois écrits)
+    """
+    directory = Path(directory or archive_dir())
+    manifest = load_manifest(directory)
+    first = db.session.query(func.min(AuditLog.timestamp)).filter(AuditLog.timestamp < before).scalar()
+    if first is None:
+        return {'archived': 0, 'deleted': 0, 'segments': []}
+    directory.mkdir(parents=True, exist_ok=True)
+
+    columns = [getattr(AuditLog, field) for field in ARCHIVE_FIELDS]
+    month = first.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    written = []
+    while month < before:
+        next_month = (month + timedelta(days=32)).replace(day=1)
+        stmt = select(*columns).where(AuditLog.timestamp >= month,
+                                      AuditLog.timestamp < min(next_month, before))
+        rows = (dict(row._mapping) for row in iter_keyset(stmt, [AuditLog.timestamp, AuditLog.id], batch_size))
+        month_key = month.strftime('%Y-%m')
+        path = directory / _segment_name(month_key)
+        previous = _read_segment(path) if path.exists() else ()
+        stats = _write_segment(path, heapq.merge(previous, rows, key=lambda r: (r['timestamp'], r['id'])))
+        if stats['row_count']:
+            manifest['segments'][month_key] = stats
+            written.append(month_key)
+        else:
+            path.unlink()
+        month = next_month
+
+    if manifest['archived_until'] is None or before > datetime.fromisoformat(manifest['archived_until']):
+        manifest['archived_until'] = before.isoformat()
+    manifest['segments'] = dict(sorted(manifest['segments'].items()))
+    _write_atomic(directory / MANIFEST_NAME,
+                  lambda tmp: tmp.write_text(json.dumps(manifest, indent=2), encoding='utf-8'))
+
+    # Les entrées sont datées à l'écriture : aucune nouvelle ligne ne peut
+    # apparaître sous la limite entre la copie et la suppression
+    deleted = 0
+    while True:
+        ids = db.session.execute(
+            select(AuditLog.id).where(AuditLog.timestamp < before)
+            .order_by(AuditLog.timestamp, AuditLog.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        db.session.execute(delete(AuditLog).where(AuditLog.id.in_(ids)))
+        db.session.commit()
+        deleted += len(ids)
+
+    return {
+        'archived': sum(manifest['segments'][key]['row_count'] for key in written),
+        'deleted': deleted,
+        'segments': written
+    }
+
+
+# Entrée archivée : mêmes attributs que les lignes de la table pour les
+# gabarits et l'export, sans le coût d'un objet ORM par ligne
+ArchivedLog = namedtuple('ArchivedLog', ARCHIVE_FIELDS)
+
+_TIMESTAMP_KEY = '"timestamp":"'
+
+
+def _line_timestamp(line):
+    # Lu sans décoder la ligne : des horodatages ISO se comparent comme des chaînes
+    at = line.index(_TIMESTAMP_KEY) + len(_TIMESTAMP_KEY)
+    return line[at:line.index('"', at)]
+
+
+def _decode(line):
+    record = json.loads(line)
+    record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+    return ArchivedLog(**record)
+
+
+def _json_text(value):
+    # Valeur telle qu'écrite dans une ligne (mêmes échappements)
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _terms(username, search):
+    """Sous-chaînes recherchées : (champs, terme en minuscules), comme la recherche SQL."""
+    terms = []
+    if username:
+        terms.append((('username',), username.lower()))
+    if search:
+        terms.append((SEARCH_COLUMNS, search.lower()))
+    return terms
+
+
+def _candidate_lines(path, start, end, until, action, terms):
+    """
+    Lignes d'un segment dans [start, end] (et avant `until`), présélectionnées
+    sur le texte brut : seules les lignes retenues sont décodées.
+    """
+    action_text = '"action":' + _json_text(action) if action else None
+    term_texts = [_json_text(term)[1:-1] for _, term in terms]
+    with gzip.open(path, 'rt', encoding='utf-8') as segment:
+        for line in segment:
+            timestamp = _line_timestamp(line)
+            if timestamp >= until or (end is not None and timestamp > end):
+                break  # Segment trié par (timestamp, id)
+            if start is not None and timestamp < start:
+                continue
+            if action_text and action_text not in line:
+                continue
+            if term_texts:
+                lowered = line.lower()
+                if any(text not in lowered for text in term_texts):
+                    continue
+            yield line
+
+
+def _logs(lines, terms):
+    # Les termes, présélectionnés sur toute la ligne, sont vérifiés sur leurs champs
+    for line in lines:
+        log = _decode(line)
+        if all(any(term in (getattr(log, field) or '').lower() for field in fields) for fields, term in terms):
+            yield log
+
+
+def _segments(manifest, start, end, descending=False):
+    """Segments dont l'intervalle de temps recoupe [start, end]."""
+    for key in sorted(manifest['segments'], reverse=descending):
+        segment = manifest['segments'][key]
+        if start is not None and datetime.fromisoformat(segment['end']) < start:
+            continue
+        if end is not None and datetime.fromisoformat(segment['start']) > end:
+            continue
+        yield segment
+
+
+def _scan(directory, manifest, start, end, action, terms, descending=False):
+    """(segment, lignes candidates) pour chaque segment concerné, dans l'ordre demandé."""
+    # Un segment peut contenir des lignes au-delà d'archived_until si la tâche
+    # a été interrompue avant le manifeste : elles sont encore lues dans la table
+    until = manifest['archived_until']
+    start_text = start.isoformat() if start is not None else None
+    end_text = end.isoformat() if end is not None else None
+    for segment in _segments(manifest, start, end, descending):
+        yield segment, _candidate_lines(directory / segment['file'], start_text, end_text, until, action, terms)
+
+
+def _beyond(lines, after, ascending):
+    """Exclut les lignes de même horodatage que la clé `after` qui ne la suivent pas."""
+    after_text = after[0].isoformat()
+    for line in lines:
+        if _line_timestamp(line) == after_text:
+            row_id = _decode(line).id
+            if not (row_id > after[1] if ascending else row_id < after[1]):
+                continue
+        yield line
+
+
+def iter_archived(action=None, username=None, search=None, start=None, end=None, directory=None):
+    """Entrées archivées filtrées, de la plus ancienne à la plus récente, segment par segment."""
+    directory = Path(directory or archive_dir())
+    manifest = load_manifest(directory)
+    if not manifest['archived_until']:
+        return
+    terms = _terms(username, search)
+    for _, lines in _scan(directory, manifest, start, end, action, terms):
+        yield from _logs(lines, terms)
+
+
+def archived_page(after, ascending, limit, until=None, action=None, username=None, search=None,
+                  start=None, end=None, directory=None):
+    """
+    Jusqu'à `limit` entrées archivées après la clé (timestamp, id) `after`,
+    et avant la clé `until` si elle est donnée, dans l'ordre demandé :
+    source complémentaire de keyset_paginate.
+
+    Seuls les segments nécessaires sont décompressés, du plus proche de la
+    clé au plus éloigné ; la lecture s'arrête à la clé.
+    """
+    directory = Path(directory or archive_dir())
+    manifest = load_manifest(directory)
+    if not manifest['archived_until']:
+        return []
+    if after is not None:
+        # La clé borne aussi l'intervalle de temps, donc les segments à lire
+        if ascending:
+            start = max(start, after[0]) if start else after[0]
+        else:
+            end = min(end, after[0]) if end else after[0]
+    if until is not None:
+        if ascending:
+            end = min(end, until[0]) if end else until[0]
+        else:
+            start = max(start, until[0]) if start else until[0]
+
+    terms = _terms(username, search)
+    items = []
+    for _, lines in _scan(directory, manifest, start, end, action, terms, descending=not ascending):
+        if after is not None:
+            lines = _beyond(lines, after, ascending)
+        if ascending:
+            for log in _logs(lines, terms):
+                items.append(log)
+                if len(items) == limit:
+                    return items
+        else:
+            # Segment lu dans l'ordre croissant : seules les dernières lignes
+            # sont gardées (et décodées, sans recherche de sous-chaîne)
+            remaining = limit - len(items)
+            if terms:
+                tail = deque(_logs(lines, terms), maxlen=remaining)
+            else:
+                tail = [_decode(line) for line in deque(lines, maxlen=remaining)]
+            items.extend(reversed(tail))
+            if len(items) == limit:
+                break
+    return items
+
+
+def count_archived(action=None, username=None, search=None, start=None, end=None, directory=None):
+    """Nombre d'entrées archivées pour ces filtres (manifeste seul quand un segment est entièrement couvert)."""
+    directory = Path(directory or archive_dir())
+    manifest = load_manifest(directory)
+    if not manifest['archived_until']:
+        return 0
+    terms = _terms(username, search)
+    total = 0
+    for segment, lines in _scan(directory, manifest, start, end, action, terms):
+        covered = (not action and not terms
+                   and (start is None or datetime.fromisoformat(segment['start']) >= start)
+                   and (end is None or datetime.fromisoformat(segment['end']) <= end)
+                   and segment['end'] < manifest['archived_until'])
+        if covered:
+            total += segment['row_count']
+        else:
+            total += sum(1 for _ in (_logs(lines, terms) if terms else lines))
+    return total
@@ -0,0 +1,118 @@
+from collections import Counter
+from sqlalchemy import func, select
+from app import db
+from app.models.audit_log import AuditLog, AuditLogFacet
+from app.utils.cache import TTLCache
+from app.utils.sql import upsert
+
+# Nombre de noms d'utilisateur proposés dans le filtre (les plus actifs)
+TOP_USERNAMES = 100
+
+_facets_cache = TTLCache(ttl=30, maxsize=1)
+
+
+def increment_facets(connection, entries):
+    """
+    Met à jour les compteurs de facettes pour des entrées d'audit.
+
+    Appelée par le writer d'audit dans la même transaction que l'insertion.
+    Seuls les noms des comptes identifiés (user_id renseigné) sont comptés :
+    un login_failed porte un nom saisi librement, qui ne doit pas remplir
+    la table ni la liste de filtres.
+    """
+    counts = Counter()
+    for entry in entries:
+        if entry.get('action'):
+            counts[('action', entry['action'])] += 1
+        if entry.get('username') and entry.get('user_id') is not None:
+            counts[('username', entry['username'])] += 1
+    if not counts:
+        return
+
+    table = AuditLogFacet.__table__
+    upsert(
+        connection,
+        table,
+        [{'facet': facet, 'value': value, 'entry_count': count}
+         for (facet, value), count in counts.items()],
+        ['facet', 'value'],
+        lambda proposed: {'entry_count': table.c.entry_count + proposed.entry_count}
+    )
+
+    if _changes_cached_facets(connection, counts):
+        _facets_cache.invalidate()
+
+
+def _changes_cached_facets(connection, counts):
+    """
+    Vrai si les listes en cache ne sont plus les bonnes : nouvelle action, ou
+    utilisateur qui entre dans les TOP_USERNAMES. L'ordre des utilisateurs
+    déjà listés peut rester périmé jusqu'à l'expiration du cache.
+    """
+    cached = _facets_cache.get('facets')
+    if cached is None:
+        return False
+    actions, usernames, lowest_count = cached
+
+    if any(facet == 'action' and value not in actions for facet, value in counts):
+        return True
+
+    listed = set(usernames)
+    newcomers = [value for facet, value in counts if facet == 'username' and value not in listed]
+    if not newcomers:
+        return False
+    if len(usernames) < TOP_USERNAMES:
+        return True
+    # Un seul SELECT sur la clé primaire, seulement pour les noms hors de la liste
+    table = AuditLogFacet.__table__
+    return connection.execute(
+        select(func.max(table.c.entry_count))
+        .where(table.c.facet == 'username', table.c.value.in_(newcomers))
+    ).scalar() > lowest_count
+
+
+def audit_facets():
+    """
+    Retourne (actions, usernames) pour les listes de filtres du journal d'audit.
+
+    Les actions sont triées alphabétiquement ; les utilisateurs sont les
+    TOP_USERNAMES plus actifs. Résultat mis en cache quelques secondes.
+    """
+    def load():
+        actions = [value for value, in db.session.execute(
+            select(AuditLogFacet.value)
+            .where(AuditLogFacet.facet == 'action')
+            .order_by(AuditLogFacet.value)
+        )]
+        top = db.session.execute(
+            select(AuditLogFacet.value, AuditLogFacet.entry_count)
+            .where(AuditLogFacet.facet == 'username')
+            .order_by(AuditLogFacet.entry_count.desc(), AuditLogFacet.value)
+            .limit(TOP_USERNAMES)
+        ).all()
+        # Plus petit compteur de la liste : seuil d'entrée d'un nouvel utilisateur
+        return actions, [value for value, _ in top], (top[-1][1] if top else 0)
+
+    actions, usernames, _ = _facets_cache.get_or_set('facets', load)
+    return actions, usernames
+
+
+def rebuild_audit_facets():
+    """Recalcule entièrement les compteurs à partir de AuditLog."""
+    AuditLogFacet.query.delete(synchronize_session=False)
+    # Mêmes règles que increment_facets : noms des comptes identifiés seulement
+    for facet, column, criteria in (
+        ('action', AuditLog.action, ()),
+        ('username', AuditLog.username, (AuditLog.user_id.isnot(None),)),
+    ):
+        rows = db.session.execute(
+            select(column, func.count(AuditLog.id))
+            .where(column.isnot(None), column != '', *criteria)
+            .group_by(column)
+        ).all()
+        if rows:
+            db.session.execute(AuditLogFacet.__table__.insert(), [
+                {'facet': facet, 'value': value, 'entry_count': count} for value, count in rows
+            ])
+    db.session.commit()
+    _facets_cache.invalidate()
@@ -0,0 +1,143 @@
+from sqlalchemy import literal_column, or_, select, table, column
+from app import db
+from app.models.audit_log import AuditLog
+
+# Colonnes couvertes par la recherche plein texte du journal d'audit
+SEARCH_COLUMNS = ('username', 'action', 'user_agent', 'details')
+# Les index trigrammes ne servent qu'à partir de trois caractères
+MIN_INDEXED_LENGTH = 3
+
+
+class AuditSearch:
+    """
+    Recherche de sous-chaîne dans le journal d'audit, sans index (LIKE).
+
+    Utilisée pour les moteurs sans index adapté (MySQL/MariaDB) et, sur
+    tous les moteurs, pour les termes trop courts pour un index trigramme.
+    Les sous-classes ajoutent l'index propre à leur moteur.
+    """
+
+    def install(self, connection):
+        """Crée l'index et ce qui le tient à jour (sans effet s'il existe déjà)."""
+
+    def uninstall(self, connection):
+        """Supprime l'index de recherche."""
+
+    def rebuild(self, connection):
+        """Reconstruit l'index à partir de la table audit_log."""
+
+    def criterion(self, term, column_name=None):
+        """
+        Condition SQL « `term` apparaît dans une des colonnes », sans tenir
+        compte de la casse ; limitée à `column_name` s'il est donné.
+        """
+        names = (column_name,) if column_name else SEARCH_COLUMNS
+        return or_(*(getattr(AuditLog, name).icontains(term, autoescape=True) for name in names))
+
+
+class SqliteAuditSearch(AuditSearch):
+    """
+    Table FTS5 à jetons trigrammes (SQLite 3.34+), à contenu externe :
+    elle n'indexe que les colonnes de audit_log sans les dupliquer. Des
+    déclencheurs la tiennent à jour à chaque insertion, modification ou
+    suppression, quel que soit le chemin d'écriture (writer d'audit,
+    données synthétiques, archivage).
+    """
+
+    TABLE = 'audit_log_fts'
+
+    def install(self, connection):
+        columns = ', '.join(SEARCH_COLUMNS)
+        new_values = ', '.join(f'new.{name}' for name in SEARCH_COLUMNS)
+        old_values = ', '.join(f'old.{name}' for name in SEARCH_COLUMNS)
+        insert_new = f"INSERT INTO {self.TABLE}(rowid, {columns}) VALUES (new.id, {new_values});"
+        delete_old = f"INSERT INTO {self.TABLE}({self.TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+        for statement in (
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.TABLE} USING fts5("
+            f"{columns}, content='audit_log', content_rowid='id', tokenize='trigram')",
+            f"CREATE TRIGGER IF NOT EXISTS {self.TABLE}_insert AFTER INSERT ON audit_log BEGIN {insert_new} END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.TABLE}_delete AFTER DELETE ON audit_log BEGIN {delete_old} END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.TABLE}_update AFTER UPDATE ON audit_log BEGIN {delete_old} {insert_new} END",
+        ):
+            connection.exec_driver_sql(statement)
+
+    def uninstall(self, connection):
+        for trigger in ('insert', 'delete', 'update'):
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {self.TABLE}_{trigger}")
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {self.TABLE}")
+
+    def rebuild(self, connection):
+        connection.exec_driver_sql(f"INSERT INTO {self.TABLE}({self.TABLE}) VALUES ('rebuild')")
+
+    def criterion(self, term, column_name=None):
+        if len(term) < MIN_INDEXED_LENGTH:
+            return super().criterion(term, column_name)
+        # Terme entre guillemets : une seule « phrase », recherchée comme sous-chaîne
+        query = '"%s"' % term.replace('"', '""')
+        if column_name:
+            query = f'{column_name} : {query}'
+        fts = table(self.TABLE, column('rowid'))
+        return AuditLog.id.in_(select(fts.c.rowid).where(literal_column(self.TABLE).op('MATCH')(query)))
+
+
+class PostgresqlAuditSearch(AuditSearch):
+    """
+    Index GIN trigrammes (extension pg_trgm) : un sur le nom d'utilisateur,
+    un sur le texte des quatre colonnes. PostgreSQL les tient à jour lui-même
+    et s'en sert pour ILIKE '%terme%'.
+    """
+
+    # Expression indexée ; la requête doit utiliser exactement la même
+    DOCUMENT = " || ' ' || ".join(f"coalesce({name}, '')" for name in SEARCH_COLUMNS)
+    INDEXES = {
+        'ix_audit_log_search_trgm': DOCUMENT,
+        'ix_audit_log_username_trgm': 'username',
+    }
+
+    def install(self, connection):
+        connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, expression in self.INDEXES.items():
+            connection.exec_driver_sql(
+                f"CREATE INDEX IF NOT EXISTS {name} ON audit_log USING gin (({expression}) gin_trgm_ops)"
+            )
+
+    def uninstall(self, connection):
+        for name in self.INDEXES:
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+    def rebuild(self, connection):
+        for name in self.INDEXES:
+            connection.exec_driver_sql(f"REINDEX INDEX {name}")
+
+    def criterion(self, term, column_name=None):
+        if len(term) < MIN_INDEXED_LENGTH:
+            return super().criterion(term, column_name)
+        if column_name:
+            return getattr(AuditLog, column_name).icontains(term, autoescape=True)
+        return literal_column(self.DOCUMENT).icontains(term, autoescape=True)
+
+
+_BACKENDS = {
+    'sqlite': SqliteAuditSearch,
+    'postgresql': PostgresqlAuditSearch,
+}
+
+
+def audit_search(dialect_name=None):
+    """Recherche adaptée au moteur (par défaut celui de la session courante)."""
+    if dialect_name is None:
+        dialect_name = db.session.get_bind().dialect.name
+    return _BACKENDS.get(dialect_name, AuditSearch)()
+
+
+def search_criterion(term, column_name=None):
+    """Condition de recherche de `term` pour le moteur courant (voir AuditSearch.criterion)."""
+    return audit_search().criterion(term, column_name)
+
+
+def rebuild_search_index():
+    """Crée l'index de recherche s'il manque (base antérieure) et le reconstruit."""
+    backend = audit_search()
+    with db.engine.begin() as connection:
+        backend.install(connection)
+        backend.rebuild(connection)
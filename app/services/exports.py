@@ -0,0 +1,145 @@
+import csv
+import io
+import json
+from sqlalchemy import select
+from app import db
+from app.models.user import User
+from app.models.timesheet import Timesheet
+from app.models.audit_log import AuditLog
+from app.utils.sql import keyset_after
+
+# Nombre de lignes lues par requête pendant un export
+EXPORT_BATCH_SIZE = 1000
+
+
+def iter_keyset(stmt, key_columns, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Parcourt le résultat d'une requête par lots de taille fixe.
+
+    Chaque lot est une nouvelle requête « après la dernière clé lue »
+    (pagination par clé, sans OFFSET), donc la mémoire reste constante
+    quelle que soit la taille de la table. Les colonnes de key_columns
+    doivent figurer, sous le même nom, dans les colonnes sélectionnées.
+    """
+    last_key = None
+    while True:
+        batch_stmt = stmt.order_by(*key_columns).limit(batch_size)
+        if last_key is not None:
+            batch_stmt = batch_stmt.where(keyset_after(key_columns, last_key))
+        rows = db.session.execute(batch_stmt).all()
+        if not rows:
+            return
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last = rows[-1]._mapping
+        last_key = [last[column.key] for column in key_columns]
+
+
+def stream_csv(header, records):
+    """Génère un CSV morceau par morceau à partir de listes de valeurs."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(header)
+    count = 0
+    for record in records:
+        writer.writerow(record)
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def stream_ndjson(records):
+    """Génère un document NDJSON (un objet JSON par ligne)."""
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def stream_json_array(records):
+    """Génère un tableau JSON valide, élément par élément."""
+    yield '['
+    separator = '\n'
+    for record in records:
+        yield separator + json.dumps(record, ensure_ascii=False)
+        separator = ',\n'
+    yield '\n]'
+
+
+def _format_time(value):
+    return value.strftime('%H:%M') if value else ''
+
+
+def _full_name(row):
+    if row.first_name is None and row.last_name is None:
+        return ''
+    return f"{row.first_name} {row.last_name}"
+
+
+def user_rows():
+    """Utilisateurs, par lots, triés par id."""
+    stmt = select(User.id, User.username, User.email, User.first_name, User.last_name, User.role)
+    return iter_keyset(stmt, [User.id])
+
+
+def user_record(row):
+    return {
+        'id': row.id,
+        'username': row.username,
+        'email': row.email,
+        'first_name': row.first_name,
+        'last_name': row.last_name,
+        'role': row.role
+    }
+
+
+def timesheet_rows():
+    """Feuilles de temps avec le nom de l'employé et les heures calculées en SQL."""
+    stmt = select(
+        Timesheet.id,
+        Timesheet.user_id,
+        User.first_name,
+        User.last_name,
+        Timesheet.date,
+        Timesheet.start_time,
+        Timesheet.end_time,
+        Timesheet.break_duration,
+        Timesheet.hours.label('hours'),
+        Timesheet.status,
+        Timesheet.validator_id
+    ).outerjoin(User, User.id == Timesheet.user_id)
+    return iter_keyset(stmt, [Timesheet.id])
+
+
+def timesheet_record(row):
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'user_name': _full_name(row),
+        'date': row.date.strftime('%Y-%m-%d') if row.date else '',
+        'start_time': _format_time(row.start_time),
+        'end_time': _format_time(row.end_time),
+        'break_duration': row.break_duration,
+        'total_hours': f"{float(row.hours or 0):.2f}",
+        'status': row.status,
+        'validator_id': row.validator_id
+    }
+
+
+def audit_log_rows(*criteria):
+    """Entrées du journal d'audit filtrées, de la plus ancienne à la plus récente."""
+    stmt = select(
+        AuditLog.id,
+        AuditLog.timestamp,
+        AuditLog.username,
+        AuditLog.action,
+        AuditLog.resource,
+        AuditLog.resource_id,
+        AuditLog.ip_address,
+        AuditLog.user_agent,
+        AuditLog.details
+    ).where(*criteria)
+    return iter_keyset(stmt, [AuditLog.timestamp, AuditLog.id])
@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+# Périodes de paie de deux semaines, numérotées de 1 à 26 dans l'année
+PERIOD_DAYS = 14
+PERIODS_PER_YEAR = 26
+
+
+def first_monday(year):
+    """Premier lundi de l'année : début de la période 1."""
+    start = date(year, 1, 1)
+    return start + timedelta(days=(7 - start.weekday()) % 7)
+
+
+def get_period_dates(period_num, year):
+    """
+    Les 14 jours d'une période de paie.
+
+    Tu dois adapter le calcul du début de la première période selon ton année
+    fiscale ! Ici, la première période commence le lundi de la 1re semaine de
+    l'année.
+    """
+    start = first_monday(year) + timedelta(weeks=(period_num - 1) * 2)
+    return [start + timedelta(days=i) for i in range(PERIOD_DAYS)]
+
+
+def current_period(today=None):
+    """Numéro de la période contenant `today` (borné à 1..26), pour l'année de `today`."""
+    today = today or date.today()
+    weeks_since = (today - first_monday(today.year)).days // 7
+    return min(max(1, weeks_since // 2 + 1), PERIODS_PER_YEAR)
+
+
+def period_bounds(period_num, year):
+    """(premier jour, dernier jour) d'une période de paie."""
+    days = get_period_dates(period_num, year)
+    return days[0], days[-1]
+
+
+def period_range(day):
+    """
+    (premier jour, dernier jour) de la période qui contient `day`.
+
+    Les jours hors des 26 périodes de l'année (avant le premier lundi, après
+    la 26e période) forment un intervalle à part : les intervalles retournés
+    se suivent sans trou ni chevauchement.
+    """
+    start, end = period_bounds(current_period(day), day.year)
+    if day < start:
+        # Début janvier : 26e période de l'année précédente, ou l'intervalle qui la suit
+        last_start, last_end = period_bounds(PERIODS_PER_YEAR, day.year - 1)
+        if day <= last_end:
+            return last_start, last_end
+        return last_end + timedelta(days=1), start - timedelta(days=1)
+    if day > end:
+        return end + timedelta(days=1), first_monday(day.year + 1) - timedelta(days=1)
+    return start, end
@@ -0,0 +1,112 @@
+import itertools
+from datetime import date
+from sqlalchemy import case, func
+from app import db
+from app.models.user import User
+from app.models.timesheet import Timesheet
+from app.models.rollup import HoursMonthlyRollup
+from app.utils.cache import TTLCache
+
+# Statistiques globales des tableaux de bord : recalculées au plus toutes les
+# 30 secondes, ou dès qu'une écriture appelle invalidate_global_stats().
+# Le cache est propre à chaque processus.
+_global_stats_cache = TTLCache(ttl=30, maxsize=1)
+
+# Version des données de rapport, incrémentée par invalidate_global_stats() :
+# les fragments de rapport mis en cache (voir app/utils/fragment_cache.py)
+# l'incluent dans leur clé et sont donc remplacés après chaque écriture
+_data_version = itertools.count(1)
+_current_version = next(_data_version)
+
+
+def user_period_stats(start_date, end_date=None, role=None):
+    """
+    Statistiques par utilisateur sur une période, en une seule requête groupée.
+
+    Args:
+        start_date (date): Début de la période (inclus)
+        end_date (date, optional): Fin de la période (incluse)
+        role (str, optional): Limite aux utilisateurs de ce rôle
+
+    Returns:
+        list[dict]: Une entrée par utilisateur (y compris ceux sans feuille) :
+            'user', 'timesheet_count' (toutes les feuilles de la période) et
+            'total_hours' (heures des feuilles approuvées).
+    """
+    # Les conditions de période vont dans la jointure pour conserver les
+    # utilisateurs qui n'ont aucune feuille de temps.
+    join_on = [Timesheet.user_id == User.id, Timesheet.date >= start_date]
+    if end_date is not None:
+        join_on.append(Timesheet.date <= end_date)
+
+    approved_hours = case((Timesheet.status == 'approved', Timesheet.hours), else_=0)
+
+    query = db.session.query(
+        User,
+        func.count(Timesheet.id),
+        func.coalesce(func.sum(approved_hours), 0)
+    ).outerjoin(Timesheet, db.and_(*join_on))
+
+    if role is not None:
+        query = query.filter(User.role == role)
+
+    rows = query.group_by(User.id).order_by(User.id).all()
+
+    return [{
+        'user': user,
+        'timesheet_count': timesheet_count,
+        'total_hours': float(total_hours)
+    } for user, timesheet_count, total_hours in rows]
+
+
+def _count_where(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def global_stats():
+    """
+    Compteurs globaux (utilisateurs par rôle, feuilles par statut, heures du mois).
+
+    Trois requêtes à agrégation conditionnelle au lieu d'un COUNT par valeur,
+    derrière un cache de courte durée.
+
+    Returns:
+        dict: 'users' (total, admin, manager, employee), 'timesheets' (total,
+            submitted, approved, rejected) et 'month_hours'
+    """
+    def compute():
+        users = db.session.query(
+            func.count(User.id),
+            _count_where(User.role == 'admin'),
+            _count_where(User.role == 'manager'),
+            _count_where(User.role == 'employee')
+        ).one()
+        timesheets = db.session.query(
+            func.count(Timesheet.id),
+            _count_where(Timesheet.status == 'submitted'),
+            _count_where(Timesheet.status == 'approved'),
+            _count_where(Timesheet.status == 'rejected')
+        ).one()
+        month_minutes = db.session.query(func.sum(HoursMonthlyRollup.net_minutes)).filter(
+            HoursMonthlyRollup.month >= date.today().replace(day=1)
+        ).scalar() or 0
+
+        return {
+            'users': dict(zip(('total', 'admin', 'manager', 'employee'), map(int, users))),
+            'timesheets': dict(zip(('total', 'submitted', 'approved', 'rejected'), map(int, timesheets))),
+            'month_hours': month_minutes / 60
+        }
+
+    return _global_stats_cache.get_or_set('global', compute)
+
+
+def data_version():
+    """Version courante des données de rapport (propre au processus)."""
+    return _current_version
+
+
+def invalidate_global_stats():
+    """À appeler après le commit d'une écriture qui change les compteurs globaux."""
+    global _current_version
+    _global_stats_cache.invalidate()
+    _current_version = next(_data_version)
@@ -0,0 +1,222 @@
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import func
+from app import db
+from app.models.timesheet import Timesheet
+from app.models.rollup import HoursDailyRollup, HoursMonthlyRollup
+from app.utils.sql import upsert
+
+# Nombre de lignes insérées par lot lors d'une reconstruction complète
+REBUILD_CHUNK_SIZE = 5000
+
+
+def _month_of(day):
+    return day.replace(day=1)
+
+
+def _next_month(month):
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _daily_totals(*criteria):
+    """
+    Agrège les feuilles de temps par (utilisateur, jour, statut).
+
+    Retourne un itérable de tuples (user_id, day, status, net_minutes, sheet_count).
+    """
+    status = func.coalesce(Timesheet.status, 'submitted')
+    query = db.session.query(
+        Timesheet.user_id,
+        Timesheet.date,
+        status,
+        func.sum(Timesheet.hours),
+        func.count(Timesheet.id)
+    ).filter(Timesheet.user_id.isnot(None), Timesheet.date.isnot(None), *criteria) \
+     .group_by(Timesheet.user_id, Timesheet.date, status)
+
+    for user_id, day, status_value, hours, count in query.yield_per(REBUILD_CHUNK_SIZE):
+        yield user_id, day, status_value, int(round(float(hours or 0) * 60)), count
+
+
+def _monthly_totals(daily_rows):
+    """Regroupe des lignes journalières par (utilisateur, mois, statut)."""
+    months = defaultdict(lambda: [0, 0])
+    for user_id, day, status, net_minutes, sheet_count in daily_rows:
+        totals = months[(user_id, _month_of(day), status)]
+        totals[0] += net_minutes
+        totals[1] += sheet_count
+    return [(user_id, month, status, minutes, count)
+            for (user_id, month, status), (minutes, count) in months.items()]
+
+
+def _insert(model, key_name, rows):
+    """Insère des tuples (user_id, clé, statut, minutes, nombre) par lots."""
+    chunk = []
+    for user_id, key, status, net_minutes, sheet_count in rows:
+        chunk.append({
+            'user_id': user_id,
+            key_name: key,
+            'status': status,
+            'net_minutes': net_minutes,
+            'sheet_count': sheet_count
+        })
+        if len(chunk) >= REBUILD_CHUNK_SIZE:
+            db.session.execute(model.__table__.insert(), chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(model.__table__.insert(), chunk)
+
+
+def _lock_users(user_ids):
+    """
+    Verrouille les lignes User (SELECT ... FOR UPDATE, par id croissant) pour
+    sérialiser les recalculs de cumuls d'un même utilisateur : une écriture
+    concurrente (grille de l'employé, décision d'un manager) attend le commit
+    de la première puis relit des cumuls à jour. Sans effet sous SQLite,
+    dont les écritures sont déjà sérialisées.
+    """
+    from app.models.user import User
+
+    db.session.execute(
+        db.select(User.id).where(User.id.in_(sorted(user_ids))).order_by(User.id).with_for_update()
+    ).all()
+
+
+def _replace(model, key_name, user_id, keys, rows):
+    """
+    Remplace les cumuls de `user_id` pour les clés données (jours ou mois).
+
+    Les lignes existantes sont remises à zéro, les nouvelles écrites par upsert,
+    puis celles restées à zéro (statut disparu) supprimées : aucune insertion
+    ne peut entrer en conflit avec une ligne qu'une autre transaction a créée.
+    """
+    table = model.__table__
+    key_column = table.c[key_name]
+    db.session.execute(
+        table.update()
+        .where(table.c.user_id == user_id, key_column.in_(keys))
+        .values(net_minutes=0, sheet_count=0)
+    )
+    upsert(
+        db.session,
+        table,
+        [{'user_id': row_user_id, key_name: key, 'status': status,
+          'net_minutes': net_minutes, 'sheet_count': sheet_count}
+         for row_user_id, key, status, net_minutes, sheet_count in rows],
+        ['user_id', key_name, 'status'],
+        lambda proposed: {'net_minutes': proposed.net_minutes, 'sheet_count': proposed.sheet_count}
+    )
+    db.session.execute(
+        table.delete()
+        .where(table.c.user_id == user_id, key_column.in_(keys), table.c.sheet_count == 0)
+    )
+
+
+def refresh_user_days(user_id, days):
+    """
+    Recalcule les cumuls d'un utilisateur pour les jours donnés et leurs mois.
+
+    À appeler dans la même transaction que l'écriture des feuilles de temps,
+    avant le commit (l'appelant reste responsable du commit).
+    """
+    days = set(days)
+    if not days:
+        return
+    months = {_month_of(day) for day in days}
+
+    # Déclenche l'autoflush des modifications en attente, puis attend les
+    # recalculs concurrents du même utilisateur (voir _lock_users)
+    _lock_users([user_id])
+    _replace(HoursDailyRollup, 'day', user_id, days, list(_daily_totals(
+        Timesheet.user_id == user_id,
+        Timesheet.date.in_(days)
+    )))
+
+    # Les mois sont recalculés à partir des cumuls journaliers (au plus ~93 lignes)
+    daily_rows = []
+    for month in months:
+        daily_rows.extend(db.session.query(
+            HoursDailyRollup.user_id,
+            HoursDailyRollup.day,
+            HoursDailyRollup.status,
+            HoursDailyRollup.net_minutes,
+            HoursDailyRollup.sheet_count
+        ).filter(
+            HoursDailyRollup.user_id == user_id,
+            HoursDailyRollup.day >= month,
+            HoursDailyRollup.day < _next_month(month)
+        ).all())
+    _replace(HoursMonthlyRollup, 'month', user_id, months, _monthly_totals(daily_rows))
+
+
+def refresh_timesheets(timesheets):
+    """Recalcule les cumuls touchés par une liste de feuilles de temps."""
+    days_by_user = defaultdict(set)
+    for ts in timesheets:
+        if ts.user_id is not None and ts.date is not None:
+            days_by_user[ts.user_id].add(ts.date)
+    # Tous les verrous d'abord, dans l'ordre des id : pas d'interblocage
+    # entre deux recalculs qui touchent les mêmes utilisateurs
+    if days_by_user:
+        _lock_users(days_by_user)
+    for user_id, days in days_by_user.items():
+        refresh_user_days(user_id, days)
+
+
+def delete_user_rollups(user_id):
+    """Supprime tous les cumuls d'un utilisateur (sans commit)."""
+    HoursDailyRollup.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    HoursMonthlyRollup.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+
+
+def rebuild_rollups():
+    """
+    Reconstruit entièrement les tables de cumuls à partir de Timesheet.
+
+    Returns:
+        tuple: (nombre de lignes journalières, nombre de lignes mensuelles)
+    """
+    HoursDailyRollup.query.delete(synchronize_session=False)
+    HoursMonthlyRollup.query.delete(synchronize_session=False)
+
+    daily_rows = list(_daily_totals())
+    monthly_rows = _monthly_totals(daily_rows)
+    _insert(HoursDailyRollup, 'day', daily_rows)
+    _insert(HoursMonthlyRollup, 'month', monthly_rows)
+    db.session.commit()
+
+    return len(daily_rows), len(monthly_rows)
+
+
+def verify_rollups():
+    """
+    Compare les cumuls stockés avec un recalcul complet depuis Timesheet.
+
+    Returns:
+        list[dict]: Un écart par clé divergente : 'table', 'key', 'expected'
+            et 'stored' (tuples (minutes, nombre), None si la ligne manque).
+    """
+    expected_daily = {(u, d, s): (m, c) for u, d, s, m, c in _daily_totals()}
+    expected_monthly = {(u, d, s): (m, c) for u, d, s, m, c
+                        in _monthly_totals((*k, *v) for k, v in expected_daily.items())}
+
+    drift = []
+    for table, model, key_column, expected in (
+        ('daily', HoursDailyRollup, HoursDailyRollup.day, expected_daily),
+        ('monthly', HoursMonthlyRollup, HoursMonthlyRollup.month, expected_monthly),
+    ):
+        stored = {
+            (u, d, s): (m, c) for u, d, s, m, c in db.session.query(
+                model.user_id, key_column, model.status, model.net_minutes, model.sheet_count
+            ).yield_per(REBUILD_CHUNK_SIZE)
+        }
+        for key in sorted(expected.keys() | stored.keys(), key=str):
+            if expected.get(key) != stored.get(key):
+                drift.append({
+                    'table': table,
+                    'key': key,
+                    'expected': expected.get(key),
+                    'stored': stored.get(key)
+                })
+    return drift
+
@@ -0,0 +1,221 @@
+import random
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import func, text
+from app import db
+from app.models.user import User
+from app.models.code import Code, Modifier
+from app.models.timesheet import Timesheet, TimesheetModifier
+from app.models.audit_log import AuditLog
+from app.utils.passwords import hash_password
+
+# Nombre de lignes par INSERT groupé
+CHUNK_SIZE = 10000
+
+DEFAULT_CODES = ['Présence', 'Télétravail', 'Vacances', 'Maladie', 'Formation']
+DEFAULT_MODIFIERS = [('Repas', -30), ('Prime de nuit', 0), ('Déplacement', 15)]
+AUDIT_ACTIONS = ['login_success', 'logout', 'login_failed', 'approve', 'reject', 'update']
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/126.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) AppleWebKit/605.1.15 Version/17.5 Safari/605.1.15',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148',
+]
+
+
+def _insert_chunks(table, rows, chunk_size=CHUNK_SIZE):
+    """Insère un itérable de dictionnaires par lots ; retourne le nombre de lignes."""
+    chunk = []
+    count = 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            db.session.execute(table.insert(), chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(table.insert(), chunk)
+        count += len(chunk)
+    return count
+
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def _sync_sequence(model):
+    # Les id sont fournis explicitement : PostgreSQL doit réaligner sa séquence
+    if db.engine.dialect.name == 'postgresql':
+        table = model.__tablename__
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM \"{table}\"), 1))"
+        ))
+
+
+def _role_counts(users):
+    admins = max(1, users // 200)
+    managers = max(1, users // 20)
+    return admins, managers, max(0, users - admins - managers)
+
+
+def generate_dataset(users=100, days=60, audit_per_user=20, seed=42, password='password',
+                     prefix='', end_date=None, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Génère un jeu de données synthétique déterministe par insertions groupées.
+
+    Pour une même graine et les mêmes paramètres, les données produites sont
+    identiques. Les employés ont une feuille par jour ouvrable sur `days`
+    jours ; les journées de plus de 14 jours sont approuvées (ou rejetées),
+    les plus récentes sont soumises.
+
+    Args:
+        users (int): Nombre total d'utilisateurs (≈0,5 % admins, 5 % managers)
+        days (int): Nombre de jours couverts par les feuilles de temps
+        audit_per_user (int): Entrées d'audit par utilisateur
+        seed (int): Graine du générateur pseudo-aléatoire
+        password (str): Mot de passe commun (haché une seule fois)
+        prefix (str): Préfixe des noms d'utilisateur (évite les collisions)
+        end_date (date, optional): Dernier jour couvert (aujourd'hui par défaut)
+        chunk_size (int): Lignes par INSERT groupé
+        progress (callable, optional): Appelée avec un message à chaque étape
+
+    Returns:
+        dict: Nombre de lignes créées par table
+
+    Raises:
+        ValueError: Si un nom d'utilisateur généré existe déjà
+    """
+    rng = random.Random(seed)
+    report = progress or (lambda message: None)
+    end_date = end_date or date.today()
+    start_date = end_date - timedelta(days=days - 1)
+    counts = {}
+
+    # Codes et modificateurs (réutilisés s'ils existent déjà)
+    existing_codes = {c.nom: c.id for c in Code.query.all()}
+    for nom in DEFAULT_CODES:
+        if nom not in existing_codes:
+            code = Code(nom=nom)
+            db.session.add(code)
+            db.session.flush()
+            existing_codes[nom] = code.id
+    existing_modifiers = {m.nom: m.id for m in Modifier.query.all()}
+    for nom, minutes in DEFAULT_MODIFIERS:
+        if nom not in existing_modifiers:
+            modifier = Modifier(nom=nom, valeur_minutes=minutes)
+            db.session.add(modifier)
+            db.session.flush()
+            existing_modifiers[nom] = modifier.id
+    code_ids = [existing_codes[nom] for nom in DEFAULT_CODES]
+    presence_code = code_ids[0]
+    modifier_ids = [existing_modifiers[nom] for nom, _ in DEFAULT_MODIFIERS]
+    modifier_minutes = {m.id: m.valeur_minutes or 0 for m in Modifier.query.filter(Modifier.id.in_(modifier_ids))}
+
+    # Utilisateurs : un seul hachage pour le mot de passe commun. Réservé aux
+    # données synthétiques : les vrais comptes passent par create_accounts()
+    # ou User.set_password(), qui hachent chaque compte avec son propre sel
+    password_hash = hash_password(password)
+    admins, managers, employees = _role_counts(users)
+    first_user_id = _next_id(User)
+    roles = ['admin'] * admins + ['manager'] * managers + ['employee'] * employees
+    user_rows = []
+    for offset, role in enumerate(roles):
+        user_id = first_user_id + offset
+        username = f"{prefix}{role[:3]}{offset:06d}"
+        user_rows.append({
+            'id': user_id,
+            'username': username,
+            'email': f"{username}@example.com",
+            'password_hash': password_hash,
+            'first_name': f"Prénom{offset}",
+            'last_name': f"Nom{offset}",
+            'role': role,
+            'employee_type': 'regulier' if rng.random() < 0.8 else 'hebdomadaire'
+        })
+    usernames = [row['username'] for row in user_rows]
+    for i in range(0, len(usernames), 500):
+        taken = db.session.query(User.username).filter(User.username.in_(usernames[i:i + 500])).first()
+        if taken:
+            raise ValueError(f"L'utilisateur '{taken[0]}' existe déjà : choisissez un autre préfixe")
+    counts['user'] = _insert_chunks(User.__table__, user_rows, chunk_size)
+    _sync_sequence(User)
+    report(f"{counts['user']} utilisateurs")
+
+    manager_ids = [row['id'] for row in user_rows if row['role'] == 'manager']
+    employee_ids = [row['id'] for row in user_rows if row['role'] == 'employee']
+    workdays = [start_date + timedelta(days=i) for i in range(days)
+                if (start_date + timedelta(days=i)).weekday() < 5]
+    approval_limit = end_date - timedelta(days=14)
+
+    # Feuilles de temps (et quelques modificateurs), id explicites pour lier les deux
+    first_timesheet_id = _next_id(Timesheet)
+    timesheet_modifier_rows = []
+
+    def timesheet_rows():
+        timesheet_id = first_timesheet_id
+        for user_id in employee_ids:
+            for day in workdays:
+                start_hour = rng.choice((7, 8, 8, 9))
+                start_time = time(start_hour, rng.choice((0, 15, 30)))
+                end_time = time(start_hour + 8, rng.choice((0, 15, 30, 45)))
+                break_duration = rng.choice((30, 30, 45, 60))
+                if day <= approval_limit:
+                    status = 'approved' if rng.random() < 0.95 else 'rejected'
+                    validator_id = rng.choice(manager_ids)
+                else:
+                    status = 'submitted'
+                    validator_id = None
+                # Même calcul que Timesheet.compute_net_minutes(), sans passer par l'ORM
+                net_minutes = (end_time.hour * 60 + end_time.minute) - (start_time.hour * 60 + start_time.minute) \
+                    - break_duration
+                if rng.random() < 0.1:
+                    modifier_id = rng.choice(modifier_ids)
+                    net_minutes += modifier_minutes[modifier_id]
+                    timesheet_modifier_rows.append({
+                        'timesheet_id': timesheet_id,
+                        'modifier_id': modifier_id
+                    })
+                yield {
+                    'id': timesheet_id,
+                    'user_id': user_id,
+                    'date': day,
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'break_duration': break_duration,
+                    'description': None,
+                    'status': status,
+                    'code_id': presence_code if rng.random() < 0.85 else rng.choice(code_ids),
+                    'validator_id': validator_id,
+                    'net_minutes': max(0, net_minutes)
+                }
+                timesheet_id += 1
+
+    counts['timesheet'] = _insert_chunks(Timesheet.__table__, timesheet_rows(), chunk_size)
+    _sync_sequence(Timesheet)
+    counts['timesheet_modifier'] = _insert_chunks(TimesheetModifier.__table__, timesheet_modifier_rows, chunk_size)
+    report(f"{counts['timesheet']} feuilles de temps, {counts['timesheet_modifier']} modificateurs")
+
+    # Journal d'audit réparti sur la période
+    span_seconds = days * 86400
+    period_start = datetime.combine(start_date, time())
+
+    def audit_rows():
+        for row in user_rows:
+            for _ in range(audit_per_user):
+                action = rng.choice(AUDIT_ACTIONS)
+                yield {
+                    'timestamp': period_start + timedelta(seconds=rng.randrange(span_seconds)),
+                    'user_id': row['id'] if action != 'login_failed' else None,
+                    'username': row['username'],
+                    'action': action,
+                    'resource': 'auth' if action.startswith('log') else 'timesheet',
+                    'resource_id': None,
+                    'ip_address': f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+                    'user_agent': rng.choice(USER_AGENTS),
+                    'details': None
+                }
+
+    counts['audit_log'] = _insert_chunks(AuditLog.__table__, audit_rows(), chunk_size)
+    report(f"{counts['audit_log']} entrées d'audit")
+
+    db.session.commit()
+    return counts
@@ -0,0 +1,445 @@
+import hashlib
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from sqlalchemy import case, func
+from app import db
+from app.models.timesheet import Timesheet
+from app.models.user import User
+from app.models.code import Code
+from app.services.periods import current_period, period_bounds, period_range
+from app.services.rollups import refresh_user_days
+from app.utils.sql import upsert
+
+
+def load_period(user_id, days):
+    """
+    Charge les feuilles de temps d'un utilisateur sur une période en une requête.
+
+    Returns:
+        dict: {date: Timesheet ou None} pour chaque jour de `days`
+    """
+    rows = Timesheet.query.filter(
+        Timesheet.user_id == user_id,
+        Timesheet.date >= min(days),
+        Timesheet.date <= max(days)
+    ).all()
+    by_date = {ts.date: ts for ts in rows}
+    return {day: by_date.get(day) for day in days}
+
+
+def save_period(user_id, entries, existing):
+    """
+    Enregistre les journées saisies en un seul upsert groupé.
+
+    Seules les journées nouvelles ou réellement modifiées sont écrites (et
+    repassent au statut 'submitted') ; les autres gardent leur statut.
+    Les minutes nettes et les cumuls d'heures sont mis à jour dans la même
+    transaction. L'appelant
+    reste responsable du commit.
+
+    Args:
+        user_id (int): Propriétaire des feuilles
+        entries (dict): {date: (start_time, end_time, code_id)}
+        existing (dict): Résultat de load_period pour la même période
+
+    Returns:
+        list[date]: Les journées effectivement écrites
+    """
+    rows = []
+    for day, (start_time, end_time, code_id) in sorted(entries.items()):
+        ts = existing.get(day)
+        if ts is not None and (ts.start_time, ts.end_time, ts.code_id) == (start_time, end_time, code_id):
+            continue
+        rows.append({
+            'user_id': user_id,
+            'date': day,
+            'start_time': start_time,
+            'end_time': end_time,
+            'code_id': code_id,
+            'break_duration': 0,
+            'status': 'submitted',
+            'updated_at': datetime.utcnow()
+        })
+
+    if not rows:
+        return []
+
+    table = Timesheet.__table__
+    # La pause d'une journée existante est conservée : seule la saisie de la grille est mise à jour
+    upsert(db.session, table, rows, ['user_id', 'date'], lambda proposed: {
+        'start_time': proposed.start_time,
+        'end_time': proposed.end_time,
+        'code_id': proposed.code_id,
+        'status': proposed.status,
+        'updated_at': proposed.updated_at
+    })
+
+    # Les objets déjà chargés ne reflètent pas l'upsert
+    for row in rows:
+        if existing.get(row['date']) is not None:
+            db.session.expire(existing[row['date']])
+
+    changed_days = [row['date'] for row in rows]
+    # L'upsert contourne l'ORM : minutes nettes recalculées en SQL (pause et
+    # modificateurs des journées existantes compris), avant les cumuls
+    db.session.execute(Timesheet.refresh_net_minutes(
+        Timesheet.user_id == user_id,
+        Timesheet.date.in_(changed_days)
+    ))
+    refresh_user_days(user_id, changed_days)
+    return changed_days
+
+
+# Décisions possibles sur une feuille soumise : action d'audit -> statut
+REVIEW_STATUSES = {'approve': 'approved', 'reject': 'rejected'}
+
+
+def review_timesheets(action, validator_id, ids=None, user_id=None, start_date=None, end_date=None, code_id=None):
+    """
+    Approuve ou rejette des feuilles soumises en une seule instruction UPDATE.
+
+    La sélection est soit une liste d'identifiants, soit « toutes les
+    feuilles soumises d'un employé sur une période ». Seules les feuilles
+    encore au statut 'submitted' sont modifiées. Les cumuls d'heures sont
+    mis à jour dans la même transaction ; l'appelant reste responsable du
+    commit et de l'audit (voir log_audit_batch).
+
+    Args:
+        action (str): 'approve' ou 'reject'
+        validator_id (int): Manager qui valide
+        ids (list[int], optional): Feuilles sélectionnées
+        user_id (int, optional): Employé (sélection par période)
+        start_date, end_date (date, optional): Bornes incluses de la période
+        code_id (int, optional): Limite la sélection par période à un code
+
+    Returns:
+        dict: 'status', 'count', 'employees', 'hours' et 'rows', la liste des
+            feuilles modifiées (id, user_id, date, hours)
+
+    Raises:
+        ValueError: Action inconnue ou sélection vide
+    """
+    if action not in REVIEW_STATUSES:
+        raise ValueError(f"Action inconnue : {action}")
+
+    criteria = [Timesheet.status == 'submitted']
+    if ids is not None:
+        if not ids:
+            raise ValueError("Aucune feuille sélectionnée")
+        criteria.append(Timesheet.id.in_(ids))
+    elif user_id is not None:
+        criteria.append(Timesheet.user_id == user_id)
+        if start_date is not None:
+            criteria.append(Timesheet.date >= start_date)
+        if end_date is not None:
+            criteria.append(Timesheet.date <= end_date)
+        if code_id is not None:
+            criteria.append(Timesheet.code_id == code_id)
+    else:
+        raise ValueError("Sélection vide : indiquez des feuilles ou un employé")
+
+    # Lignes visées (cumuls et audit), verrouillées (SELECT ... FOR UPDATE, par
+    # id croissant) jusqu'au commit : un autre manager qui traite les mêmes
+    # feuilles attend, puis ne les retrouve plus au statut 'submitted'. Les
+    # lignes lues sont donc exactement celles que l'UPDATE modifie (SQLite
+    # ignore FOR UPDATE mais n'admet qu'une transaction d'écriture à la fois).
+    rows = db.session.query(Timesheet.id, Timesheet.user_id, Timesheet.date, Timesheet.hours) \
+                     .filter(*criteria).order_by(Timesheet.id).with_for_update().all()
+    status = REVIEW_STATUSES[action]
+    if rows:
+        db.session.execute(
+            Timesheet.__table__.update()
+            .where(Timesheet.__table__.c.id.in_([row.id for row in rows]),
+                   Timesheet.__table__.c.status == 'submitted')
+            .values(status=status, validator_id=validator_id)
+        )
+        # Les objets déjà chargés dans la session ne reflètent pas l'UPDATE
+        db.session.expire_all()
+
+        days_by_user = {}
+        for row in rows:
+            days_by_user.setdefault(row.user_id, set()).add(row.date)
+        # Cumuls par employé dans l'ordre des id (ordre des verrous, voir rollups)
+        for employee_id, days in sorted(days_by_user.items()):
+            refresh_user_days(employee_id, days)
+
+    return {
+        'status': status,
+        'count': len(rows),
+        'employees': len({row.user_id for row in rows}),
+        'hours': sum(float(row.hours or 0) for row in rows),
+        'rows': [{'id': row.id, 'user_id': row.user_id, 'date': row.date, 'hours': float(row.hours or 0)}
+                 for row in rows]
+    }
+
+
+def pending_criteria(user_id=None, start_date=None, end_date=None, code_id=None):
+    """Critères de la file d'approbation (feuilles soumises) selon les filtres."""
+    criteria = [Timesheet.status == 'submitted']
+    if user_id is not None:
+        criteria.append(Timesheet.user_id == user_id)
+    if start_date is not None:
+        criteria.append(Timesheet.date >= start_date)
+    if end_date is not None:
+        criteria.append(Timesheet.date <= end_date)
+    if code_id is not None:
+        criteria.append(Timesheet.code_id == code_id)
+    return criteria
+
+
+def pending_queue(criteria):
+    """
+    Requête des lignes affichées dans la file d'approbation.
+
+    Colonnes seulement (pas d'objets Timesheet) : nom de l'employé et code
+    viennent de jointures et les heures de la colonne net_minutes, sans
+    chargement paresseux ligne par ligne. À paginer sur (date, id).
+    """
+    return db.session.query(
+        Timesheet.id,
+        Timesheet.date,
+        Timesheet.user_id,
+        Timesheet.start_time,
+        Timesheet.end_time,
+        Timesheet.description,
+        Timesheet.hours.label('hours'),
+        User.first_name,
+        User.last_name,
+        Code.nom.label('code')
+    ).join(User, User.id == Timesheet.user_id) \
+     .outerjoin(Code, Code.id == Timesheet.code_id) \
+     .filter(*criteria)
+
+
+def pending_by_employee(criteria, limit=200):
+    """
+    Résumé de la file par employé, calculé en une requête groupée.
+
+    Returns:
+        list[dict]: 'user_id', 'first_name', 'last_name', 'count', 'hours',
+            'first_date' et 'last_date', du plus grand nombre de feuilles au plus petit
+    """
+    pending = db.session.query(
+        Timesheet.user_id.label('user_id'),
+        func.count(Timesheet.id).label('count'),
+        func.sum(Timesheet.hours).label('hours'),
+        func.min(Timesheet.date).label('first_date'),
+        func.max(Timesheet.date).label('last_date')
+    ).filter(*criteria).group_by(Timesheet.user_id).subquery()
+
+    rows = db.session.query(pending, User.first_name, User.last_name) \
+                     .join(User, User.id == pending.c.user_id) \
+                     .order_by(pending.c.count.desc(), User.last_name, User.first_name) \
+                     .limit(limit) \
+                     .all()
+    return [{
+        'user_id': row.user_id,
+        'first_name': row.first_name,
+        'last_name': row.last_name,
+        'count': row.count,
+        'hours': float(row.hours or 0),
+        'first_date': row.first_date,
+        'last_date': row.last_date
+    } for row in rows]
+
+
+def pending_by_period(criteria):
+    """
+    Résumé de la file par période de paie.
+
+    Le regroupement par jour est fait en SQL (au plus un enregistrement par
+    date distincte) ; les jours sont ensuite rangés dans leur période, dont
+    le calcul dépend de l'année (voir app/services/periods.py).
+
+    Returns:
+        list[dict]: 'year', 'period', 'start', 'end', 'count' et 'hours', de
+            la période la plus récente à la plus ancienne
+    """
+    day_rows = db.session.query(
+        Timesheet.date,
+        func.count(Timesheet.id),
+        func.sum(Timesheet.hours)
+    ).filter(*criteria).group_by(Timesheet.date).order_by(Timesheet.date.desc()).all()
+
+    periods = OrderedDict()
+    for day, count, hours in day_rows:
+        # Même numérotation que la grille de l'employé (bornée à 1..26)
+        key = (day.year, current_period(day))
+        entry = periods.get(key)
+        if entry is None:
+            start, end = period_bounds(key[1], key[0])
+            entry = periods[key] = {
+                'year': key[0], 'period': key[1], 'start': start, 'end': end, 'count': 0, 'hours': 0.0
+            }
+        # Jours hors des 26 périodes (début janvier, fin décembre) : bornes élargies
+        entry['start'] = min(entry['start'], day)
+        entry['end'] = max(entry['end'], day)
+        entry['count'] += count
+        entry['hours'] += float(hours or 0)
+    return list(periods.values())
+
+
+# Périodes de paie affichées par page de l'historique d'un employé
+HISTORY_PERIODS = 2
+
+
+def employee_history(user_id, anchor=None, periods=HISTORY_PERIODS):
+    """
+    Historique d'un employé par fenêtre de périodes de paie.
+
+    La fenêtre se termine avec la période qui contient `anchor` (par défaut
+    la période courante) et remonte de `periods` périodes. Toutes les requêtes passent par l'index
+    (user_id, date) : le coût ne dépend pas de l'ancienneté de l'employé.
+
+    Returns:
+        dict: 'periods' (de la plus récente à la plus ancienne : 'start',
+            'end', 'rows', 'count', 'hours', 'approved_hours', 'pending'),
+            'start', 'end', 'older_anchor' (date de la feuille la plus
+            récente avant la fenêtre, None s'il n'y en a pas), 'has_newer'
+            (une fenêtre plus récente existe) et 'newer_anchor' (son ancre ;
+            None quand c'est la fenêtre par défaut)
+    """
+    current_start, _ = period_range(date.today())
+    anchor = min(anchor or date.today(), date.today())
+    ranges = [period_range(anchor)]
+    while len(ranges) < periods:
+        ranges.append(period_range(ranges[-1][0] - timedelta(days=1)))
+    window_start, window_end = ranges[-1][0], ranges[0][1]
+    in_window = (Timesheet.user_id == user_id, Timesheet.date.between(window_start, window_end))
+
+    rows = db.session.query(
+        Timesheet.id,
+        Timesheet.date,
+        Timesheet.start_time,
+        Timesheet.end_time,
+        Timesheet.break_duration,
+        Timesheet.description,
+        Timesheet.status,
+        Timesheet.hours.label('hours')
+    ).filter(*in_window).order_by(Timesheet.date.desc(), Timesheet.id.desc()).all()
+
+    # Sous-totaux par période calculés dans la requête : chaque ligne reçoit
+    # le rang de sa période (0 = la plus récente)
+    bucket = case(
+        *[(Timesheet.date >= start, index) for index, (start, _) in enumerate(ranges[:-1])],
+        else_=len(ranges) - 1
+    ).label('bucket')
+    totals = {
+        row.bucket: row for row in db.session.query(
+            bucket,
+            func.count(Timesheet.id).label('count'),
+            func.coalesce(func.sum(Timesheet.hours), 0).label('hours'),
+            func.coalesce(func.sum(case((Timesheet.status == 'approved', Timesheet.hours), else_=0)), 0)
+                .label('approved_hours'),
+            func.coalesce(func.sum(case((Timesheet.status == 'submitted', 1), else_=0)), 0).label('pending')
+        ).filter(*in_window).group_by(bucket).all()
+    }
+
+    older_anchor = db.session.query(func.max(Timesheet.date)) \
+                             .filter(Timesheet.user_id == user_id, Timesheet.date < window_start) \
+                             .scalar()
+
+    result = []
+    for index, (start, end) in enumerate(ranges):
+        total = totals.get(index)
+        result.append({
+            'start': start,
+            'end': end,
+            'rows': [row for row in rows if start <= row.date <= end],
+            'count': total.count if total else 0,
+            'hours': float(total.hours) if total else 0.0,
+            'approved_hours': float(total.approved_hours) if total else 0.0,
+            'pending': int(total.pending) if total else 0
+        })
+    # Fenêtre suivante : `periods` périodes plus loin, sans dépasser la période courante
+    newer = ranges[0]
+    for _ in range(periods):
+        if newer[0] >= current_start:
+            break
+        newer = period_range(newer[1] + timedelta(days=1))
+    newer_anchor = newer[0]
+
+    return {
+        'periods': result,
+        'start': window_start,
+        'end': window_end,
+        'older_anchor': older_anchor,
+        'has_newer': ranges[0][0] < current_start,
+        'newer_anchor': newer_anchor if newer_anchor < current_start else None
+    }
+
+
+# Colonnes des lignes compactes de l'API (une liste de valeurs par feuille)
+PERIOD_COLUMNS = ('id', 'date', 'start', 'end', 'break', 'net_minutes', 'status', 'code_id', 'description')
+
+
+def _period_etag(user_id, start_date, count, max_id, last_update):
+    marker = f'{user_id}:{start_date.isoformat()}:{count}:{max_id or 0}:{last_update or ""}'
+    return hashlib.sha1(marker.encode('utf-8')).hexdigest()[:20]
+
+
+def period_versions(user_ids, start_date, end_date):
+    """
+    Version (valeur d'ETag) de la période de chaque utilisateur, sans charger les lignes.
+
+    Une seule requête groupée sur l'index (user_id, date) : nombre de
+    feuilles, plus grand id et dernière écriture (updated_at). Toute
+    écriture, suppression ou nouvelle saisie sur la période change la version.
+
+    Returns:
+        dict: {user_id: version} pour chaque utilisateur demandé (période vide comprise)
+    """
+    user_ids = list(user_ids)
+    markers = {
+        row.user_id: row for row in db.session.query(
+            Timesheet.user_id,
+            func.count(Timesheet.id).label('count'),
+            func.max(Timesheet.id).label('max_id'),
+            func.max(Timesheet.updated_at).label('last_update')
+        ).filter(
+            Timesheet.user_id.in_(user_ids),
+            Timesheet.date.between(start_date, end_date)
+        ).group_by(Timesheet.user_id).all()
+    }
+    versions = {}
+    for user_id in user_ids:
+        row = markers.get(user_id)
+        versions[user_id] = _period_etag(user_id, start_date, *(
+            (row.count, row.max_id, row.last_update) if row else (0, None, None)
+        ))
+    return versions
+
+
+def _time(value):
+    return value.strftime('%H:%M') if value else None
+
+
+def period_rows(user_ids, start_date, end_date):
+    """
+    Feuilles d'une période en lignes compactes (valeurs dans l'ordre de PERIOD_COLUMNS).
+
+    Returns:
+        dict: {user_id: [ligne, ...]} triées par date, pour chaque utilisateur demandé
+    """
+    user_ids = list(user_ids)
+    rows = {user_id: [] for user_id in user_ids}
+    for row in db.session.query(
+        Timesheet.user_id,
+        Timesheet.id,
+        Timesheet.date,
+        Timesheet.start_time,
+        Timesheet.end_time,
+        Timesheet.break_duration,
+        Timesheet.net_minutes,
+        Timesheet.status,
+        Timesheet.code_id,
+        Timesheet.description
+    ).filter(
+        Timesheet.user_id.in_(user_ids),
+        Timesheet.date.between(start_date, end_date)
+    ).order_by(Timesheet.user_id, Timesheet.date).all():
+        rows[row.user_id].append([
+            row.id, row.date.isoformat(), _time(row.start_time), _time(row.end_time),
+            row.break_duration or 0, row.net_minutes, row.status, row.code_id, row.description
+        ])
+    return rows
@@ -1,5 +1,73 @@
 from functools import wraps
-from flask import session, redirect, url_for, flash
+from flask import session, redirect, url_for, flash, g, current_app
+
+# Champs d'affichage conservés dans la session (cookie signé) à la connexion
+SNAPSHOT_FIELDS = ('id', 'username', 'first_name', 'last_name', 'role')
+
+
+class CurrentUser:
+    """
+    Utilisateur connecté, résolu au plus une fois par requête.
+
+    Les champs présents dans l'instantané de session (voir
+    USER_SESSION_SNAPSHOT) sont servis sans requête ; tout autre attribut
+    charge l'objet User complet, une seule fois, puis le réutilise.
+    """
+
+    def __init__(self, user_id, snapshot):
+        self._user_id = user_id
+        self._snapshot = snapshot
+        self._user = None
+        self._loaded = False
+
+    def _load(self):
+        if not self._loaded:
+            from app import db
+            from app.models.user import User
+            self._user = db.session.get(User, self._user_id)
+            self._loaded = True
+        return self._user
+
+    @property
+    def exists(self):
+        """Vrai si le compte existe encore (charge l'utilisateur si nécessaire)."""
+        return self._load() is not None
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name in self._snapshot:
+            return self._snapshot[name]
+        user = self._load()
+        if user is None:
+            raise AttributeError(name)
+        return getattr(user, name)
+
+    def __repr__(self):
+        return f'<CurrentUser {self._user_id}>'
+
+
+def user_snapshot(user):
+    """Instantané des champs d'affichage d'un utilisateur, pour la session."""
+    return {field: getattr(user, field) for field in SNAPSHOT_FIELDS}
+
+
+def get_current_user():
+    """
+    Retourne l'utilisateur connecté (CurrentUser) ou None, mis en cache dans flask.g.
+
+    Partagé par role_required, les templates (variable current_user) et le
+    journal d'audit : User n'est jamais chargé plus d'une fois par requête.
+    """
+    if 'user_id' not in session:
+        return None
+    if '_current_user' not in g:
+        snapshot = {'id': session['user_id']}
+        if current_app.config.get('USER_SESSION_SNAPSHOT', True):
+            snapshot.update(session.get('user_snapshot') or {})
+        g._current_user = CurrentUser(session['user_id'], snapshot)
+    return g._current_user
+
 
 def login_required(f):
     @wraps(f)
@@ -17,9 +85,20 @@ def role_required(role):
             if 'user_id' not in session:
                 flash('Veuillez vous connecter pour accéder à cette page')
                 return redirect(url_for('auth.login'))
-            if session.get('role') != role:
+            # Rôle lu dans l'instantané de session, sinon sur l'utilisateur
+            # chargé (réutilisé ensuite par la vue via get_current_user)
+            if getattr(get_current_user(), 'role', None) != role:
                 flash('Accès non autorisé')
                 return redirect(url_for('auth.login'))
             return f(*args, **kwargs)
         return decorated_function
-    return decorator
\ No newline at end of file
+    return decorator
+
+def csrf_required(f):
+    """Vérifie le jeton CSRF (champ csrf_token ou en-tête X-CSRFToken) d'un formulaire HTML simple."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if current_app.config.get('WTF_CSRF_ENABLED', True):
+            current_app.extensions['csrf'].protect()
+        return f(*args, **kwargs)
+    return decorated_function
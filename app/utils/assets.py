@@ -0,0 +1,101 @@
+import json
+import mimetypes
+from pathlib import Path
+from flask import current_app, request, send_from_directory, url_for
+
+# Dossier (dans static/) des fichiers empreintés produits par `flask assets build`
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Bibliothèques tierces servies depuis app/static/vendor (`flask assets vendor`) :
+# chemin logique -> (URL d'origine, empreinte SRI attendue). Tant qu'un fichier
+# n'est pas présent localement, asset_url() renvoie l'URL d'origine.
+VENDOR_ASSETS = {
+    'vendor/bootstrap/bootstrap.min.css': (
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+        'sha384-9ndCyUaIbzAi2FUVXJi0CjmCapSmO7SnpJef0486qhLnuZ2cdeRhO02iuK6FUUVM',
+    ),
+    'vendor/bootstrap/bootstrap.bundle.min.js': (
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+        'sha384-geWF76RCwLtnZ8qwWowPQNguL3RmwHVBC9FhGdlKrxdiJJigb/j/68SIy3Te4Bkz',
+    ),
+}
+
+
+class AssetPipeline:
+    """
+    Fichiers statiques empreintés, servis avec un cache de longue durée.
+
+    `flask assets build` copie chaque fichier de static/ (css, js, vendor)
+    sous static/dist/ avec l'empreinte de son contenu dans le nom
+    (style.3f2a1b9c04.css), accompagné d'une version .gz, et écrit le
+    manifeste chemin logique -> chemin empreinté. Dans les gabarits,
+    asset_url('css/style.css') renvoie le chemin empreinté.
+
+    Les fichiers de dist/ ne changent jamais de contenu : ils sont servis
+    avec Cache-Control « immutable » et, si le client accepte gzip, depuis
+    leur version précompressée.
+
+    Configuration :
+        ASSETS_FINGERPRINT: utilise le manifeste (par défaut True) ; sans
+            manifeste, les fichiers sont servis sous leur nom d'origine
+        ASSETS_MAX_AGE: durée de cache des fichiers empreintés, en secondes
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ASSETS_FINGERPRINT', True)
+        app.config.setdefault('ASSETS_MAX_AGE', 365 * 24 * 3600)
+        app.extensions['assets'] = {'manifest': None, 'mtime': None}
+
+        app.jinja_env.globals['asset_url'] = self.url
+        # Remplace la vue de Flask pour servir dist/ avec ses en-têtes propres
+        app.view_functions['static'] = self._send_static
+
+    def manifest(self):
+        """Manifeste de l'application courante (relu s'il a changé, en mode debug)."""
+        state = current_app.extensions['assets']
+        path = Path(current_app.static_folder) / DIST_DIR / MANIFEST_NAME
+        if state['manifest'] is None or current_app.debug:
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                mtime = None
+            if state['manifest'] is None or mtime != state['mtime']:
+                state['manifest'] = json.loads(path.read_text(encoding='utf-8')) if mtime else {}
+                state['mtime'] = mtime
+        return state['manifest']
+
+    def url(self, filename):
+        """URL d'un fichier statique : empreintée si possible, sinon d'origine."""
+        if current_app.config['ASSETS_FINGERPRINT']:
+            fingerprinted = self.manifest().get(filename)
+            if fingerprinted:
+                return url_for('static', filename=f'{DIST_DIR}/{fingerprinted}')
+        if filename in VENDOR_ASSETS and not (Path(current_app.static_folder) / filename).is_file():
+            return VENDOR_ASSETS[filename][0]
+        return url_for('static', filename=filename)
+
+    def _send_static(self, filename):
+        if not filename.startswith(f'{DIST_DIR}/') or filename.endswith('.gz'):
+            return current_app.send_static_file(filename)
+
+        static_folder = current_app.static_folder
+        max_age = current_app.config['ASSETS_MAX_AGE']
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        if request.accept_encodings['gzip'] and (Path(static_folder) / f'{filename}.gz').is_file():
+            response = send_from_directory(static_folder, f'{filename}.gz', mimetype=mimetype, max_age=max_age)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = send_from_directory(static_folder, filename, mimetype=mimetype, max_age=max_age)
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+# Instance partagée par l'application
+assets = AssetPipeline()
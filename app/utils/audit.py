@@ -1,13 +1,219 @@
 from app import db
 from app.models.audit_log import AuditLog
+from app.services.audit_facets import increment_facets
 from flask import request, session
+from app.util import get_current_user
+import atexit
 import json
+import logging
+import os
+import queue
+import threading
+import time
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    """
+    Écriture groupée et non bloquante du journal d'audit.
+
+    Les événements sont capturés au moment de l'appel puis placés dans une file
+    en mémoire ; un thread d'arrière-plan les insère par lots (dès que
+    AUDIT_LOG_BATCH_SIZE événements sont en attente ou toutes les
+    AUDIT_LOG_FLUSH_INTERVAL secondes), sur sa propre connexion : la session
+    de l'appelant n'est jamais validée à sa place.
+
+    Configuration :
+        AUDIT_LOG_MODE: 'async' (par défaut) ou 'sync' (insertion immédiate,
+            pratique pour les tests et les scripts)
+        AUDIT_LOG_BATCH_SIZE: taille maximale d'un lot
+        AUDIT_LOG_FLUSH_INTERVAL: délai maximal (secondes) avant écriture
+        AUDIT_LOG_QUEUE_SIZE: capacité de la file
+        AUDIT_LOG_MAX_ATTEMPTS: tentatives d'écriture d'un lot
+        AUDIT_LOG_RETRY_DELAY: attente (secondes) avant la 2e tentative,
+            doublée à chaque nouvel échec
+
+    Politique de débordement : si la file est pleine, l'événement est écrit
+    de façon synchrone par l'appelant. On ralentit la requête plutôt que de
+    perdre une entrée d'audit.
+
+    La file est vidée à l'arrêt du processus (atexit). Un lot dont l'écriture
+    échoue (base verrouillée, connexion perdue…) est réessayé ; il n'est
+    abandonné qu'après AUDIT_LOG_MAX_ATTEMPTS échecs, journalisé (logging)
+    et compté dans stats()['dropped'] (page Système).
+    """
+
+    def __init__(self, app=None):
+        self._app = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._atexit_registered = False
+        self._stats_lock = threading.Lock()
+        self.retried = 0
+        self.dropped = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('AUDIT_LOG_MODE', 'async')
+        app.config.setdefault('AUDIT_LOG_BATCH_SIZE', 200)
+        app.config.setdefault('AUDIT_LOG_FLUSH_INTERVAL', 2.0)
+        app.config.setdefault('AUDIT_LOG_QUEUE_SIZE', 10000)
+        app.config.setdefault('AUDIT_LOG_MAX_ATTEMPTS', 5)
+        app.config.setdefault('AUDIT_LOG_RETRY_DELAY', 0.1)
+
+        # Vide la file de l'application précédente si init_app est rappelé
+        if self._queue is not None:
+            self.shutdown()
+
+        self._app = app
+        self.mode = app.config['AUDIT_LOG_MODE']
+        self.batch_size = app.config['AUDIT_LOG_BATCH_SIZE']
+        self.flush_interval = app.config['AUDIT_LOG_FLUSH_INTERVAL']
+        self.max_attempts = max(1, app.config['AUDIT_LOG_MAX_ATTEMPTS'])
+        self.retry_delay = app.config['AUDIT_LOG_RETRY_DELAY']
+        self._queue = queue.Queue(maxsize=app.config['AUDIT_LOG_QUEUE_SIZE'])
+        self._stop = threading.Event()
+        self._thread = None
+        app.extensions['audit_writer'] = self
+
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def submit(self, entry):
+        """Enregistre un événement (dictionnaire de colonnes AuditLog)."""
+        if self.mode == 'sync':
+            self._write([entry])
+            return
+
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            logger.warning("File d'audit pleine : écriture synchrone de l'événement")
+            self._write([entry])
+
+    def submit_many(self, entries):
+        """Enregistre plusieurs événements ; en mode 'sync', en une seule insertion."""
+        if not entries:
+            return
+        if self.mode == 'sync':
+            self._write(entries)
+            return
+
+        self._ensure_thread()
+        overflow = []
+        for entry in entries:
+            try:
+                self._queue.put_nowait(entry)
+            except queue.Full:
+                overflow.append(entry)
+        if overflow:
+            logger.warning("File d'audit pleine : écriture synchrone de %d événements", len(overflow))
+            self._write(overflow)
+
+    def flush(self):
+        """Écrit immédiatement tous les événements en attente."""
+        if self._queue is None:
+            return
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def shutdown(self):
+        """Arrête le thread d'écriture et vide la file."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _ensure_thread(self):
+        # Démarrage paresseux : un serveur qui forke (gunicorn --preload)
+        # obtient ainsi un thread par processus de travail.
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def stats(self):
+        """Événements en attente, tentatives répétées et entrées abandonnées depuis le démarrage."""
+        with self._stats_lock:
+            return {
+                'mode': self.mode,
+                'queued': self._queue.qsize() if self._queue is not None else 0,
+                'retried': self.retried,
+                'dropped': self.dropped
+            }
+
+    def _write(self, entries):
+        # Lot réessayé avec un délai croissant : l'appelant (thread d'écriture
+        # ou requête en débordement) attend plutôt que de perdre les entrées
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                with self._app.app_context():
+                    with db.engine.begin() as connection:
+                        connection.execute(AuditLog.__table__.insert(), entries)
+                        increment_facets(connection, entries)
+                return
+            except Exception:
+                if attempt == self.max_attempts:
+                    logger.exception("Échec de l'écriture de %d entrées d'audit après %d tentatives : "
+                                     "entrées abandonnées", len(entries), attempt)
+                    with self._stats_lock:
+                        self.dropped += len(entries)
+                    return
+                logger.warning("Échec de l'écriture de %d entrées d'audit (tentative %d/%d), nouvel essai",
+                               len(entries), attempt, self.max_attempts, exc_info=True)
+                with self._stats_lock:
+                    self.retried += 1
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+
+audit_writer = AuditLogWriter()
+
+
 def log_audit(action, resource, resource_id=None, user_id=None, username=None, details=None):
     """
     Enregistre une entrée dans le journal d'audit.
-    
+
     Args:
         action (str): L'action effectuée (login, logout, create, update, delete)
         resource (str): La ressource concernée (user, timesheet)
@@ -15,40 +221,81 @@ def log_audit(action, resource, resource_id=None, user_id=None, username=None, d
         user_id (int, optional): L'ID de l'utilisateur (si connecté)
         username (str, optional): Le nom d'utilisateur (pour les tentatives de connexion échouées)
         details (dict, optional): Détails supplémentaires à stocker en JSON
+
+    L'écriture est confiée à audit_writer (voir AuditLogWriter) : cette
+    fonction ne valide pas la session de l'appelant.
+    """
+    user_id, username = _resolve_user(user_id, username)
+    entry = _request_entry(user_id, username)
+    entry.update(action=action, resource=resource, resource_id=resource_id,
+                 details=_details_json(details))
+
+    audit_writer.submit(entry)
+
+    return entry
+
+
+def log_audit_batch(action, resource, items, user_id=None):
+    """
+    Enregistre une même action sur plusieurs ressources, en un seul lot.
+
+    L'utilisateur et les données de la requête sont résolus une fois ; en
+    mode 'sync', toutes les entrées sont insérées par une seule instruction.
+
+    Args:
+        action (str): L'action effectuée (approve, reject…)
+        resource (str): La ressource concernée
+        items (iterable): Couples (resource_id, details)
+        user_id (int, optional): L'ID de l'utilisateur (celui de la session par défaut)
+
+    Returns:
+        list[dict]: Les entrées soumises
     """
+    user_id, username = _resolve_user(user_id, None)
+    template = _request_entry(user_id, username)
+    entries = [
+        dict(template, action=action, resource=resource, resource_id=resource_id,
+             details=_details_json(details))
+        for resource_id, details in items
+    ]
+    audit_writer.submit_many(entries)
+    return entries
+
+
+def _resolve_user(user_id, username):
     # Si l'utilisateur est connecté et que user_id n'est pas fourni
     if user_id is None and 'user_id' in session:
         user_id = session['user_id']
-        
+
     # Si user_id est fourni mais pas username
     if user_id is not None and username is None:
-        from app.models.user import User
-        user = User.query.get(user_id)
-        if user:
-            username = user.username
-    
-    # Conversion des détails en JSON si c'est un dictionnaire
-    details_json = None
-    if details:
-        if isinstance(details, dict):
-            details_json = json.dumps(details)
+        if user_id == session.get('user_id'):
+            # Utilisateur de la requête : déjà résolu (ou dans l'instantané de session)
+            username = getattr(get_current_user(), 'username', None)
         else:
-            details_json = str(details)
-    
-    # Création du log
-    log = AuditLog(
+            from app.models.user import User
+            user = db.session.get(User, user_id)
+            if user:
+                username = user.username
+    return user_id, username
+
+
+def _details_json(details):
+    # Conversion des détails en JSON si c'est un dictionnaire
+    if not details:
+        return None
+    if isinstance(details, dict):
+        return json.dumps(details)
+    return str(details)
+
+
+def _request_entry(user_id, username):
+    # Capture de l'événement (les données de la requête ne sont plus
+    # disponibles au moment où le thread d'écriture s'exécute)
+    return dict(
         timestamp=datetime.utcnow(),
         user_id=user_id,
         username=username,
-        action=action,
-        resource=resource,
-        resource_id=resource_id,
         ip_address=request.remote_addr,
-        user_agent=request.user_agent.string if request.user_agent else None,
-        details=details_json
+        user_agent=request.user_agent.string if request.user_agent else None
     )
-    
-    db.session.add(log)
-    db.session.commit()
-    
-    return log
\ No newline at end of file
@@ -0,0 +1,77 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+# Tous les caches du processus (voir invalidate_all_caches)
+_instances = weakref.WeakSet()
+
+
+class TTLCache:
+    """
+    Petit cache en mémoire, par processus, avec expiration et taille bornée.
+
+    Les entrées expirent après `ttl` secondes ; au-delà de `maxsize` entrées,
+    la moins récemment utilisée est évincée. Sûr entre threads.
+    """
+
+    def __init__(self, ttl=60, maxsize=256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        _instances.add(self)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, compute, ttl=None):
+        """Retourne la valeur en cache, ou la calcule avec compute() et la stocke."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, key=None):
+        """Supprime une entrée, ou tout le cache si key est None."""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def invalidate_matching(self, predicate):
+        """Supprime les entrées dont la clé vérifie predicate(key) ; retourne leur nombre."""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+    def __len__(self):
+        return len(self._data)
+
+
+def invalidate_all_caches():
+    """Vide tous les caches TTLCache du processus (changement de base, mesures à froid)."""
+    for cache in list(_instances):
+        cache.invalidate()
@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+from babel import Locale
+from babel.dates import parse_pattern
+
+# Locale, fuseaux et motifs préparés une seule fois (et non à chaque cellule)
+LOCALE = Locale.parse('fr_FR')
+LOCAL_TZ = ZoneInfo("America/Montreal")
+UTC = timezone.utc
+
+_DATE_COURTE = parse_pattern("d MMM yyyy")
+_JOUR = parse_pattern("EEEE")
+
+# Les dates affichées se répètent beaucoup (grilles de 14 jours, rapports)
+DATE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _date_fr_court(value):
+    return _DATE_COURTE.apply(value, LOCALE)
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _jour_fr(value):
+    return _JOUR.apply(value, LOCALE).capitalize()
+
+
+def date_fr_court(value):
+    """Date courte en français (ex. « 17 oct. 2026 »)."""
+    if not value:
+        return ''
+    return _date_fr_court(value)
+
+
+def jour_fr(value):
+    """Nom du jour en français, avec majuscule (ex. « Samedi »)."""
+    if not value:
+        return ''
+    return _jour_fr(value)
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _local_offset(utc_hour):
+    # Les changements d'heure tombent sur des heures pleines : un décalage par
+    # heure UTC suffit et les entrées d'une même page partagent le calcul
+    day, hour = divmod(utc_hour, 24)
+    moment = datetime.fromordinal(day).replace(hour=hour, tzinfo=UTC)
+    return moment.astimezone(LOCAL_TZ).utcoffset()
+
+
+def datetime_local(value):
+    """Horodatage UTC (naïf) affiché dans le fuseau local, au format JJ/MM/AAAA HH:MM:SS."""
+    if not value:
+        return ''
+    local = value + _local_offset(value.toordinal() * 24 + value.hour)
+    # Formatage par % : nettement moins coûteux que strftime
+    return '%02d/%02d/%04d %02d:%02d:%02d' % (
+        local.day, local.month, local.year, local.hour, local.minute, local.second)
+
+
+def register_filters(app):
+    """Enregistre les filtres de formatage Jinja."""
+    app.jinja_env.filters['date_fr_court'] = date_fr_court
+    app.jinja_env.filters['jour_fr'] = jour_fr
+    app.jinja_env.filters['datetime_local'] = datetime_local
@@ -0,0 +1,165 @@
+import threading
+import time
+from flask import current_app, g, has_request_context
+from jinja2 import nodes
+from jinja2.ext import Extension
+from jinja2.runtime import Undefined
+from app.utils.cache import TTLCache
+
+
+class FragmentCacheExtension(Extension):
+    """
+    Balise Jinja {% cache %} : met en cache le HTML rendu d'un bloc.
+
+        {% cache 'navbar', current_user.role, current_user.id %}
+            ...
+        {% endcache %}
+
+    Le premier argument nomme le fragment (statistiques, invalidation) ; les
+    suivants forment la clé. Une clé doit contenir tout ce dont dépend le
+    rendu du bloc : rôle, utilisateur, période, version des données…
+    """
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        call = self.call_method('_render', [nodes.List(parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, parts, caller):
+        return fragment_cache.render(parts, caller)
+
+
+def _key_part(value):
+    # Les variables absentes du contexte (Undefined) valent None dans la clé
+    if isinstance(value, Undefined):
+        return None
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class FragmentCache:
+    """
+    Cache de fragments HTML rendus, par processus (LRU borné avec expiration).
+
+    Chaque fragment nommé cumule ses succès, ses échecs et le temps de rendu
+    des échecs (page admin.system). Les fragments servis ou rendus pendant
+    une requête sont résumés dans l'en-tête Server-Timing (« frag »).
+
+    Configuration :
+        FRAGMENT_CACHE_ENABLED: active le cache (par défaut True)
+        FRAGMENT_CACHE_SIZE: nombre maximal de fragments conservés
+        FRAGMENT_CACHE_TTL: durée de vie d'un fragment, en secondes ; borne
+            aussi le décalage entre processus, chacun ayant son propre cache
+    """
+
+    def __init__(self, app=None):
+        self._store = TTLCache(ttl=300, maxsize=512)
+        self._lock = threading.Lock()
+        self._stats = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('FRAGMENT_CACHE_ENABLED', True)
+        app.config.setdefault('FRAGMENT_CACHE_SIZE', 512)
+        app.config.setdefault('FRAGMENT_CACHE_TTL', 300)
+        app.extensions['fragment_cache'] = self
+
+        self._store.ttl = app.config['FRAGMENT_CACHE_TTL']
+        self._store.maxsize = app.config['FRAGMENT_CACHE_SIZE']
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.after_request(self._add_server_timing)
+
+    def render(self, parts, caller):
+        """Retourne le fragment en cache, ou le rend avec caller() et le stocke."""
+        if not current_app.config['FRAGMENT_CACHE_ENABLED']:
+            return caller()
+
+        key = tuple(_key_part(part) for part in parts)
+        name = key[0]
+        missing = object()
+        started = time.perf_counter()
+        html = self._store.get(key, missing)
+        hit = html is not missing
+        if not hit:
+            html = caller()
+            self._store.set(key, html)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                entry = self._stats[name] = {'name': name, 'hits': 0, 'misses': 0, 'render_ms': 0.0}
+            if hit:
+                entry['hits'] += 1
+            else:
+                entry['misses'] += 1
+                entry['render_ms'] += elapsed_ms
+
+        if has_request_context():
+            request_stats = g.setdefault('_fragment_stats', {'hits': 0, 'misses': 0, 'ms': 0.0})
+            request_stats['hits' if hit else 'misses'] += 1
+            request_stats['ms'] += elapsed_ms
+        return html
+
+    def invalidate(self, name=None, *parts):
+        """
+        Supprime des fragments du cache.
+
+        Args:
+            name (str, optional): Nom du fragment ; tout le cache si absent
+            *parts: Clé complète (sans le nom) ; toutes les variantes du
+                fragment si absente
+
+        Returns:
+            int: Nombre de fragments supprimés
+        """
+        if name is None:
+            count = len(self._store)
+            self._store.invalidate()
+            return count
+        if parts:
+            key = (name,) + tuple(_key_part(part) for part in parts)
+            return self._store.invalidate_matching(lambda cached: cached == key)
+        return self._store.invalidate_matching(lambda cached: cached[0] == name)
+
+    def stats(self):
+        """Cumuls par fragment depuis le démarrage : succès, échecs, taux et rendu moyen."""
+        with self._lock:
+            entries = [dict(entry) for entry in self._stats.values()]
+        for entry in entries:
+            total = entry['hits'] + entry['misses']
+            entry['hit_rate'] = entry['hits'] / total if total else 0.0
+            entry['avg_render_ms'] = entry['render_ms'] / entry['misses'] if entry['misses'] else 0.0
+        return sorted(entries, key=lambda entry: entry['name'])
+
+    @property
+    def size(self):
+        return len(self._store)
+
+    def reset_stats(self):
+        """Remet les cumuls à zéro (le contenu du cache est conservé)."""
+        with self._lock:
+            self._stats.clear()
+
+    def _add_server_timing(self, response):
+        stats = g.pop('_fragment_stats', None)
+        if stats is not None:
+            response.headers.add(
+                'Server-Timing',
+                f'frag;dur={stats["ms"]:.1f};desc="{stats["hits"]} hit {stats["misses"]} miss"'
+            )
+        return response
+
+
+# Instance partagée par l'application
+fragment_cache = FragmentCache()
@@ -0,0 +1,99 @@
+from datetime import datetime
+from sqlalchemy import Date, DateTime
+from app.utils.sql import keyset_after
+
+
+class KeysetPage:
+    """Page de résultats obtenue par pagination par clé (seek), sans OFFSET."""
+
+    def __init__(self, items, has_older, has_newer, cursor_of):
+        self.items = items
+        self.has_older = has_older
+        self.has_newer = has_newer
+        self.older_cursor = cursor_of(items[-1]) if items and has_older else None
+        self.newer_cursor = cursor_of(items[0]) if items and has_newer else None
+
+
+def encode_cursor(timestamp, row_id):
+    """Encode une position (timestamp, id) pour l'URL."""
+    return f"{timestamp.isoformat()}_{row_id}"
+
+
+def decode_cursor(cursor):
+    """Décode un curseur produit par encode_cursor ; None s'il est invalide."""
+    if not cursor:
+        return None
+    try:
+        timestamp, row_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except ValueError:
+        return None
+
+
+def keyset_paginate(query, timestamp_column, id_column, per_page, older_than=None, newer_than=None, extra=None):
+    """
+    Pagine une requête du plus récent au plus ancien sur (timestamp, id).
+    La colonne de tri peut aussi être une date (DATE).
+
+    Chaque page coûte une seule requête indexée de per_page + 1 lignes,
+    quelle que soit sa profondeur.
+
+    Args:
+        query: Requête ORM déjà filtrée
+        timestamp_column, id_column: Colonnes de la clé de tri
+        per_page (int): Nombre d'éléments par page
+        older_than (str, optional): Curseur ; retourne la page plus ancienne
+        newer_than (str, optional): Curseur ; retourne la page plus récente
+        extra (callable, optional): Seconde source fusionnée avec la requête
+            (ex. archives du journal d'audit) : extra(after, ascending, limit,
+            until) retourne au plus `limit` éléments après la clé `after`
+            (None pour le début), dans l'ordre demandé ; si `until` n'est pas
+            None, la requête remplit déjà la page et seuls les éléments
+            situés avant cette clé peuvent encore y figurer
+    """
+    key_columns = [timestamp_column, id_column]
+    # Colonne DATE (sans heure) : le curseur est ramené à une date
+    is_date = isinstance(timestamp_column.type, Date) and not isinstance(timestamp_column.type, DateTime)
+
+    def decode(cursor):
+        key = decode_cursor(cursor)
+        if key is not None and is_date:
+            return key[0].date(), key[1]
+        return key
+
+    def key_of(item):
+        return getattr(item, timestamp_column.key), getattr(item, id_column.key)
+
+    def cursor_of(item):
+        return encode_cursor(*key_of(item))
+
+    def merged(rows, after, ascending):
+        if extra is None:
+            return rows
+        until = key_of(rows[-1]) if len(rows) > per_page else None
+        rows = sorted(rows + extra(after, ascending, per_page + 1, until), key=key_of, reverse=not ascending)
+        return rows[:per_page + 1]
+
+    newer_key = decode(newer_than)
+    if newer_key is not None:
+        # On remonte vers les plus récents en ordre croissant, puis on inverse
+        rows = query.filter(keyset_after(key_columns, newer_key)) \
+                    .order_by(timestamp_column.asc(), id_column.asc()) \
+                    .limit(per_page + 1) \
+                    .all()
+        rows = merged(rows, newer_key, ascending=True)
+        if len(rows) > per_page:
+            items = list(reversed(rows[:per_page]))
+            return KeysetPage(items, has_older=True, has_newer=True, cursor_of=cursor_of)
+        # Plus assez d'entrées récentes : on revient à la première page
+
+    older_key = decode(older_than) if newer_key is None else None
+    if older_key is not None:
+        query = query.filter(keyset_after(key_columns, older_key, descending=True))
+
+    rows = query.order_by(timestamp_column.desc(), id_column.desc()) \
+                .limit(per_page + 1) \
+                .all()
+    rows = merged(rows, older_key, ascending=False)
+    has_older = len(rows) > per_page
+    return KeysetPage(rows[:per_page], has_older=has_older, has_newer=older_key is not None, cursor_of=cursor_of)
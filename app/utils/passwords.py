@@ -0,0 +1,70 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Politique par défaut (format Werkzeug « algorithme:paramètres »)
+DEFAULT_PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+
+
+def password_hash_method():
+    """Méthode de hachage configurée (PASSWORD_HASH_METHOD)."""
+    if has_app_context():
+        return current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_PASSWORD_HASH_METHOD)
+    return DEFAULT_PASSWORD_HASH_METHOD
+
+
+@lru_cache(maxsize=16)
+def _method_prefix(method):
+    # Werkzeug complète les paramètres omis (ex. 'pbkdf2:sha256' devient
+    # 'pbkdf2:sha256:1000000') : on calcule une fois le préfixe exact produit.
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+
+def hash_password(password, method=None):
+    """Hache un mot de passe selon la politique configurée."""
+    return generate_password_hash(password, method=method or password_hash_method())
+
+
+def hash_passwords(passwords, method=None, processes=1):
+    """
+    Hache une liste de mots de passe, chacun avec son propre sel.
+
+    Deux comptes au même mot de passe reçoivent des hash différents : rien
+    dans la base ne révèle le partage, et casser l'un ne casse pas l'autre.
+    Avec processes > 1, les hachages se font en parallèle (le coût de
+    scrypt/pbkdf2 est purement CPU).
+
+    Returns:
+        list: Les hash, dans l'ordre de `passwords`
+    """
+    passwords = list(passwords)
+    method = method or password_hash_method()
+    if processes > 1 and len(passwords) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            return list(pool.map(generate_password_hash, passwords, [method] * len(passwords)))
+    return [generate_password_hash(password, method=method) for password in passwords]
+
+
+def needs_rehash(password_hash, method=None):
+    """Vrai si le hash a été produit avec un algorithme ou un coût différent de la politique."""
+    if not password_hash:
+        return False
+    return password_hash.split('$', 1)[0] != _method_prefix(method or password_hash_method())
+
+
+def verify_and_upgrade(user, password):
+    """
+    Vérifie le mot de passe d'un utilisateur et, s'il est correct mais haché
+    avec une ancienne politique, le rehache avec la politique courante.
+
+    Returns:
+        tuple: (mot de passe valide, hash mis à jour) ; l'appelant valide la
+            session si le hash a été mis à jour.
+    """
+    if not user.password_hash or not check_password_hash(user.password_hash, password):
+        return False, False
+    if needs_rehash(user.password_hash):
+        user.password_hash = hash_password(password)
+        return True, True
+    return True, False
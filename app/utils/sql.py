@@ -0,0 +1,87 @@
+from sqlalchemy import Integer, and_, or_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+
+class time_seconds(FunctionElement):
+    """
+    Nombre de secondes depuis minuit pour une colonne de type Time.
+
+    Chaque moteur stocke les heures différemment (texte sous SQLite, TIME sous
+    MySQL/PostgreSQL) : cette expression permet de faire des différences
+    d'heures directement dans la base, sans charger les lignes en Python.
+    """
+    type = Integer()
+    inherit_cache = True
+    name = 'time_seconds'
+
+
+@compiles(time_seconds)
+def _time_seconds_default(element, compiler, **kw):
+    return "TIME_TO_SEC(%s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(time_seconds, 'sqlite')
+def _time_seconds_sqlite(element, compiler, **kw):
+    # SQLite complète une heure seule avec la date 2000-01-01 : la différence
+    # entre deux valeurs reste donc exacte. Les microsecondes (« HH:MM:SS.ffffff »)
+    # sont retirées avant : strftime les arrondirait à la seconde supérieure.
+    return "CAST(strftime('%%s', substr(%s, 1, 8)) AS INTEGER)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(time_seconds, 'postgresql')
+def _time_seconds_postgresql(element, compiler, **kw):
+    return "CAST(EXTRACT(EPOCH FROM %s) AS INTEGER)" % compiler.process(element.clauses, **kw)
+
+
+def keyset_after(columns, values, descending=False):
+    """
+    Condition « après cette ligne » pour une pagination par clé (seek).
+
+    Équivalent portable de (a, b) > (x, y), développé en
+    a > x OR (a = x AND b > y) pour que les index composites soient utilisés
+    sur tous les moteurs. Avec descending=True, la comparaison est inversée.
+    """
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        equal_prefix = [c == v for c, v in zip(columns[:i], values[:i])]
+        step = column < value if descending else column > value
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def upsert(connection, table, rows, key_columns, update):
+    """
+    Insère des lignes ou met à jour celles qui existent déjà (clé unique).
+
+    Utilise la syntaxe native de chaque moteur : ON CONFLICT DO UPDATE
+    (SQLite, PostgreSQL) ou ON DUPLICATE KEY UPDATE (MySQL/MariaDB).
+
+    Args:
+        connection: Connexion ou session SQLAlchemy
+        table: Table cible
+        rows (list[dict]): Lignes à écrire
+        key_columns (list[str]): Colonnes de la contrainte unique
+        update (callable): Reçoit les valeurs proposées (excluded/inserted)
+            et retourne le dictionnaire {colonne: expression} à appliquer
+    """
+    if not rows:
+        return
+
+    dialect = connection.get_bind().dialect.name if hasattr(connection, 'get_bind') else connection.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(index_elements=key_columns, set_=update(stmt.excluded))
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(index_elements=key_columns, set_=update(stmt.excluded))
+    elif dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        stmt = stmt.on_duplicate_key_update(**update(stmt.inserted))
+    else:
+        raise NotImplementedError(f"Upsert non pris en charge pour le moteur '{dialect}'")
+
+    connection.execute(stmt, rows)
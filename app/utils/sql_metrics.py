@@ -0,0 +1,161 @@
+import threading
+import time
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Longueur maximale conservée pour le texte de la requête la plus lente
+STATEMENT_MAX_LENGTH = 500
+
+
+class RequestSqlStats:
+    """Requêtes SQL émises pendant une requête HTTP."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement, elapsed_ms):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms >= self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+class SqlMetrics:
+    """
+    Instrumentation SQL par requête HTTP.
+
+    Les événements du moteur SQLAlchemy comptent, pour chaque requête HTTP,
+    le nombre d'instructions, le temps total passé en base et l'instruction
+    la plus lente. Ces mesures sont exposées dans l'en-tête Server-Timing,
+    dans un pied de page de débogage (base.html) et cumulées par endpoint
+    pour la page admin.system.
+
+    Configuration :
+        SQL_METRICS_ENABLED: active la collecte (par défaut True)
+        SQL_METRICS_SERVER_TIMING: ajoute l'en-tête Server-Timing
+        SQL_METRICS_DEBUG_FOOTER: affiche le pied de page (toujours en mode debug)
+
+    Les cumuls sont propres au processus et remis à zéro au redémarrage.
+    Les écritures du thread d'audit (hors requête) ne sont pas comptées.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQL_METRICS_ENABLED', True)
+        app.config.setdefault('SQL_METRICS_SERVER_TIMING', True)
+        app.config.setdefault('SQL_METRICS_DEBUG_FOOTER', False)
+        app.extensions['sql_metrics'] = self
+
+        if not app.config['SQL_METRICS_ENABLED']:
+            return
+
+        # Écoute au niveau de la classe Engine : valable pour tous les moteurs
+        # de Flask-SQLAlchemy, sans dépendre d'un contexte applicatif ici
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._listening = True
+
+        app.before_request(self._start_request)
+        app.after_request(self._add_server_timing)
+        # teardown : les réponses en flux (exports) sont comptées jusqu'au bout
+        app.teardown_request(self._finish_request)
+
+        @app.context_processor
+        def inject_sql_metrics():
+            show = app.debug or app.config['SQL_METRICS_DEBUG_FOOTER']
+            return {'sql_metrics': g.get('_sql_stats') if show else None}
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._sql_metrics_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_sql_metrics_start', None)
+        if started is None or not has_request_context():
+            return
+        stats = g.get('_sql_stats')
+        if stats is not None:
+            stats.record(statement, (time.perf_counter() - started) * 1000)
+
+    def _start_request(self):
+        g._sql_stats = RequestSqlStats()
+
+    def _add_server_timing(self, response):
+        stats = g.get('_sql_stats')
+        if stats is None:
+            return response
+        if current_app.config['SQL_METRICS_SERVER_TIMING']:
+            # Valeurs d'en-tête en ASCII : pas d'accent dans la description
+            response.headers.add('Server-Timing', f'db;dur={stats.total_ms:.1f};desc="{stats.count} SQL"')
+            response.headers.add('Server-Timing', f'db-slowest;dur={stats.slowest_ms:.1f}')
+            response.headers.add('Server-Timing', f'app;dur={stats.elapsed_ms:.1f}')
+        return response
+
+    def _finish_request(self, exc):
+        stats = g.pop('_sql_stats', None)
+        if stats is None or request.endpoint is None:
+            return
+        with self._lock:
+            entry = self._endpoints.get(request.endpoint)
+            if entry is None:
+                entry = self._endpoints[request.endpoint] = {
+                    'endpoint': request.endpoint,
+                    'requests': 0,
+                    'queries': 0,
+                    'max_queries': 0,
+                    'db_ms': 0.0,
+                    'slowest_ms': 0.0,
+                    'slowest_statement': None
+                }
+            entry['requests'] += 1
+            entry['queries'] += stats.count
+            entry['max_queries'] = max(entry['max_queries'], stats.count)
+            entry['db_ms'] += stats.total_ms
+            if stats.slowest_ms > entry['slowest_ms']:
+                entry['slowest_ms'] = stats.slowest_ms
+                entry['slowest_statement'] = (stats.slowest_statement or '')[:STATEMENT_MAX_LENGTH]
+
+    def top_endpoints(self, limit=10, order_by='queries'):
+        """
+        Endpoints les plus coûteux depuis le démarrage du processus.
+
+        Args:
+            limit (int): Nombre d'endpoints retournés
+            order_by (str): 'queries' (requêtes par appel) ou 'db_ms' (temps total en base)
+
+        Returns:
+            list[dict]: Cumuls par endpoint, avec moyennes par appel
+        """
+        with self._lock:
+            entries = [dict(entry) for entry in self._endpoints.values()]
+        for entry in entries:
+            entry['avg_queries'] = entry['queries'] / entry['requests']
+            entry['avg_db_ms'] = entry['db_ms'] / entry['requests']
+        sort_key = 'avg_queries' if order_by == 'queries' else 'db_ms'
+        return sorted(entries, key=lambda entry: entry[sort_key], reverse=True)[:limit]
+
+    def reset(self):
+        """Remet les cumuls par endpoint à zéro."""
+        with self._lock:
+            self._endpoints.clear()
+
+
+# Instance partagée par l'application
+sql_metrics = SqlMetrics()
@@ -90,9 +90,19 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # Index de recherche du journal d'audit (table FTS5 et ses tables internes,
+    # index trigrammes) : gérés hors des modèles, ignorés par l'autogénération
+    def include_name(name, type_, parent_names):
+        if type_ == 'table':
+            return not name.startswith('audit_log_fts')
+        if type_ == 'index':
+            return not name.endswith('_trgm')
+        return True
+
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_name", include_name)
 
     connectable = get_engine()
 
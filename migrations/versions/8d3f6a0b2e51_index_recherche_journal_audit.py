@@ -0,0 +1,58 @@
+"""Index de recherche plein texte du journal d'audit (FTS5 / pg_trgm)
+
+Revision ID: 8d3f6a0b2e51
+Revises: 4b8e21d9c6a7
+Create Date: 2026-10-17 17:05:13.482906
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3f6a0b2e51'
+down_revision = '4b8e21d9c6a7'
+branch_labels = None
+depends_on = None
+
+# Même structure que app/services/audit_search.py (figée ici pour la migration).
+# MySQL/MariaDB : pas d'index, la recherche reste un LIKE.
+COLUMNS = ('username', 'action', 'user_agent', 'details')
+FTS_TABLE = 'audit_log_fts'
+PG_DOCUMENT = " || ' ' || ".join(f"coalesce({name}, '')" for name in COLUMNS)
+PG_INDEXES = {
+    'ix_audit_log_search_trgm': PG_DOCUMENT,
+    'ix_audit_log_username_trgm': 'username',
+}
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        columns = ', '.join(COLUMNS)
+        new_values = ', '.join(f'new.{name}' for name in COLUMNS)
+        old_values = ', '.join(f'old.{name}' for name in COLUMNS)
+        insert_new = f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});"
+        delete_old = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+        op.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                   f"{columns}, content='audit_log', content_rowid='id', tokenize='trigram')")
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON audit_log BEGIN {insert_new} END")
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON audit_log BEGIN {delete_old} END")
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE ON audit_log BEGIN {delete_old} {insert_new} END")
+        # Indexation des entrées existantes
+        op.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, expression in PG_INDEXES.items():
+            op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON audit_log USING gin (({expression}) gin_trgm_ops)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('insert', 'delete', 'update'):
+            op.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{trigger}")
+        op.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif dialect == 'postgresql':
+        for name in PG_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Compare le coût par appel des filtres Jinja de dates avant (babel.format_date
+et ZoneInfo construits à chaque appel) et après (app/utils/formatting.py :
+locale, fuseaux et motifs préparés une fois, dates mémorisées).
+
+Les entrées imitent les pages réelles : une grille de 14 jours réaffichée,
+et des horodatages tous différents pour le journal d'audit.
+
+Exemples :
+    python scripts/bench_date_filters.py
+    python scripts/bench_date_filters.py --calls 200000
+"""
+import argparse
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+# --- ajoute le dossier parent au PYTHONPATH ---
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+from babel.dates import format_date
+from app.utils import formatting
+
+
+# --- Implémentations d'origine (app/__init__.py), conservées pour comparaison ---
+
+def date_fr_court_avant(value):
+    if not value:
+        return ''
+    return format_date(value, format="d MMM yyyy", locale='fr_FR')
+
+
+def jour_fr_avant(value):
+    if not value:
+        return ''
+    return format_date(value, format="EEEE", locale='fr_FR').capitalize()
+
+
+def datetime_local_avant(value):
+    if not value:
+        return ''
+    local_tz = ZoneInfo("America/Montreal")
+    local_dt = value.replace(tzinfo=ZoneInfo("UTC")).astimezone(local_tz)
+    return local_dt.strftime('%d/%m/%Y %H:%M:%S')
+
+
+def _per_call_us(func, values, calls):
+    """Durée moyenne d'un appel, en microsecondes (meilleure de 3 séries)."""
+    rounds = max(1, calls // len(values))
+
+    def run():
+        for value in values:
+            func(value)
+
+    best = min(timeit.repeat(run, number=rounds, repeat=3))
+    return best / (rounds * len(values)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=50000, help='Appels mesurés par filtre et par série')
+    args = parser.parse_args()
+
+    start = date(2026, 1, 5)
+    grid_days = [start + timedelta(days=i) for i in range(14)]
+    timestamps = [datetime(2026, 1, 5, 8) + timedelta(seconds=97 * i) for i in range(5000)]
+
+    # Les résultats doivent être identiques
+    for day in grid_days:
+        assert formatting.date_fr_court(day) == date_fr_court_avant(day)
+        assert formatting.jour_fr(day) == jour_fr_avant(day)
+    for ts in timestamps[:100]:
+        assert formatting.datetime_local(ts) == datetime_local_avant(ts)
+
+    cases = [
+        ('date_fr_court (grille)', date_fr_court_avant, formatting.date_fr_court, grid_days),
+        ('jour_fr (grille)', jour_fr_avant, formatting.jour_fr, grid_days),
+        ('datetime_local (audit)', datetime_local_avant, formatting.datetime_local, timestamps),
+    ]
+    print(f"{'Filtre':<24} {'avant µs/appel':>15} {'après µs/appel':>15} {'gain':>8}")
+    for name, before, after, values in cases:
+        before_us = _per_call_us(before, values, args.calls)
+        after_us = _per_call_us(after, values, args.calls)
+        print(f"{name:<24} {before_us:>15.2f} {after_us:>15.2f} {before_us / after_us:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Mesure le coût d'une connexion (vérification du mot de passe) pour plusieurs
+politiques de hachage, afin de choisir PASSWORD_HASH_METHOD en connaissance
+de cause.
+
+Exemples :
+    python scripts/bench_password_hashing.py
+    python scripts/bench_password_hashing.py --duration 5 --processes 4
+    python scripts/bench_password_hashing.py --method scrypt:16384:8:1 --method pbkdf2:sha256:600000
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# --- ajoute le dossier parent au PYTHONPATH ---
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Politiques comparées par défaut (algorithme et coût au format Werkzeug)
+DEFAULT_METHODS = [
+    'scrypt:32768:8:1',      # défaut Werkzeug 3.x
+    'scrypt:16384:8:1',
+    'pbkdf2:sha256:1000000', # défaut pbkdf2 Werkzeug 3.1
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:260000',
+]
+
+PASSWORD = 'correct horse battery staple'
+
+
+def _verify_loop(password_hash, duration):
+    """Vérifie le mot de passe en boucle pendant `duration` secondes (un cœur)."""
+    count = 0
+    start = time.perf_counter()
+    deadline = start + duration
+    while time.perf_counter() < deadline:
+        check_password_hash(password_hash, PASSWORD)
+        count += 1
+    return count, time.perf_counter() - start
+
+
+def bench(method, duration, processes):
+    password_hash = generate_password_hash(PASSWORD, method=method)
+
+    if processes == 1:
+        results = [_verify_loop(password_hash, duration)]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_verify_loop, [password_hash] * processes, [duration] * processes))
+
+    total = sum(count for count, _ in results)
+    elapsed = max(seconds for _, seconds in results)
+    per_core = sum(count / seconds for count, seconds in results) / len(results)
+    return {
+        'method': method,
+        'hash_length': len(password_hash),
+        'ms_per_login': 1000 / per_core if per_core else float('inf'),
+        'logins_per_sec_per_core': per_core,
+        'logins_per_sec_total': total / elapsed if elapsed else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--method', action='append', dest='methods',
+                        help='Politique à mesurer (répétable) ; par défaut une sélection scrypt/pbkdf2')
+    parser.add_argument('--duration', type=float, default=2.0, help='Durée de mesure par politique, en secondes')
+    parser.add_argument('--processes', type=int, default=1,
+                        help=f'Processus en parallèle (cœurs disponibles : {os.cpu_count()})')
+    args = parser.parse_args()
+
+    methods = args.methods or DEFAULT_METHODS
+    print(f"{'Politique':<26} {'ms/connexion':>13} {'conn/s/cœur':>12} {'conn/s total':>13} {'longueur':>9}")
+    for method in methods:
+        r = bench(method, args.duration, args.processes)
+        print(f"{r['method']:<26} {r['ms_per_login']:>13.1f} {r['logins_per_sec_per_core']:>12.1f} "
+              f"{r['logins_per_sec_total']:>13.1f} {r['hash_length']:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Mesure les routes principales (connexion, saisie, validation, rapports,
+exports) sur des bases SQLite synthétiques de plusieurs tailles.
+
+Pour chaque route : temps d'exécution (médiane et premier appel, à froid),
+nombre de requêtes SQL et pic mémoire Python (tracemalloc). Les résultats
+sont écrits en JSON ; avec --baseline, ils sont comparés à une exécution
+précédente et les régressions sont signalées (code de sortie 1).
+
+Les bases générées sont conservées dans --data-dir et réutilisées tant que
+les paramètres (taille, jours, graine, date de fin) sont identiques ; chaque
+exécution travaille sur une copie pour ne pas altérer le jeu de référence.
+
+Exemples :
+    python scripts/bench_routes.py --scale 100 --scale 1k
+    python scripts/bench_routes.py --output bench/avant.json
+    python scripts/bench_routes.py --output bench/apres.json --baseline bench/avant.json
+    python scripts/bench_routes.py --scale 10k --days 365 --endpoint admin.export_timesheets
+"""
+import argparse
+import json
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime
+from pathlib import Path
+
+# --- ajoute le dossier parent au PYTHONPATH ---
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+from flask import url_for
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models.user import User
+from app.util import user_snapshot
+from app.utils.cache import invalidate_all_caches
+
+# Tailles prédéfinies (nombre d'utilisateurs)
+SCALES = {'100': 100, '1k': 1000, '10k': 10000}
+
+PASSWORD = 'password'
+
+# (nom, rôle connecté, méthode, endpoint, arguments d'URL)
+ENDPOINTS = [
+    ('auth.login', None, 'POST', 'auth.login', {}),
+    ('employee.timesheet', 'employee', 'GET', 'employee.timesheet', {}),
+    ('manager.dashboard', 'manager', 'GET', 'manager.dashboard', {}),
+    ('manager.pending_timesheets', 'manager', 'GET', 'manager.pending_timesheets', {}),
+    ('manager.employee_list', 'manager', 'GET', 'manager.employee_list', {}),
+    ('manager.hours_report', 'manager', 'GET', 'manager.hours_report', {}),
+    ('admin.dashboard', 'admin', 'GET', 'admin.dashboard', {}),
+    ('admin.user_activity_report', 'admin', 'GET', 'admin.user_activity_report', {}),
+    ('admin.global_hours_report', 'admin', 'GET', 'admin.global_hours_report', {}),
+    ('admin.system_audit_report', 'admin', 'GET', 'admin.system_audit_report', {}),
+    ('admin.audit_logs', 'admin', 'GET', 'admin.audit_logs', {}),
+    ('admin.export_users', 'admin', 'GET', 'admin.export_users', {'format': 'csv'}),
+    ('admin.export_timesheets', 'admin', 'GET', 'admin.export_timesheets', {'format': 'csv'}),
+    ('admin.export_complete', 'admin', 'GET', 'admin.export_complete', {'format': 'json'}),
+    ('admin.export_audit_logs', 'admin', 'GET', 'admin.export_audit_logs', {}),
+]
+
+
+class BenchConfig(Config):
+    WTF_CSRF_ENABLED = False
+    AUDIT_LOG_MODE = 'sync'
+
+
+def _config_for(database_path):
+    return type('BenchDatabaseConfig', (BenchConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{database_path}"
+    })
+
+
+def dataset_path(data_dir, users, days, audit_per_user, seed, end_date):
+    return Path(data_dir) / f"bench_{users}u_{days}j_{audit_per_user}a_s{seed}_{end_date.isoformat()}.db"
+
+
+def build_dataset(path, users, days, audit_per_user, seed, end_date):
+    """Crée la base synthétique de référence si elle n'existe pas déjà."""
+    if path.exists():
+        print(f"  base existante : {path.name}")
+        return
+
+    from app.services.synthetic import generate_dataset
+    from app.services.rollups import rebuild_rollups
+    from app.services.audit_facets import rebuild_audit_facets
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix('.tmp')
+    partial.unlink(missing_ok=True)
+
+    app = create_app(_config_for(partial))
+    start = time.perf_counter()
+    with app.app_context():
+        db.create_all()
+        generate_dataset(users=users, days=days, audit_per_user=audit_per_user, seed=seed,
+                         password=PASSWORD, end_date=end_date,
+                         progress=lambda message: print(f"    {message}"))
+        rebuild_rollups()
+        rebuild_audit_facets()
+        db.session.remove()
+        db.engine.dispose()
+    partial.rename(path)
+    print(f"  base générée en {time.perf_counter() - start:.1f} s : {path.name}")
+
+
+class QueryCounter:
+    """Compte les requêtes SQL émises par un moteur."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def _login_client(client, user):
+    with client.session_transaction() as sess:
+        sess['user_id'] = user.id
+        sess['role'] = user.role
+        sess['username'] = user.username
+        sess['user_snapshot'] = user_snapshot(user)
+
+
+def _call(app, counter, name, role, method, path, users, trace_memory=False):
+    """Exécute une requête (réponse consommée entièrement) et retourne ses mesures."""
+    client = app.test_client()
+    if role:
+        _login_client(client, users[role])
+        # Certaines pages redirigent vers leur URL canonique (ex. période courante)
+        kwargs = {'follow_redirects': True}
+    else:
+        kwargs = {'data': {'username': users['employee'].username, 'password': PASSWORD}}
+
+    counter.count = 0
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    response = client.open(path, method=method, **kwargs)
+    body_size = len(response.get_data())
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    response.close()
+
+    if response.status_code >= 400 or (role and response.status_code != 200):
+        raise RuntimeError(f"{name} : réponse HTTP {response.status_code} inattendue")
+    if not role and response.location and response.location.endswith(path):
+        raise RuntimeError(f"{name} : la connexion a échoué")
+    return elapsed, counter.count, peak, body_size
+
+
+def bench_scale(label, database_path, repeat, selected):
+    """Mesure toutes les routes sélectionnées sur une copie de la base de référence."""
+    work_path = database_path.with_name(database_path.stem + '.work.db')
+    shutil.copyfile(database_path, work_path)
+    invalidate_all_caches()
+
+    app = create_app(_config_for(work_path))
+    with app.app_context():
+        engine = db.engine
+        users = {role: User.query.filter_by(role=role).order_by(User.id).first()
+                 for role in ('employee', 'manager', 'admin')}
+        user_count = User.query.count()
+        db.session.expunge_all()
+        db.session.remove()
+        with app.test_request_context():
+            paths = {name: url_for(endpoint, **args) for name, _, _, endpoint, args in ENDPOINTS}
+
+    # Requêtes émises hors de tout contexte applicatif : chacune a son propre
+    # contexte (et son propre flask.g), comme en production
+    counter = QueryCounter(engine)
+    results = []
+    for name, role, method, _, _ in ENDPOINTS:
+        if selected and name not in selected:
+            continue
+        path = paths[name]
+
+        timings = []
+        queries = []
+        body_size = 0
+        for _ in range(repeat):
+            elapsed, count, _, body_size = _call(app, counter, name, role, method, path, users)
+            timings.append(elapsed * 1000)
+            queries.append(count)
+        # Pic mémoire mesuré à part : tracemalloc ralentit l'exécution
+        _, _, peak, _ = _call(app, counter, name, role, method, path, users, trace_memory=True)
+
+        result = {
+            'scale': label,
+            'users': user_count,
+            'endpoint': name,
+            'wall_ms': round(statistics.median(timings), 2),
+            'first_ms': round(timings[0], 2),
+            'min_ms': round(min(timings), 2),
+            'queries': max(queries),
+            'peak_kib': round(peak / 1024, 1),
+            'response_kib': round(body_size / 1024, 1),
+        }
+        results.append(result)
+        print(f"  {name:<30} {result['wall_ms']:>10.1f} {result['first_ms']:>10.1f} "
+              f"{result['queries']:>8} {result['peak_kib']:>11.1f} {result['response_kib']:>11.1f}")
+
+    engine.dispose()
+    work_path.unlink(missing_ok=True)
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """
+    Compare les résultats à une exécution de référence.
+
+    Une régression est signalée si le temps médian ou le pic mémoire augmente
+    de plus de `threshold` (et de plus de `min_delta_ms` pour le temps, pour
+    ignorer le bruit), ou si le nombre de requêtes SQL augmente.
+    """
+    reference = {(r['scale'], r['endpoint']): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        base = reference.get((r['scale'], r['endpoint']))
+        if base is None:
+            continue
+        reasons = []
+        if r['wall_ms'] > base['wall_ms'] * (1 + threshold) and r['wall_ms'] - base['wall_ms'] > min_delta_ms:
+            reasons.append(f"temps {base['wall_ms']:.1f} → {r['wall_ms']:.1f} ms")
+        if r['queries'] > base['queries']:
+            reasons.append(f"requêtes {base['queries']} → {r['queries']}")
+        if base['peak_kib'] and r['peak_kib'] > base['peak_kib'] * (1 + threshold):
+            reasons.append(f"mémoire {base['peak_kib']:.0f} → {r['peak_kib']:.0f} Kio")
+        if reasons:
+            regressions.append((r['scale'], r['endpoint'], reasons))
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', action='append', dest='scales', choices=list(SCALES),
+                        help='Taille à mesurer (répétable) ; par défaut toutes')
+    parser.add_argument('--days', type=int, default=90,
+                        help='Jours couverts par les feuilles de temps (365 pour ~2,4 M lignes à 10k)')
+    parser.add_argument('--audit-per-user', type=int, default=100, help='Entrées d\'audit par utilisateur')
+    parser.add_argument('--seed', type=int, default=42, help='Graine du jeu de données')
+    parser.add_argument('--end-date', type=date.fromisoformat, default=date.today(),
+                        help='Dernier jour couvert (AAAA-MM-JJ, aujourd\'hui par défaut)')
+    parser.add_argument('--repeat', type=int, default=5, help='Exécutions par route')
+    parser.add_argument('--endpoint', action='append', dest='endpoints',
+                        choices=[name for name, *_ in ENDPOINTS], help='Route à mesurer (répétable)')
+    parser.add_argument('--data-dir', default=str(root / 'instance' / 'bench'),
+                        help='Dossier des bases générées')
+    parser.add_argument('--output', default='bench_routes.json', help='Fichier de résultats JSON')
+    parser.add_argument('--baseline', help='Résultats de référence à comparer')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Hausse relative tolérée (temps, mémoire) avant de signaler une régression')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                        help='Hausse absolue minimale du temps pour être signalée')
+    args = parser.parse_args()
+
+    results = []
+    for label in args.scales or list(SCALES):
+        users = SCALES[label]
+        print(f"== {label} utilisateurs ==")
+        path = dataset_path(args.data_dir, users, args.days, args.audit_per_user, args.seed, args.end_date)
+        build_dataset(path, users, args.days, args.audit_per_user, args.seed, args.end_date)
+        print(f"  {'Route':<30} {'médiane ms':>10} {'1er ms':>10} {'requêtes':>8} "
+              f"{'pic Kio':>11} {'réponse Kio':>11}")
+        results.extend(bench_scale(label, path, args.repeat, set(args.endpoints or ())))
+
+    output = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'days': args.days,
+            'audit_per_user': args.audit_per_user,
+            'seed': args.seed,
+            'end_date': args.end_date.isoformat(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(output, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"Résultats écrits dans {output_path}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if not regressions:
+            print("Aucune régression par rapport à la référence.")
+            return
+        print(f"{len(regressions)} régression(s) :")
+        for scale, endpoint, reasons in regressions:
+            print(f"  [{scale}] {endpoint} : {', '.join(reasons)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
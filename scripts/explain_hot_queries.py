@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Affiche le plan d'exécution (EXPLAIN) des requêtes les plus fréquentes de
+l'application, avant et après les index composites de la migration
+c17c26ac183a.
+
+Le plan « avant » est obtenu dans une transaction qui supprime ces index
+puis est annulée (ROLLBACK) : la base n'est pas modifiée. SQLite et
+PostgreSQL acceptent le DDL transactionnel ; sous MySQL, seul le plan
+actuel est affiché.
+
+Exemples :
+    python scripts/explain_hot_queries.py
+    python scripts/explain_hot_queries.py --database-uri sqlite:///instance/bench/bench.db
+    python scripts/explain_hot_queries.py --database-uri postgresql://... --analyze
+"""
+import argparse
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# --- ajoute le dossier parent au PYTHONPATH ---
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+from dotenv import load_dotenv
+load_dotenv(dotenv_path=root / '.env')
+
+from sqlalchemy import func, select
+from app import create_app, db
+from app.config import Config
+from app.models.timesheet import Timesheet, TimesheetModifier
+from app.models.audit_log import AuditLog
+
+# Index ajoutés par la migration c17c26ac183a : (table, nom)
+NEW_INDEXES = [
+    ('timesheet', 'ix_timesheet_status_date'),
+    ('timesheet', 'ix_timesheet_validator_id'),
+    ('timesheet_modifier', 'ix_timesheet_modifier_timesheet_id'),
+    ('audit_log', 'ix_audit_log_username_timestamp'),
+]
+
+
+def _sample_values():
+    """Valeurs réelles de la base, pour des plans représentatifs."""
+    employee_id = db.session.query(Timesheet.user_id).order_by(Timesheet.id.desc()).limit(1).scalar() or 1
+    validator_id = db.session.query(Timesheet.validator_id) \
+        .filter(Timesheet.validator_id.isnot(None)).limit(1).scalar() or 1
+    action = db.session.query(AuditLog.action).order_by(AuditLog.id.desc()).limit(1).scalar() or 'login_success'
+    username = db.session.query(AuditLog.username) \
+        .filter(AuditLog.username.isnot(None)).order_by(AuditLog.id.desc()).limit(1).scalar() or 'admin'
+    return employee_id, validator_id, action, username
+
+
+def hot_queries():
+    """Requêtes représentatives des pages et rapports : (titre, instruction)."""
+    employee_id, validator_id, action, username = _sample_values()
+    today = date.today()
+    period_start = today - timedelta(days=13)
+    month_start = today.replace(day=1)
+
+    period_ids = select(Timesheet.id).where(
+        Timesheet.user_id == employee_id,
+        Timesheet.date.between(period_start, today)
+    )
+    return [
+        ("Grille de l'employé (user_id + période)",
+         select(Timesheet).where(Timesheet.user_id == employee_id,
+                                 Timesheet.date.between(period_start, today))),
+        ("File d'approbation (status + date)",
+         select(Timesheet).where(Timesheet.status == 'submitted')
+         .order_by(Timesheet.date.desc(), Timesheet.id.desc()).limit(50)),
+        ("Heures approuvées du mois par employé",
+         select(Timesheet.user_id, func.sum(Timesheet.net_minutes))
+         .where(Timesheet.status == 'approved', Timesheet.date.between(month_start, today))
+         .group_by(Timesheet.user_id)),
+        ("Feuilles validées par un manager",
+         select(Timesheet).where(Timesheet.validator_id == validator_id)
+         .order_by(Timesheet.date.desc()).limit(50)),
+        ("Modificateurs des feuilles d'une période",
+         select(TimesheetModifier).where(TimesheetModifier.timesheet_id.in_(period_ids))),
+        ("Journal d'audit filtré par action",
+         select(AuditLog).where(AuditLog.action == action,
+                                AuditLog.timestamp >= datetime.combine(today - timedelta(days=30), datetime.min.time()))
+         .order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()).limit(50)),
+        ("Historique d'audit d'un utilisateur",
+         select(AuditLog).where(AuditLog.username == username)
+         .order_by(AuditLog.timestamp.desc()).limit(50)),
+    ]
+
+
+def _explain(cursor, dialect, sql, analyze, label=''):
+    """Retourne les lignes du plan d'exécution, prêtes à afficher."""
+    if dialect == 'sqlite':
+        # Le commentaire distingue le texte SQL entre les passes : sqlite3 garde
+        # sinon le plan déjà préparé dans son cache d'instructions
+        cursor.execute(f'EXPLAIN QUERY PLAN /* {label} */ ' + sql)
+        rows = cursor.fetchall()
+        depth = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            lines.append('  ' * depth[node_id] + detail)
+        return lines
+    if dialect == 'postgresql':
+        cursor.execute(('EXPLAIN (ANALYZE, BUFFERS) ' if analyze else 'EXPLAIN ') + sql)
+        return [row[0] for row in cursor.fetchall()]
+    cursor.execute(('EXPLAIN ANALYZE ' if analyze else 'EXPLAIN ') + sql)
+    columns = [column[0] for column in cursor.description]
+    return [', '.join(f"{name}={value}" for name, value in zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _plans(raw, dialect, statements, analyze, drop_indexes):
+    """Plans de toutes les requêtes, éventuellement sans les nouveaux index (annulé ensuite)."""
+    if dialect == 'sqlite':
+        # Transaction explicite : le pilote sqlite3 valide sinon le DDL aussitôt
+        raw.isolation_level = None
+        raw.execute('BEGIN')
+    cursor = raw.cursor()
+    try:
+        if drop_indexes:
+            for table, name in NEW_INDEXES:
+                if dialect == 'postgresql':
+                    cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+                else:
+                    cursor.execute(f'DROP INDEX IF EXISTS {name}')
+        label = 'sans index' if drop_indexes else 'actuel'
+        return [_explain(cursor, dialect, sql, analyze, label) for sql in statements]
+    finally:
+        cursor.close()
+        if dialect == 'sqlite':
+            raw.execute('ROLLBACK')
+        else:
+            raw.rollback()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-uri', help='Base à analyser (par défaut celle de la configuration)')
+    parser.add_argument('--analyze', action='store_true',
+                        help='EXPLAIN ANALYZE (PostgreSQL, MySQL) : exécute réellement les requêtes')
+    parser.add_argument('--show-sql', action='store_true', help='Affiche aussi le SQL de chaque requête')
+    args = parser.parse_args()
+
+    config = Config
+    if args.database_uri:
+        config = type('ExplainConfig', (Config,), {'SQLALCHEMY_DATABASE_URI': args.database_uri})
+    app = create_app(config)
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        queries = hot_queries()
+        db.session.remove()
+        statements = [str(stmt.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+                      for _, stmt in queries]
+
+        raw = db.engine.raw_connection()
+        try:
+            driver = raw.driver_connection
+            after = _plans(driver, dialect, statements, args.analyze, drop_indexes=False)
+            before = None
+            if dialect in ('sqlite', 'postgresql'):
+                before = _plans(driver, dialect, statements, args.analyze, drop_indexes=True)
+        finally:
+            raw.close()
+
+    print(f"Moteur : {dialect}")
+    for i, (title, _) in enumerate(queries):
+        print(f"\n=== {title} ===")
+        if args.show_sql:
+            print(statements[i])
+        if before is not None:
+            print("-- Avant (sans les index composites) :")
+            for line in before[i]:
+                print(f"   {line}")
+            print("-- Après :")
+        for line in after[i]:
+            print(f"   {line}")
+    if before is None:
+        print(f"\nPlan « avant » indisponible sous {dialect} (DDL non transactionnel) : "
+              "comparez avec une exécution sur une base à la révision précédente.")
+
+
+if __name__ == '__main__':
+    main()
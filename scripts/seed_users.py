@@ -13,8 +13,7 @@ load_dotenv(dotenv_path=root / '.env')
 
 # Imports de votre application
 from app import create_app, db
-from app.models.user import User
-from werkzeug.security import generate_password_hash
+from app.services.accounts import DEFAULT_ACCOUNTS, create_accounts
 
 
 def main():
@@ -24,37 +23,21 @@ def main():
       • gestionnaire  / password / rôle = 'manager'
       • admin    / password / rôle = 'admin'
       • samuel   / password / rôle = 'admin'  # Compte admin additionnel
+
+    Équivalent à `flask seed` ; voir `flask seed --help` pour générer aussi
+    des données synthétiques en masse.
     """
     app = create_app()
     with app.app_context():
-        comptes = [
-            {'username': 'employe', 'email': 'employe@example.com', 'password': 'password', 'role': 'employee', 'first_name': 'Test', 'last_name': 'Employee'},
-            {'username': 'gestionnaire',  'email': 'gestionnaire@example.com',  'password': 'password', 'role': 'manager', 'first_name': 'Admin', 'last_name': 'Manager'},
-            {'username': 'admin',    'email': 'admin@example.com',    'password': 'password', 'role': 'admin', 'first_name': 'Super', 'last_name': 'Admin'},
-            {'username': 'samuel',   'email': 'samuel@example.com',   'password': 'password', 'role': 'admin', 'first_name': 'Samuel', 'last_name': 'Fréchette'},
-        ]
-
-        for info in comptes:
-            if User.query.filter_by(username=info['username']).first():
-                print(f"🏷️ L'utilisateur '{info['username']}' existe déjà, on passe.")
-                continue
-
-            # Crée l'utilisateur
-            u = User(
-                username=info['username'],
-                email=info['email'],
-                role=info['role'],
-                first_name=info['first_name'],
-                last_name=info['last_name'],
-            )
-            # Hash du mot de passe en pbkdf2:sha256 pour rester sous 128 caractères
-            u.password_hash = generate_password_hash(info['password'], method='pbkdf2:sha256')
-
-            db.session.add(u)
-            print(f"✅ Utilisateur '{info['username']}' ajouté.")
+        # Une requête pour les comptes existants, un hachage (sel propre) par compte
+        created, skipped = create_accounts(DEFAULT_ACCOUNTS)
+        for username in skipped:
+            print(f"🏷️ L'utilisateur '{username}' existe déjà, on passe.")
+        for username in created:
+            print(f"✅ Utilisateur '{username}' ajouté.")
 
         db.session.commit()
-        print("🎉 Seed terminé : 4 comptes créés.")
+        print(f"🎉 Seed terminé : {len(created)} compte(s) créé(s).")
 
 if __name__ == '__main__':
     main()
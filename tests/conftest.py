@@ -0,0 +1,55 @@
+import pytest
+from app import create_app, db
+from app.config import Config
+from app.utils.cache import invalidate_all_caches
+
+
+class TestConfig(Config):
+    # Base SQLite en mémoire, recréée pour chaque test
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+    # Écritures d'audit immédiates (pas de thread d'arrière-plan)
+    AUDIT_LOG_MODE = 'sync'
+    # Hachage rapide : les tests créent beaucoup de comptes
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    FRAGMENT_CACHE_ENABLED = False
+
+
+@pytest.fixture
+def app(tmp_path):
+    class AppConfig(TestConfig):
+        AUDIT_ARCHIVE_DIR = str(tmp_path / 'audit_archive')
+
+    app = create_app(AppConfig)
+    # Caches propres au processus : rien ne doit survivre d'un test à l'autre
+    invalidate_all_caches()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    """Ouvre une session pour un nouvel utilisateur du rôle donné ; retourne l'utilisateur."""
+    from app.models.user import User
+
+    def login_as(role, username=None):
+        username = username or role
+        user = User(username=username, email=f'{username}@example.com',
+                    first_name=username.title(), last_name='Test', role=role)
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+        with client.session_transaction() as session:
+            session['user_id'] = user.id
+            session['role'] = user.role
+        return user
+
+    return login_as
@@ -0,0 +1,53 @@
+import re
+from datetime import datetime, timedelta
+from app import db
+from app.models.audit_log import AuditLog
+from app.services.audit_archive import archive_audit_logs
+
+FIRST_DAY = datetime(2025, 1, 1, 12)
+DAYS = 240
+ARCHIVED_BEFORE = datetime(2025, 6, 1)
+# Entrées du 1er janvier au 31 mai
+ARCHIVED = 151
+
+
+def total_count(client, **params):
+    page = client.get('/admin/security/audit-logs', query_string=params)
+    assert page.status_code == 200
+    return int(re.search(r'Environ (\d+) entrée', page.get_data(as_text=True)).group(1))
+
+
+def seed_and_archive():
+    db.session.execute(AuditLog.__table__.insert(), [
+        {'timestamp': FIRST_DAY + timedelta(days=day), 'action': 'login_success',
+         'resource': 'auth', 'username': 'emp'}
+        for day in range(DAYS)
+    ])
+    db.session.commit()
+    result = archive_audit_logs(ARCHIVED_BEFORE)
+    assert result['deleted'] == ARCHIVED
+
+
+def test_to_date_only_reads_archives(client, login):
+    login('admin')
+    seed_and_archive()
+    assert AuditLog.query.count() == DAYS - ARCHIVED
+
+    previous = 0
+    for to_date in ('2025-03-01', '2025-05-31', '2025-06-01', '2025-07-15', '2025-12-31'):
+        count = total_count(client, to_date=to_date)
+        # Élargir l'intervalle ne fait jamais baisser le total
+        assert count >= previous, to_date
+        previous = count
+
+    assert total_count(client, to_date='2025-03-01') == 60
+    assert total_count(client, to_date='2025-07-15') == 196
+    assert total_count(client, to_date='2025-12-31') == DAYS
+
+
+def test_start_after_boundary_reads_table_only(client, login):
+    login('admin')
+    seed_and_archive()
+
+    assert total_count(client, from_date='2025-07-01') == DAYS - ARCHIVED - 30
+    assert total_count(client, from_date='2025-05-01', to_date='2025-06-30') == 61
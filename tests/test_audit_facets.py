@@ -0,0 +1,51 @@
+from app.models.audit_log import AuditLogFacet
+from app.services import audit_facets as facets
+from app.utils.audit import audit_writer
+
+
+def write(action, username, user_id=1, times=1):
+    audit_writer.submit_many([
+        {'action': action, 'resource': 'auth', 'user_id': user_id, 'username': username}
+        for _ in range(times)
+    ])
+
+
+def cached():
+    return facets._facets_cache.get('facets') is not None
+
+
+def test_cache_kept_until_top_list_changes(app, monkeypatch):
+    monkeypatch.setattr(facets, 'TOP_USERNAMES', 2)
+    write('login_success', 'alice', times=5)
+    write('login_success', 'bob', times=3)
+    write('login_success', 'carol', times=1)
+    assert facets.audit_facets() == (['login_success'], ['alice', 'bob'])
+
+    # Utilisateur hors de la liste qui n'y entre pas : cache conservé
+    write('login_success', 'carol')
+    assert cached()
+    # Utilisateur déjà listé : cache conservé
+    write('login_success', 'bob')
+    assert cached()
+
+    # carol dépasse le plus petit compteur de la liste (bob : 4)
+    write('login_success', 'carol', times=3)
+    assert not cached()
+    assert facets.audit_facets() == (['login_success'], ['alice', 'carol'])
+
+    # Nouvelle action : cache vidé
+    write('logout', 'alice')
+    assert not cached()
+    assert facets.audit_facets()[0] == ['login_success', 'logout']
+
+
+def test_unauthenticated_usernames_not_counted(app):
+    write('login_failed', 'attacker-1', user_id=None)
+    write('login_failed', 'attacker-2', user_id=None)
+    write('login_success', 'alice')
+
+    assert facets.audit_facets() == (['login_failed', 'login_success'], ['alice'])
+    assert AuditLogFacet.query.filter_by(facet='username').count() == 1
+
+    facets.rebuild_audit_facets()
+    assert facets.audit_facets() == (['login_failed', 'login_success'], ['alice'])
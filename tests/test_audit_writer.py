@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+from app.models.audit_log import AuditLog
+from app.utils import audit
+from app.utils.audit import audit_writer
+
+ENTRIES = [{'action': 'login_success', 'resource': 'auth', 'user_id': 1, 'username': 'emp'}] * 3
+
+
+@pytest.fixture
+def failing_writes(app, monkeypatch):
+    """Fait échouer les `n` prochaines écritures comme une base verrouillée."""
+    monkeypatch.setattr(audit_writer, 'retry_delay', 0)
+    increment_facets = audit.increment_facets
+    remaining = []
+
+    def flaky(connection, entries):
+        if remaining:
+            remaining.pop()
+            raise OperationalError('INSERT', {}, Exception('database is locked'))
+        increment_facets(connection, entries)
+
+    monkeypatch.setattr(audit, 'increment_facets', flaky)
+    return lambda n: remaining.extend([None] * n)
+
+
+def test_batch_retried_until_written(failing_writes):
+    before = audit_writer.stats()
+    failing_writes(audit_writer.max_attempts - 1)
+    audit_writer.submit_many(ENTRIES)
+
+    # Chaque échec a annulé sa transaction : aucune entrée en double
+    assert AuditLog.query.count() == 3
+    stats = audit_writer.stats()
+    assert stats['retried'] - before['retried'] == audit_writer.max_attempts - 1
+    assert stats['dropped'] == before['dropped']
+
+
+def test_batch_dropped_after_max_attempts_is_counted(failing_writes, client, login):
+    before = audit_writer.stats()['dropped']
+    failing_writes(audit_writer.max_attempts)
+    audit_writer.submit_many(ENTRIES)
+
+    assert AuditLog.query.count() == 0
+    assert audit_writer.stats()['dropped'] == before + 3
+
+    login('admin')
+    page = client.get('/admin/system').get_data(as_text=True)
+    assert 'Entrées perdues' in page
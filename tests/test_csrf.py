@@ -0,0 +1,50 @@
+import re
+import pytest
+
+
+def csrf_token(response):
+    """Premier jeton CSRF d'une page rendue."""
+    return re.search(r'name="csrf_token" value="([^"]+)"', response.get_data(as_text=True)).group(1)
+
+
+@pytest.mark.parametrize('endpoint', ['/admin/system/sql-metrics/reset', '/admin/system/cache/clear'])
+def test_admin_system_actions_require_token(client, login, endpoint):
+    login('admin')
+    token = csrf_token(client.get('/admin/system'))
+
+    assert client.post(endpoint).status_code == 400
+    assert client.post(endpoint, data={'csrf_token': 'invalide'}).status_code == 400
+    response = client.post(endpoint, data={'csrf_token': token})
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/admin/system')
+
+
+def test_bulk_review_requires_token(app, client, login):
+    from datetime import date, time
+    from app import db
+    from app.models.timesheet import Timesheet
+    from app.models.user import User
+
+    employee = User(username='emp', email='emp@example.com', first_name='Emp', last_name='X', role='employee')
+    db.session.add(employee)
+    db.session.flush()
+    for day in (3, 4):
+        db.session.add(Timesheet(user_id=employee.id, date=date(2025, 3, day),
+                                 start_time=time(8), end_time=time(16), status='submitted'))
+    db.session.commit()
+    login('manager')
+
+    # Les trois formulaires de la file portent le jeton
+    for view in ('list', 'employee'):
+        page = client.get(f'/manager/timesheets/pending?view={view}&employee_id={employee.id}')
+        assert page.status_code == 200
+        token = csrf_token(page)
+    assert page.get_data(as_text=True).count('name="csrf_token"') == 2
+
+    form = {'action': 'approve', 'employee_id': employee.id}
+    assert client.post('/manager/timesheets/review', data=form).status_code == 400
+    assert Timesheet.query.filter_by(status='approved').count() == 0
+
+    response = client.post('/manager/timesheets/review', data=dict(form, csrf_token=token))
+    assert response.status_code == 302
+    assert Timesheet.query.filter_by(status='approved').count() == 2
@@ -0,0 +1,38 @@
+from datetime import date, time
+import pytest
+from app import db
+from app.models.code import Modifier
+from app.models.timesheet import Timesheet, TimesheetModifier
+from app.models.user import User
+
+CASES = [
+    (time(8), time(16, 30), 30, None),
+    (time(8, 0, 40), time(16, 0, 20), 0, None),         # 479 min 40 s
+    (time(8, 0, 0, 900000), time(9, 0, 59, 999999), 0, None),
+    (time(9, 15, 59), time(17), 45, -30),
+    (time(17), time(8), 0, None),                        # fin avant début
+    (time(8), None, 0, None),
+]
+
+
+@pytest.mark.parametrize('start, end, pause, modifier_minutes', CASES)
+def test_python_and_sql_agree(app, start, end, pause, modifier_minutes):
+    user = User(username='emp', email='emp@example.com', first_name='E', last_name='X', role='employee')
+    db.session.add(user)
+    db.session.flush()
+    timesheet = Timesheet(user_id=user.id, date=date(2025, 3, 3), start_time=start, end_time=end,
+                          break_duration=pause)
+    if modifier_minutes is not None:
+        timesheet.modificateurs.append(TimesheetModifier(modifier=Modifier(nom='repas', valeur_minutes=modifier_minutes)))
+    db.session.add(timesheet)
+    db.session.commit()
+    orm_minutes = timesheet.net_minutes
+
+    # Chemin des mises à jour groupées (upserts de la grille)
+    db.session.execute(Timesheet.refresh_net_minutes(Timesheet.id == timesheet.id))
+    db.session.commit()
+    db.session.expire_all()
+
+    assert orm_minutes == timesheet.compute_net_minutes()
+    assert timesheet.net_minutes == orm_minutes
+    assert db.session.scalar(db.select(Timesheet.computed_net_minutes()).where(Timesheet.id == timesheet.id)) == orm_minutes
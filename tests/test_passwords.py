@@ -0,0 +1,26 @@
+from werkzeug.security import check_password_hash
+from app.models.user import User
+from app.services.accounts import create_accounts
+from app.utils.passwords import hash_passwords
+
+
+def test_shared_password_hashed_separately(app):
+    hashes = hash_passwords(['secret', 'secret', 'other'])
+
+    assert len(set(hashes)) == 3
+    assert all(check_password_hash(password_hash, 'secret') for password_hash in hashes[:2])
+    assert check_password_hash(hashes[2], 'other')
+
+
+def test_create_accounts_salts_each_account(app):
+    accounts = [
+        {'username': name, 'email': f'{name}@example.com', 'password': 'password',
+         'role': 'employee', 'first_name': name, 'last_name': 'X'}
+        for name in ('ann', 'ben', 'cat')
+    ]
+    created, skipped = create_accounts(accounts)
+
+    users = User.query.order_by(User.username).all()
+    assert created == ['ann', 'ben', 'cat'] and skipped == []
+    assert len({user.password_hash for user in users}) == 3
+    assert all(user.check_password('password') for user in users)
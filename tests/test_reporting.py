@@ -0,0 +1,100 @@
+from datetime import date, time, timedelta
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models.user import User
+from app.models.timesheet import Timesheet
+from app.services.reporting import user_period_stats
+
+START = date(2025, 3, 3)
+
+
+def add_employees(count, first=0):
+    """`count` employés avec quelques feuilles approuvées ou soumises chacun."""
+    for number in range(first, first + count):
+        user = User(username=f'emp{number:03d}', email=f'emp{number:03d}@example.com',
+                    first_name='Emp', last_name=str(number), role='employee')
+        user.set_password('password')
+        db.session.add(user)
+        db.session.flush()
+        for day in range(number % 4 + 1):
+            db.session.add(Timesheet(
+                user_id=user.id, date=START + timedelta(days=day),
+                start_time=time(8), end_time=time(16, 15 * (day % 3)), break_duration=30,
+                status='approved' if day % 2 == 0 else 'submitted'
+            ))
+    db.session.commit()
+
+
+def count_queries(function):
+    """(nombre de requêtes SQL émises, résultat) d'un appel à `function`."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        result = function()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return len(statements), result
+
+
+def stats_query_count():
+    # Session vide : les utilisateurs déjà chargés ne faussent pas le compte
+    db.session.expunge_all()
+    return count_queries(lambda: [
+        (stat['user'].username, stat['timesheet_count'], stat['total_hours'])
+        for stat in user_period_stats(START, START + timedelta(days=13), role='employee')
+    ])
+
+
+def test_query_count_does_not_grow_with_employees(app):
+    add_employees(3)
+    small_count, small_stats = stats_query_count()
+
+    add_employees(27, first=3)
+    large_count, large_stats = stats_query_count()
+
+    assert len(small_stats) == 3
+    assert len(large_stats) == 30
+    assert small_count == large_count == 1
+
+
+def test_totals_match_timesheet_hours(app):
+    add_employees(12)
+    # Feuille hors période : ni comptée ni additionnée
+    outside = User.query.filter_by(username='emp000').one()
+    db.session.add(Timesheet(user_id=outside.id, date=START - timedelta(days=1),
+                             start_time=time(8), end_time=time(12), status='approved'))
+    # Employé sans feuille : présent avec des totaux nuls
+    idle = User(username='idle', email='idle@example.com', first_name='Idle', last_name='X', role='employee')
+    idle.set_password('password')
+    db.session.add(idle)
+    db.session.commit()
+
+    end = START + timedelta(days=13)
+    stats = {stat['user'].username: stat for stat in user_period_stats(START, end, role='employee')}
+
+    assert set(stats) == {user.username for user in User.query.filter_by(role='employee')}
+    for user in User.query.filter_by(role='employee'):
+        timesheets = Timesheet.query.filter(
+            Timesheet.user_id == user.id, Timesheet.date.between(START, end)
+        ).all()
+        approved = sum(timesheet.hours for timesheet in timesheets if timesheet.status == 'approved')
+        assert stats[user.username]['timesheet_count'] == len(timesheets)
+        assert stats[user.username]['total_hours'] == pytest.approx(approved)
+    assert stats['idle'] == {'user': stats['idle']['user'], 'timesheet_count': 0, 'total_hours': 0.0}
+
+
+def test_role_filter_and_open_end(app):
+    add_employees(2)
+    manager = User(username='mgr', email='mgr@example.com', first_name='Mgr', last_name='X', role='manager')
+    manager.set_password('password')
+    db.session.add(manager)
+    db.session.commit()
+
+    assert [stat['user'].username for stat in user_period_stats(START, role='employee')] == ['emp000', 'emp001']
+    assert 'mgr' in {stat['user'].username for stat in user_period_stats(START)}
@@ -0,0 +1,43 @@
+from datetime import date, time
+from app import db
+from app.models.rollup import HoursDailyRollup, HoursMonthlyRollup
+from app.models.timesheet import Timesheet
+from app.models.user import User
+from app.services.rollups import refresh_user_days, verify_rollups
+
+
+def test_refresh_replaces_rows_in_place(app):
+    user = User(username='emp', email='emp@example.com', first_name='E', last_name='X', role='employee')
+    db.session.add(user)
+    db.session.flush()
+    days = [date(2025, 3, 3), date(2025, 3, 4), date(2025, 4, 1)]
+    sheets = [Timesheet(user_id=user.id, date=day, start_time=time(8), end_time=time(16), status='submitted')
+              for day in days]
+    db.session.add_all(sheets)
+    db.session.flush()
+    refresh_user_days(user.id, days)
+    db.session.commit()
+    assert verify_rollups() == []
+    assert HoursMonthlyRollup.query.filter_by(month=date(2025, 3, 1), status='submitted').one().sheet_count == 2
+
+    # Changement de statut : la ligne « submitted » du jour disparaît, le mois est scindé
+    sheets[0].status = 'approved'
+    # Recalcul répété sur les mêmes jours : mise à jour des lignes existantes
+    refresh_user_days(user.id, days[:2])
+    refresh_user_days(user.id, days[:2])
+    db.session.commit()
+
+    assert verify_rollups() == []
+    assert {(row.day, row.status) for row in HoursDailyRollup.query} == {
+        (days[0], 'approved'), (days[1], 'submitted'), (days[2], 'submitted')
+    }
+    march = {row.status: (row.net_minutes, row.sheet_count)
+             for row in HoursMonthlyRollup.query.filter_by(month=date(2025, 3, 1))}
+    assert march == {'approved': (480, 1), 'submitted': (480, 1)}
+
+    # Plus aucune feuille ce jour-là : les lignes du jour et du mois sont supprimées
+    db.session.delete(sheets[2])
+    refresh_user_days(user.id, [days[2]])
+    db.session.commit()
+    assert verify_rollups() == []
+    assert HoursMonthlyRollup.query.filter_by(month=date(2025, 4, 1)).count() == 0